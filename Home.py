@@ -1,6 +1,22 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
+from utils.data import VERSION_ENTRIES, dataset_version
+from utils.sidebar import sidebar_header, sidebar_footer
+
+#dataset tratado disponível para download
+CLEANED_PATH = 'dataset/fome_zero_cleaned.csv'
+
+@st.cache_data(show_spinner=False, max_entries=VERSION_ENTRIES)
+def cleaned_csv( path, version ):
+    '''
+        Função que lê o dataset tratado e o converte para o download uma única vez por versão do arquivo
+        Inputs:
+            path = caminho do arquivo ('str')
+            version = versão do arquivo retornada por dataset_version
+        Output: bytes do CSV
+    '''
+    df = pd.read_csv(path)
+    return df.to_csv().encode('utf-8')
 
 st.set_page_config(
     page_title = 'Home',
@@ -8,28 +24,18 @@ st.set_page_config(
 )
 
 with st.sidebar:
-    image = Image.open('logo.png')
-    st.image(image, width= 120)
-
-    st.title('Fome Zero')
-    st.header('Marketplace de restaurantes')
-    st.markdown('''---''')
+    sidebar_header()
 
     st.header('Dados tratados')
-    df = pd.read_csv('dataset/fome_zero_cleaned.csv')
-    @st.cache_data
-    def convert_df(df):
-        return df.to_csv().encode('utf-8')
-    csv = convert_df(df)
+    csv = cleaned_csv(CLEANED_PATH, dataset_version(CLEANED_PATH))
     st.download_button(
         label="Download",
         data=csv,
         file_name='fome_zero_cleaned.csv',
         mime='text/csv',
     )
-    st.markdown('''---''')
 
-    st.header('Powered by Oiluj')
+    sidebar_footer()
 
 st.write('# Fome Zero - Strategy Dashboard')
 
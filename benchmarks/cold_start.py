@@ -0,0 +1,154 @@
+'''
+    Benchmark de cold start das páginas
+
+    Para cada página, inicia um processo Python novo (caches e módulos vazios, como no primeiro
+    acesso após subir o servidor) com 'python -X importtime' e mede:
+        first_render_ms = do pedido do rerun até o primeiro elemento enviado ao navegador
+        script_ms = do pedido do rerun até o fim da execução da página
+        process_ms = tempo total do processo (inclui iniciar o Python e importar o Streamlit)
+        heavy_imports_ms = tempo de importação das bibliotecas pesadas carregadas no processo
+
+    O cache em disco (utils/disk_cache.py) é compartilhado entre os processos: use --no-disk-cache
+    para medir o cold start sem ele (como no primeiro acesso após alterar o dataset ou o código)
+
+    Uso (na raiz do projeto):
+        python benchmarks/cold_start.py --repeat 3
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+#bibliotecas pesadas acompanhadas no relatório do -X importtime
+HEAVY_MODULES = ['folium', 'branca', 'streamlit_folium', 'plotly', 'PIL', 'inflection']
+
+#prefixo da linha com o resultado do processo filho
+RESULT_PREFIX = 'COLD_START '
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def child( page_name ):
+    '''
+        Função executada no processo filho: roda a página uma vez e imprime os tempos em JSON
+        Input: nome da página (como registrado pelo Streamlit)
+        Output: None
+    '''
+    start = time.perf_counter()
+    from session_memory import ROOT, setup_runtime
+    from load_test import MAIN_SCRIPT, STOP_EVENTS, app_pages
+    from streamlit.runtime.scriptrunner import RerunData, ScriptRunnerEvent
+    from streamlit.testing.local_script_runner import LocalScriptRunner
+
+    os.chdir(ROOT)
+    setup_runtime()
+    page = next(page for page in app_pages() if page['page_name'] == page_name)
+    harness_ms = (time.perf_counter() - start) * 1000
+
+    runner = LocalScriptRunner(MAIN_SCRIPT)
+    finished = threading.Event()
+    timings = {}
+
+    def on_event( sender, event, **kwargs ):
+        now = time.perf_counter()
+        if event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG and 'first_render' not in timings:
+            message = kwargs['forward_msg']
+            if message.WhichOneof('type') == 'delta' and message.delta.WhichOneof('type') == 'new_element':
+                timings['first_render'] = now
+        elif event in STOP_EVENTS:
+            timings['stopped'] = now
+            finished.set()
+    runner.on_event.connect(on_event, weak=False)
+
+    run_start = time.perf_counter()
+    runner.request_rerun(RerunData(page_script_hash=page['page_script_hash']))
+    runner.start()
+    finished.wait()
+    runner.request_stop()
+    runner.join()
+
+    result = {'harness_ms': round(harness_ms, 1),
+              'first_render_ms': round((timings.get('first_render', timings['stopped']) - run_start) * 1000, 1),
+              'script_ms': round((timings['stopped'] - run_start) * 1000, 1)}
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+def import_times( stderr ):
+    '''
+        Função que soma o tempo de importação (cumulativo, em ms) das bibliotecas pesadas
+        a partir da saída do 'python -X importtime' (inclui as dependências que elas importam)
+        Input: saída de erro do processo ('str')
+        Output: dict biblioteca -> ms
+    '''
+    entries = []
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+        if match:
+            entries.append((len(match.group(2)), int(match.group(1)), match.group(3)))
+
+    #o importtime lista cada módulo depois dos que ele importou: percorrendo ao contrário,
+    #a pilha guarda os ancestrais e só a importação mais externa de cada biblioteca é somada
+    times, stack = {}, []
+    for indent, cumulative, name in reversed(entries):
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        inside_heavy = bool(stack) and stack[-1][1]
+        root = name.split('.')[0]
+        heavy = root in HEAVY_MODULES
+        if heavy and not inside_heavy:
+            times[root] = times.get(root, 0) + round(cumulative / 1000, 1)
+        stack.append((indent, heavy or inside_heavy))
+    return times
+
+def cold_start( page_name, disk_cache=True ):
+    '''
+        Função que mede o cold start de uma página em um processo novo
+        Inputs:
+            page_name = nome da página
+            disk_cache = usa o cache em disco ('bool')
+        Output: dict com os tempos
+    '''
+    env = dict(os.environ, FOME_ZERO_DISK_CACHE='1' if disk_cache else '0')
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', page_name],
+                             capture_output=True, text=True, encoding='utf-8', env=env)
+    process_ms = (time.perf_counter() - start) * 1000
+    lines = [line for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f'{page_name} falhou:\n{process.stderr[-2000:]}')
+
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    heavy = import_times(process.stderr)
+    return {'page': page_name, **result, 'process_ms': round(process_ms, 1),
+            'heavy_imports_ms': round(sum(heavy.values()), 1),
+            'heavy_imports': ', '.join(f'{name} {ms:.0f}' for name, ms in sorted(heavy.items(), key=lambda item: -item[1]))}
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold start (processo novo) de cada página do dashboard')
+    parser.add_argument('--pages', nargs='+', help='nomes das páginas (padrão = todas)')
+    parser.add_argument('--repeat', type=int, default=3, help='repetições por página (mediana)')
+    parser.add_argument('--no-disk-cache', action='store_true', help='desativa o cache em disco nos processos')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        sys.exit(0)
+
+    import pandas as pd
+    from load_test import app_pages
+
+    page_names = args.pages or [page['page_name'] for page in app_pages()]
+    df2 = pd.DataFrame([cold_start(page_name, not args.no_disk_cache) for page_name in page_names for _ in range(args.repeat)])
+    numeric = ['harness_ms', 'first_render_ms', 'script_ms', 'process_ms', 'heavy_imports_ms']
+    df2 = (df2.groupby('page', sort=False)
+              .agg({**{column: 'median' for column in numeric}, 'heavy_imports': 'last'})
+              .reset_index())
+    print(df2.to_string(index=False))
@@ -0,0 +1,119 @@
+'''
+    Benchmark dos agrupamentos sobre colunas de texto x ids inteiros (utils.encoding)
+
+    Gera um dataset sintético com a mesma cardinalidade das colunas de texto do dataset real
+    (15 países, 125 cidades, 165 culinárias, ~2.3 mil localidades, frequências desiguais como no
+    dataset) e mede, para cada tamanho:
+        text_ms = agregação agrupando pelas colunas de texto (dataset sem as colunas de ids)
+        ids_ms = mesma agregação agrupando pelos ids inteiros e decodificando os rótulos no resultado
+    Os resultados das duas versões são comparados (devem ser idênticos).
+
+    Uso (na raiz do projeto):
+        python benchmarks/groupby_encoding.py --rows 100000 1000000 5000000 --repeat 3
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from utils.charts import ChartSpec, chart_specs, summary_table
+from utils.encoding import ENCODED_COLUMNS, StringDictionary, encode_columns, id_column
+from utils.ranking import rank_groups, rating_prior
+
+#quantidade de valores distintos de cada coluna de texto (como no dataset real)
+CARDINALITY = {
+    'country_name': 15,
+    'city': 125,
+    'cuisines': 165,
+    'locality': 2300
+}
+
+#gráficos da Visão Cidades (mesmas medidas e agrupamento)
+CITY_CHARTS = chart_specs(
+    ChartSpec('top_restaurants', '', ('city', 'country_name'), 'restaurant_id', 'count'),
+    ChartSpec('top_rating', '', ('city', 'country_name'), 'restaurant_id', 'count', predicate=('aggregate_rating', '>', 4)),
+    ChartSpec('top_cuisines', '', ('city', 'country_name'), 'cuisines', 'nunique')
+)
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def synthetic_dataset( rows, seed=0 ):
+    '''
+        Função que gera o dataset sintético (cada cidade pertence a um país, cada localidade a uma cidade)
+        Inputs:
+            rows = quantidade de linhas ('int')
+            seed = semente do gerador
+        Output: Dataframe
+    '''
+    rng = np.random.default_rng(seed)
+    def zipf_choice( n ):
+        weights = 1 / np.arange(1, n + 1)
+        return rng.choice(n, size=rows, p=weights / weights.sum())
+
+    city_country = rng.integers(0, CARDINALITY['country_name'], CARDINALITY['city'])
+    locality_city = rng.integers(0, CARDINALITY['city'], CARDINALITY['locality'])
+    locality = zipf_choice(CARDINALITY['locality'])
+    city = locality_city[locality]
+    labels = lambda prefix, codes: np.array([f'{prefix} {i:04d}' for i in range(codes.max() + 1)], dtype=object)[codes]
+    return pd.DataFrame({
+        'restaurant_id': np.arange(rows),
+        'country_name': labels('Country', city_country[city]),
+        'city': labels('City', city),
+        'locality': labels('Locality', locality),
+        'cuisines': labels('Cuisine', zipf_choice(CARDINALITY['cuisines'])),
+        'aggregate_rating': rng.integers(0, 50, rows) / 10,
+        'votes': rng.integers(0, 1000, rows)
+    })
+
+def best_ms( function, repeat ):
+    '''
+        Função que executa a função 'repeat' vezes e retorna o menor tempo e o último resultado
+        Inputs:
+            function = função sem argumentos
+            repeat = quantidade de execuções
+        Output: (tempo em ms, resultado)
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Agrupamentos sobre texto x ids inteiros')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cases = {
+        'summary_table(city, country_name)': lambda df: summary_table(df, CITY_CHARTS),
+        'rank_groups(cuisines)': lambda df: rank_groups(df, 'cuisines', rating_prior(df)),
+        'rank_groups(city, country_name)': lambda df: rank_groups(df, ['city', 'country_name'], rating_prior(df)),
+        'rank_groups(locality)': lambda df: rank_groups(df, 'locality', rating_prior(df))
+    }
+
+    print(f'{"case":<36} {"rows":>9} {"text_ms":>9} {"ids_ms":>9} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as folder:
+        dictionary = StringDictionary(os.path.join(folder, 'dictionaries.sqlite'))
+        for rows in args.rows:
+            df_text = synthetic_dataset(rows)
+            df_ids = encode_columns(df_text, dictionary)
+            assert all(id_column(column) in df_ids.columns for column in ENCODED_COLUMNS)
+            for name, case in cases.items():
+                text_ms, expected = best_ms(lambda: case(df_text), args.repeat)
+                ids_ms, result = best_ms(lambda: case(df_ids), args.repeat)
+                pd.testing.assert_frame_equal(result, expected)
+                print(f'{name:<36} {rows:>9} {text_ms:>9.1f} {ids_ms:>9.1f} {text_ms / ids_ms:>7.1f}x')
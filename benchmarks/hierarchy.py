@@ -0,0 +1,74 @@
+'''
+    Benchmark da árvore de agregados país -> cidade -> localidade (utils.hierarchy)
+
+    No dataset sintético de benchmarks/groupby_encoding.py mede, para cada tamanho:
+        build_ms = criação da árvore (uma vez por estado dos filtros)
+        expand_ms = abrir um nó (filhos de todas as cidades, um nó por vez), lendo os arrays da árvore
+        groupby_ms = os mesmos filhos recalculados com um groupby sobre as linhas da cidade
+    As quantidades de restaurantes de todos os nós são comparadas com um groupby por nível (devem ser idênticas).
+
+    Uso (na raiz do projeto):
+        python benchmarks/hierarchy.py --rows 100000 1000000 5000000 --repeat 3
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from groupby_encoding import best_ms, synthetic_dataset
+from utils.encoding import StringDictionary, encode_columns, id_column
+from utils.hierarchy import LEVELS, AggregateTree
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def check_tree( df1, tree ):
+    '''
+        Função que compara a quantidade de restaurantes de cada nó com um groupby por nível
+        Inputs:
+            df1 = Dataframe
+            tree = AggregateTree do dataframe
+        Output: None (AssertionError com diferença)
+    '''
+    for level in range(1, len(LEVELS) + 1):
+        expected = df1.groupby(LEVELS[:level]).size().to_dict()
+        nodes = np.flatnonzero(tree.depth == level)
+        result = {tuple(tree.path(node)) if level > 1 else tree.path(node)[0]: tree.measures['restaurants'][node] for node in nodes}
+        assert result == expected, f'nível {LEVELS[level - 1]}'
+    return None
+
+def regroup_children( df1, city_id ):
+    #filhos de uma cidade sem a árvore: recorte das linhas e groupby das localidades
+    df2 = df1.loc[df1[id_column('city')].to_numpy() == city_id, :]
+    return df2.groupby('locality').agg(restaurants=('restaurant_id', 'count'), aggregate_rating=('aggregate_rating', 'mean'),
+                                       votes=('votes', 'sum'))
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Árvore de agregados geográfica')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"rows":>9} {"nodes":>7} {"build_ms":>9} {"expand_ms":>10} {"groupby_ms":>11}')
+    with tempfile.TemporaryDirectory() as folder:
+        dictionary = StringDictionary(os.path.join(folder, 'dictionaries.sqlite'))
+        for rows in args.rows:
+            df1 = encode_columns(synthetic_dataset(rows), dictionary)
+            df1 = df1.assign(average_cost_for_two_USD=df1['aggregate_rating'] * 10.0)
+            build_ms, tree = best_ms(lambda: AggregateTree(df1), args.repeat)
+            check_tree(df1, tree)
+
+            cities = np.flatnonzero(tree.depth == 2)
+            city_ids = np.unique(df1[id_column('city')].to_numpy())
+            expand_ms, _ = best_ms(lambda: [tree.children(node) for node in cities], args.repeat)
+            groupby_ms, _ = best_ms(lambda: [regroup_children(df1, city_id) for city_id in city_ids], args.repeat)
+            print(f'{rows:>9} {len(tree):>7} {build_ms:>9.1f} {expand_ms / len(cities):>10.2f} {groupby_ms / len(city_ids):>11.2f}')
@@ -0,0 +1,124 @@
+'''
+    Verificação e benchmark dos kernels NumPy das agregações (utils.kernels)
+
+    Compara, tabela a tabela, as agregações das páginas calculadas pelos kernels com as calculadas
+    pelo groupby do pandas (FOME_ZERO_KERNELS=0), exigindo resultados idênticos:
+        1. No dataset real, para o dataset completo e para cada país e tipo de preço selecionado
+        2. No dataset real completo e no dataset sintético de benchmarks/groupby_encoding.py,
+           medindo também os tempos:
+            pandas_ms = groupby do pandas sobre os ids inteiros
+            kernels_ms = kernels NumPy sobre os mesmos ids
+
+    Uso (na raiz do projeto):
+        python benchmarks/kernels.py --rows 100000 1000000 5000000 --repeat 3
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from groupby_encoding import CITY_CHARTS, best_ms, synthetic_dataset
+from utils.charts import ChartSpec, chart_specs, summary_table
+from utils.data import COUNTRIES, PRICE_TYPES, dataset_version, filter_positions, filtered_view, load_data
+from utils.encoding import StringDictionary, encode_columns
+from utils.kernels import KERNELS_ENV
+from utils.ranking import rank_groups, rating_prior
+
+#gráficos da Visão Países (todas as agregações com kernel)
+COUNTRY_CHARTS = chart_specs(
+    ChartSpec('restaurants', '', ('country_name',), 'restaurant_id', 'count'),
+    ChartSpec('cities', '', ('country_name',), 'city', 'nunique'),
+    ChartSpec('votes', '', ('country_name',), 'votes', 'sum'),
+    ChartSpec('rating', '', ('country_name',), 'aggregate_rating', 'mean'),
+    ChartSpec('cost', '', ('country_name',), 'average_cost_for_two_USD', 'mean'),
+    ChartSpec('max_cost', '', ('country_name',), 'average_cost_for_two_USD', 'max'),
+    ChartSpec('min_rating', '', ('country_name',), 'aggregate_rating', 'min', predicate=('votes', '>', 100))
+)
+
+#agregações comparadas: nome -> função do dataframe
+CASES = {
+    'summary_table(country_name)': lambda df: summary_table(df, COUNTRY_CHARTS),
+    'summary_table(city, country_name)': lambda df: summary_table(df, CITY_CHARTS),
+    'rank_groups(cuisines)': lambda df: rank_groups(df, 'cuisines', rating_prior(df)),
+    'rank_groups(city, country_name)': lambda df: rank_groups(df, ['city', 'country_name'], rating_prior(df))
+}
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def run_mode( mode, function, *args ):
+    '''
+        Função que executa uma função com o modo das agregações informado (variável de ambiente)
+        Inputs:
+            mode = '0' (pandas) ou '1' (kernels)
+            function = função executada
+            args = argumentos da função
+        Output: resultado da função
+    '''
+    previous = os.environ.get(KERNELS_ENV)
+    os.environ[KERNELS_ENV] = mode
+    try:
+        return function(*args)
+    finally:
+        if previous is None:
+            del os.environ[KERNELS_ENV]
+        else:
+            os.environ[KERNELS_ENV] = previous
+
+def compare( df1, repeat ):
+    '''
+        Função que mede e compara cada agregação pelo pandas e pelos kernels
+        Inputs:
+            df1 = Dataframe com as colunas de ids
+            repeat = quantidade de execuções
+        Output: None (imprime uma linha por agregação)
+    '''
+    for name, case in CASES.items():
+        pandas_ms, expected = best_ms(lambda: run_mode('0', case, df1), repeat)
+        kernels_ms, result = best_ms(lambda: run_mode('1', case, df1), repeat)
+        pd.testing.assert_frame_equal(result, expected, obj=name)
+        print(f'{name:<36} {len(df1):>9} {pandas_ms:>10.1f} {kernels_ms:>11.1f} {pandas_ms / kernels_ms:>7.1f}x')
+    return None
+
+def check_dataset( df_all ):
+    '''
+        Função que compara kernels x pandas no dataset real para cada estado de filtro verificado
+        Input: Dataframe limpo
+        Output: quantidade de comparações
+    '''
+    states = [{}] + [{'country_options': [country]} for country in COUNTRIES.values()]
+    states += [{'price_options': [price]} for price in PRICE_TYPES]
+    checked = 0
+    for state in states:
+        df1 = filtered_view(df_all, filter_positions(df_all, **state))
+        for name, case in CASES.items():
+            pd.testing.assert_frame_equal(run_mode('1', case, df1), run_mode('0', case, df1), obj=f'{name} {state}')
+            checked += 1
+    return checked
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Kernels NumPy x groupby do pandas')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    df_all = load_data(dataset_version())
+    print(f'dataset: {check_dataset(df_all)} tabelas idênticas')
+
+    print(f'{"case":<36} {"rows":>9} {"pandas_ms":>10} {"kernels_ms":>11} {"speedup":>8}')
+    compare(df_all, args.repeat * 10)
+    with tempfile.TemporaryDirectory() as folder:
+        dictionary = StringDictionary(os.path.join(folder, 'dictionaries.sqlite'))
+        for rows in args.rows:
+            df_ids = encode_columns(synthetic_dataset(rows), dictionary)
+            compare(df_ids.assign(average_cost_for_two_USD=df_ids['aggregate_rating'] * 10.0), args.repeat)
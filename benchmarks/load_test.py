@@ -0,0 +1,281 @@
+'''
+    Teste de carga do dashboard (sem navegador, sem rede)
+
+    Simula N usuários virtuais em paralelo dentro de um único processo, como no servidor do
+    Streamlit (cada sessão executa a página em sua própria thread). Cada usuário navega entre
+    o Home.py e as quatro páginas e interage com os widgets encontrados na página:
+    alterna opções dos filtros, move sliders, troca seleções e faz buscas.
+
+    Ao final, exibe a latência de cada rerun (p50/p95/p99), a vazão (reruns por segundo),
+    os erros e a memória do processo.
+
+    Uso (na raiz do projeto):
+        python benchmarks/load_test.py --users 1 4 8 --duration 60
+        python benchmarks/load_test.py --users 8 --duration 120 --think 1.0 --json load_test.json
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from session_memory import ROOT, memory_mb, setup_runtime
+
+from streamlit import source_util
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.runtime.scriptrunner import RerunData, ScriptRunnerEvent
+from streamlit.testing.element_tree import parse_tree_from_messages
+from streamlit.testing.local_script_runner import LocalScriptRunner
+
+#script principal do app (as páginas são selecionadas pelo hash, como na navegação do Streamlit)
+MAIN_SCRIPT = os.path.join(ROOT, 'Home.py')
+
+#eventos que encerram a execução de um rerun
+STOP_EVENTS = (ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+               ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+               ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN)
+
+#tipos de widget que os usuários virtuais alteram
+WIDGET_TYPES = ['multiselect', 'slider', 'select_slider', 'selectbox', 'radio', 'number_input', 'text_input']
+
+#widgets que alteram o estado do processo (não fazem parte de uma sessão comum)
+IGNORED_LABELS = ('Modo debug',)
+
+#buscas digitadas pelos usuários virtuais
+QUERIES = ['', 'pizza', 'cafe', 'sushi', 'burger', 'bar', 'Connaught Place', 'Av. Paulista', 'chines', 'grill']
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def app_pages():
+    '''
+        Função que retorna as páginas do app (Home.py e a pasta 'pages') como o Streamlit as registra
+        Output: lista de dicts com 'page_script_hash', 'page_name' e 'script_path'
+    '''
+    return list(source_util.get_pages(MAIN_SCRIPT).values())
+
+def container_blocks( messages ):
+    '''
+        Função que marca os blocos de st.container como blocos verticais
+        (o parser de testes do Streamlit 1.24 não aceita blocos sem tipo)
+        Input: mensagens enviadas ao navegador
+        Output: mensagens
+    '''
+    for message in messages:
+        if message.WhichOneof('type') == 'delta' and message.delta.WhichOneof('type') == 'add_block':
+            if message.delta.add_block.WhichOneof('type') is None:
+                message.delta.add_block.vertical.SetInParent()
+    return messages
+
+def run_page( page, session_state=None, widget_states=None, timeout=600 ):
+    '''
+        Função que:
+            1. Executa um rerun da página com o session_state da sessão e os widgets alterados
+            2. Mede o tempo entre o pedido do rerun e o fim da execução do script
+        Inputs:
+            page = página retornada por app_pages
+            session_state = SessionState da sessão (None = nova sessão)
+            widget_states = WidgetStates com os widgets alterados pelo usuário
+            timeout = tempo máximo em segundos
+        Output: (ElementTree com os elementos da página, latência em segundos)
+    '''
+    runner = LocalScriptRunner(MAIN_SCRIPT, session_state)
+    finished = threading.Event()
+
+    def on_event( sender, event, **kwargs ):
+        if event in STOP_EVENTS:
+            finished.set()
+    runner.on_event.connect(on_event, weak=False)
+
+    start = time.perf_counter()
+    runner.request_rerun(RerunData(widget_states=widget_states, page_script_hash=page['page_script_hash']))
+    runner.start()
+    if not finished.wait(timeout):
+        runner.request_stop()
+        runner.join()
+        raise RuntimeError(f"{page['page_name']} não terminou em {timeout}s")
+    latency = time.perf_counter() - start
+    runner.join()
+
+    tree = parse_tree_from_messages(container_blocks(runner.forward_msgs()))
+    tree.script_path = MAIN_SCRIPT
+    tree._session_state = runner.session_state
+    return tree, latency
+
+def random_interaction( tree, rng ):
+    '''
+        Função que escolhe um widget da página e altera seu valor como um usuário faria
+        Inputs:
+            tree = ElementTree do último rerun
+            rng = random.Random do usuário virtual
+        Output: (nome da ação, WidgetStates com o widget alterado) ou None se a página não tem widgets
+    '''
+    widgets = [widget for widget_type in WIDGET_TYPES for widget in tree.get(widget_type)
+               if not widget.disabled and not widget.label.startswith(IGNORED_LABELS)]
+    if not widgets:
+        return None
+
+    widget = rng.choice(widgets)
+    if widget.type == 'multiselect':
+        option = rng.choice(widget.options)
+        widget.unselect(option) if option in widget.value else widget.select(option)
+    elif widget.type == 'slider':
+        if isinstance(widget.value, int):
+            widget.set_value(rng.randrange(int(widget.min_value), int(widget.max_value) + 1, max(int(widget.step), 1)))
+        else:
+            widget.set_value(rng.uniform(widget.min_value, widget.max_value))
+    elif widget.type in ('select_slider', 'radio'):
+        widget.set_value(rng.choice(widget.options))
+    elif widget.type == 'selectbox':
+        widget.select_index(rng.randrange(len(widget.options)))
+    elif widget.type == 'number_input':
+        widget.set_value(round(rng.uniform(widget.min_value, widget.max_value), 4))
+    elif widget.type == 'text_input':
+        widget.set_value(rng.choice(QUERIES))
+
+    widget_states = WidgetStates()
+    widget_states.widgets.append(widget.widget_state())
+    return f'{widget.type}:{widget.label[:40]}', widget_states
+
+class VirtualUser( threading.Thread ):
+    '''
+        Classe que simula um usuário navegando no dashboard até o fim do teste
+
+        Inputs:
+            user_id = identificador do usuário
+            pages = páginas retornadas por app_pages
+            deadline = instante (time.perf_counter) de término do teste
+            switch = probabilidade de trocar de página em cada ação
+            think = tempo médio entre as ações em segundos (distribuição exponencial)
+            seed = semente do gerador aleatório
+    '''
+    def __init__( self, user_id, pages, deadline, switch=0.25, think=0.0, seed=None ):
+        super().__init__(daemon=True)
+        self.user_id = user_id
+        self.pages = pages
+        self.deadline = deadline
+        self.switch = switch
+        self.think = think
+        self.rng = random.Random(seed)
+        self.samples = []
+
+    def _record( self, page, action, latency, error=None ):
+        self.samples.append({'user': self.user_id, 'page': page['page_name'], 'action': action,
+                             'latency_s': latency, 'error': error, 'finished': time.perf_counter()})
+
+    def run( self ):
+        page = self.rng.choice(self.pages)
+        tree, latency = run_page(page)
+        self._record(page, 'open', latency)
+
+        while time.perf_counter() < self.deadline:
+            if self.think > 0:
+                time.sleep(self.rng.expovariate(1 / self.think))
+
+            interaction = None if self.rng.random() < self.switch else random_interaction(tree, self.rng)
+            if interaction is None:
+                page = self.rng.choice(self.pages)
+                action, widget_states = 'switch_page', None
+            else:
+                action, widget_states = interaction
+
+            try:
+                tree, latency = run_page(page, tree.session_state, widget_states)
+            except RuntimeError as error:
+                self._record(page, action, None, str(error))
+                continue
+            exceptions = tree.get('exception')
+            self._record(page, action, latency, exceptions[0].value if len(exceptions) > 0 else None)
+
+def percentiles( latency ):
+    '''
+        Função que resume as latências em milissegundos
+        Input: Series com as latências em segundos
+        Output: dict com p50, p95, p99 e máximo
+    '''
+    values = latency.dropna().values * 1000
+    if len(values) == 0:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50_ms': round(p50, 1), 'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1), 'max_ms': round(values.max(), 1)}
+
+def load_round( qtd_users, duration, switch, think, seed ):
+    '''
+        Função que:
+            1. Executa 'qtd_users' usuários virtuais em paralelo por 'duration' segundos
+            2. Resume latência, vazão, erros e memória da rodada
+        Inputs:
+            qtd_users = quantidade de usuários simultâneos
+            duration = duração em segundos
+            switch = probabilidade de trocar de página
+            think = tempo médio entre as ações
+            seed = semente dos geradores aleatórios
+        Output: (resumo da rodada, Dataframe com os reruns)
+    '''
+    pages = app_pages()
+    start = time.perf_counter()
+    users = [VirtualUser(user_id, pages, start + duration, switch, think, seed + user_id) for user_id in range(qtd_users)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - start
+
+    df2 = pd.DataFrame([sample for user in users for sample in user.samples])
+    rss, peak = memory_mb()
+    summary = {'users': qtd_users,
+               'reruns': len(df2),
+               'errors': int(df2['error'].notna().sum()),
+               'throughput_rps': round(len(df2) / elapsed, 2),
+               **percentiles(df2['latency_s']),
+               'rss_mb': round(rss, 1),
+               'peak_rss_mb': round(peak, 1)}
+    return summary, df2
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga do dashboard com usuários virtuais')
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 4, 8], help='usuários simultâneos de cada rodada')
+    parser.add_argument('--duration', type=float, default=60, help='duração de cada rodada em segundos')
+    parser.add_argument('--switch', type=float, default=0.25, help='probabilidade de trocar de página em cada ação')
+    parser.add_argument('--think', type=float, default=0.0, help='tempo médio entre as ações em segundos (0 = sem pausa)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cold', action='store_true', help='não aquece os caches antes das rodadas')
+    parser.add_argument('--json', help='arquivo para salvar o resumo e os reruns')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    setup_runtime()
+
+    if not args.cold:
+        for page in app_pages():
+            run_page(page)
+
+    summaries, reruns = [], []
+    for qtd_users in args.users:
+        summary, df2 = load_round(qtd_users, args.duration, args.switch, args.think, args.seed)
+        summaries.append(summary)
+        reruns.append(df2.assign(users=qtd_users))
+
+    df_summary = pd.DataFrame(summaries)
+    df_reruns = pd.concat(reruns, ignore_index=True)
+    print(df_summary.to_string(index=False))
+    print()
+    print(df_reruns.groupby(['users', 'page'])['latency_s'].apply(lambda latency: pd.Series(percentiles(latency)))
+                   .unstack().to_string())
+
+    errors = df_reruns.loc[df_reruns['error'].notna(), ['users', 'page', 'action', 'error']]
+    if len(errors) > 0:
+        print()
+        print(errors.drop_duplicates(['page', 'error']).to_string(index=False))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'summary': summaries, 'reruns': df_reruns.to_dict(orient='records')}, file, ensure_ascii=False, indent=1)
@@ -0,0 +1,146 @@
+'''
+    Benchmark de memória por sessões simultâneas
+
+    Executa uma página do dashboard em N sessões simultâneas dentro do mesmo processo
+    (cada sessão com seu próprio session_state, como no servidor do Streamlit), mantém
+    as sessões vivas e mede o RSS do processo após cada rodada.
+
+    Uso (na raiz do projeto):
+        python benchmarks/session_memory.py --page "pages/4_🍽️_Visão_Restaurantes.py" --sessions 1 5 10 20
+
+    Para comparar arquiteturas, execute o mesmo comando em duas versões do código (ex.: antes e
+    depois de um commit) e compare as colunas 'rss_mb' e 'mb_per_session'
+    (memória adicional por sessão após a primeira, que também carrega o dataset e os índices).
+
+    Com --cycles N, depois das rodadas de sessões, a data de modificação do dataset é alterada N vezes
+    (como um 'touch dataset/zomato.csv') e cada nova versão é aquecida em todas as páginas, como no
+    warm-up do servidor: o RSS deve ficar estável entre os ciclos (apenas VERSION_ENTRIES versões nos caches).
+    A data de modificação original do arquivo é restaurada no final.
+        python benchmarks/session_memory.py --sessions 1 --cycles 5
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+from unittest.mock import MagicMock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.element_tree import parse_tree_from_messages
+from streamlit.testing.local_script_runner import LocalScriptRunner
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def memory_mb():
+    '''
+        Função que retorna o RSS atual e o pico de RSS do processo em MB
+        Output: (rss atual, pico)
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open('/proc/self/status', encoding='utf-8') as file:
+            status = dict(line.split(':', 1) for line in file if ':' in line)
+        return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError):
+        return peak, peak
+
+def setup_runtime():
+    '''
+        Função que prepara um runtime do Streamlit em memória (mesma configuração dos testes do Streamlit)
+        Output: None
+    '''
+    config.set_option('runner.postScriptGC', False)
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    return None
+
+def run_sessions( page, qtd, timeout ):
+    '''
+        Função que:
+            1. Inicia 'qtd' sessões da página ao mesmo tempo
+            2. Aguarda todas terminarem e verifica se alguma gerou exceção
+        Inputs:
+            page = caminho da página
+            qtd = quantidade de sessões
+            timeout = tempo máximo em segundos
+        Output: lista de sessões (LocalScriptRunner)
+    '''
+    sessions = [LocalScriptRunner(page) for _ in range(qtd)]
+    for session in sessions:
+        session.request_rerun(RerunData())
+        session.start()
+
+    deadline = time.time() + timeout
+    while not all(session.script_stopped() for session in sessions):
+        if time.time() > deadline:
+            raise RuntimeError(f'sessões não terminaram em {timeout}s')
+        time.sleep(0.05)
+
+    for session in sessions:
+        tree = parse_tree_from_messages(session.forward_msgs())
+        if len(tree.get('exception')) > 0:
+            raise RuntimeError(tree.get('exception')[0].value)
+    return sessions
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RSS do processo por quantidade de sessões simultâneas')
+    parser.add_argument('--page', default='pages/4_🍽️_Visão_Restaurantes.py')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--cycles', type=int, default=0, help='trocas da versão do dataset (touch + warm-up)')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    #a troca de versão é feita pelos ciclos abaixo, não pela thread do warm-up
+    os.environ['FOME_ZERO_WARMUP'] = '0'
+    setup_runtime()
+
+    #sessões ficam vivas entre as rodadas, como usuários conectados ao mesmo servidor
+    alive = []
+    first_rss = None
+    print(f'page: {args.page}')
+    print(f'{"sessions":>8} {"rss_mb":>9} {"peak_mb":>9} {"mb_per_session":>15} {"round_s":>8}')
+    for qtd in sorted(args.sessions):
+        start = time.perf_counter()
+        alive.extend(run_sessions(args.page, qtd - len(alive), args.timeout))
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        rss, peak = memory_mb()
+        first_rss = rss if first_rss is None else first_rss
+        per_session = (rss - first_rss) / (len(alive) - 1) if len(alive) > 1 else 0.0
+        print(f'{len(alive):>8} {rss:>9.1f} {peak:>9.1f} {per_session:>15.2f} {elapsed:>8.2f}')
+
+    if args.cycles:
+        from utils.data import DATASET_PATH, dataset_version
+        from utils.warmup import warm_version
+
+        original = os.stat(DATASET_PATH)
+        print(f'{"cycle":>8} {"runs":>5} {"rss_mb":>9} {"peak_mb":>9} {"cycle_s":>8}')
+        try:
+            for cycle in range(1, args.cycles + 1):
+                start = time.perf_counter()
+                #nova versão do dataset (mesmo conteúdo, outra data de modificação)
+                os.utime(DATASET_PATH, ns=(original.st_atime_ns, original.st_mtime_ns + cycle * 1000000000))
+                runs = warm_version(dataset_version())
+                elapsed = time.perf_counter() - start
+                gc.collect()
+                rss, peak = memory_mb()
+                print(f'{cycle:>8} {runs:>5} {rss:>9.1f} {peak:>9.1f} {elapsed:>8.2f}')
+        finally:
+            os.utime(DATASET_PATH, ns=(original.st_atime_ns, original.st_mtime_ns))
@@ -1,242 +1,292 @@
 #========================================================
 # IMPORT LIBRARIES
 #========================================================
+import logging
+
 import pandas as pd
 import numpy as np
-import inflection
-import folium
-from folium.plugins import MarkerCluster
-import plotly.graph_objects as go
 import streamlit as st
-from streamlit_folium import folium_static
-from PIL import Image
+from utils.lazy import LazyModule
+from utils.kpis import KpiSnapshot
+from utils.sketches import approx_error
+from utils.spatial_index import SpatialIndex
+from utils.density import grid_density, density_geojson
+from utils.map_assets import MARKER_CALLBACK, popup_html, marker_rows
+from utils.data import VERSION_ENTRIES, load_data, data_validation, shared_positions, positions_mask, filtered_view
+from utils.sidebar import sidebar_header, sidebar_footer, validation_warning, filter_options, country_filter
+from utils.warmup import serving_version
+from utils.instrumentation import start_run, stage, timed, finish_run
+from utils.profiling import start_profile, finish_profile
+
+#bibliotecas pesadas importadas apenas no primeiro uso
+folium = LazyModule('folium')
+folium_plugins = LazyModule('folium.plugins')
+branca_colormap = LazyModule('branca.colormap')
+streamlit_folium = LazyModule('streamlit_folium')
+
+#chave do mapa de marcadores no st_folium e chave dos últimos limites retornados por ele
+#(usados quando a chave do componente no session_state não é encontrada)
+MAP_KEY = 'restaurant_map'
+MAP_BOUNDS_KEY = 'map_bounds'
+
+logger = logging.getLogger(__name__)
 
 #=======================================================
 # FUNCTIONS
 #=======================================================
-def clean_data( df1 ):
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_popup_html( _df1, version ):
     '''
-    Função que prepara e limpa o dataframe
-        
-        Limpezas efetuadas:
-            1. Formatação do título das colunas
-            2. Remoção de linhas duplicadas
-            3. Remoção de colunas com valores idênticos
-            4. Formatação da coluna 'cuisines' para mostrar 1 tipo de culinária
-            5. Remoção dos 'nan' da coluna 'cuisines'
-            6. Remoção de possível erro de digitação
-            7. Criação das colunas:
-                'color_name'= nome das cores
-                'country_name' = nome dos países
-                'price_type' = nome do tipo de preço
-                'exchange_rate' = taxa de câmbio USD/currency
-                'average_cost_for_two_USD' = preço para dois em dólar (data fixa)
-        
-            Input: Dataframe
-            Output: Dataframe
+        Função que pré-calcula o HTML do popup de todos os restaurantes (uma vez por versão do dataset)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: Series com o HTML dos popups
     '''
-    #---------------------------------------------------
-    # SUBFUNCIONS
-    #---------------------------------------------------
-    #renomear colunas do dataframe
-    def rename_columns(dataframe):
-        df = dataframe.copy()
-        title = lambda x: inflection.titleize(x)
-        spaces = lambda x: x.replace(' ', '')
-        snakecase = lambda x: inflection.underscore(x)
-        cols_old = list(df.columns)
-        cols_old = list(map(title, cols_old))
-        cols_old = list(map(spaces, cols_old))
-        cols_new = list(map(snakecase, cols_old))
-        df.columns = cols_new
-        return df
-    
-    #nome das cores por código
-    COLORS = {
-    '3F7E00': 'darkgreen',
-    '5BA829': 'green',
-    '9ACD32': 'lightgreen',
-    'CDD614': 'orange',
-    'FFBA00': 'red',
-    'CBCBC8': 'darkred',
-    'FF7800': 'darkred'
-    }
-    def color_name(color_code):
-        return COLORS[color_code]
-    
-    #preenchimento do nome dos países
-    COUNTRIES = {
-    1: 'India',
-    14: 'Australia',
-    30: 'Brazil',
-    37: 'Canada',
-    94: 'Indonesia',
-    148: 'New Zealand',
-    162: 'Philippines',
-    166: 'Qatar',
-    184: 'Singapore',
-    189: 'South Africa',
-    191: 'Sri Lanka',
-    208: 'Turkey',
-    214: 'United Arab Emirates',
-    215: 'England',
-    216: 'United States of America'
-    }
-    def country_name(country_id):
-        return COUNTRIES[country_id]
-    
-    #rótulo do tipo de preço dos pratos
-    def create_price_type(price_range):
-        if price_range == 1:
-            return 'cheap'
-        elif price_range == 2:
-            return 'normal'
-        elif price_range == 3:
-            return 'expensive'
-        else:
-            return 'gourmet'
-
-    #conversão de moeda para 'US dollar'
-    #date = 13-08-2023
-    EXCHANGE = {
-        'Indonesia': 0.000065735428,
-        'Sri Lanka': 0.0031340417,
-        'Philippines': 0.073999949,
-        'India': 0.012060175,
-        'South Africa': 0.052876995,
-        'Qatar': 0.27472527,
-        'United Arab Emirates': 0.27229408,
-        'Singapore': 0.73957914,
-        'Brazil': 0.20388112,
-        'Turkey': 0.037143494,
-        'Australia': 0.65059812,
-        'New Zealand': 0.59840393,
-        'United States of America': 1,
-        'England': 1.2695533,
-        'Canada': 0.7441021
-    }
-    def exchange_rate(country_name):
-        return EXCHANGE[country_name]
-
-    #---------------------------------------------------
-    # CODE
-    #---------------------------------------------------
-    #renomeando títulos das colunas
-    df1 = rename_columns( df1 )
-
-    #removendo dados duplicados
-    df1 = df1.drop_duplicates().reset_index(drop=True)
-
-    #removendo coluna com mesmos valores
-    df1 = df1.drop('switch_to_order_menu', axis=1)
-
-    #removendo linha com outlier muito acentuado 
-        #Obs: provável erro de digitação, pois custava mais de 2 milhões e era categorizado como 'cheap'
-    df1 = df1.drop(356, axis=0).reset_index(drop=True)
-
-    #categorizar restaurantes por um tipo de culinária
-    df1['cuisines'] = df1['cuisines'].astype(str)
-    df1.loc[:, 'cuisines'] = df1.loc[:, 'cuisines'].apply(lambda x: x.split(', ')[0])
-
-    #retirada dos nan's da coluna cuisines
-    linhas_select = df1['cuisines'] != 'nan'
-    df1 = df1.loc[linhas_select, :].reset_index(drop=True)
-
-    #criando coluna 'color_name' e preenchendo com o nome das cores
-    df1['color_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'color_name'] = color_name(df1.loc[i, 'rating_color'])
-    
-    #criando coluna 'country_name' e preenchendo com o nome dos países
-    df1['country_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'country_name'] = country_name(df1.loc[i, 'country_code'])
-    
-    #criando coluna 'price_type'
-    df1['price_type'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'price_type'] = create_price_type(df1.loc[i, 'price_range'])
-    
-    #criando coluna 'exchange_rate' e convertendo os preços para dólar
-    df1['exchange_rate'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'exchange_rate'] = exchange_rate(df1.loc[i, 'country_name'])
-        #conversão para dólar
-    df1['average_cost_for_two_USD'] = np.array(df1['average_cost_for_two']) * np.array(df1['exchange_rate'])
+    return popup_html(_df1)
+
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_spatial_index( _df1, version ):
+    '''
+        Função que cria o índice espacial dos restaurantes (uma vez por versão do dataset)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: SpatialIndex
+    '''
+    return SpatialIndex(_df1['latitude'], _df1['longitude'])
 
-    return df1
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_kpi_snapshot( _df1, version, error=None ):
+    '''
+        Função que calcula as métricas gerais do dataset completo e de cada país (uma vez por versão do dataset)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+            error = erro relativo do modo aproximado (None = valores distintos exatos)
+        Output: KpiSnapshot
+    '''
+    return KpiSnapshot(_df1, error)
 
-def country_map( df1 ):
+@st.cache_resource
+def map_widget_key( key ):
     '''
-        Função que elabora um mapa destacando a localização de todos os restaurantes cadastrados
-        Input: dataframe
-        Output: mapa
+        Função que retorna a chave do componente do st_folium no session_state (hash do mapa base fixo,
+        calculado como no streamlit_folium; uma vez por processo)
+        Input: key = chave do mapa passada ao st_folium
+        Output: chave do componente ('str')
     '''
-    df2 = (df1.loc[:, ['restaurant_name', 'longitude', 'latitude', 'cuisines', 'average_cost_for_two_USD', 'color_name', 'aggregate_rating']])
-    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    #depende de funções internas do streamlit-folium 0.13.0 (versão fixada no requirements.txt)
+    return streamlit_folium.generate_js_hash(streamlit_folium._get_map_string(folium.Map()), key)
+
+@st.cache_resource
+def map_key_warning( key ):
+    '''
+        Função que registra no log, uma única vez por processo, que a chave do componente não foi encontrada
+        Input: key = chave do mapa passada ao st_folium
+        Output: True
+    '''
+    logger.warning('st_folium: chave do componente de %s não encontrada no session_state (versão do streamlit-folium '
+                   'diferente da 0.13.0?); os marcadores passam a usar os limites da execução anterior', key)
+    return True
+
+def map_bounds( key ):
+    '''
+        Função que retorna os limites da área visível enviados pelo mapa na interação que disparou esta execução,
+        lidos do session_state antes de desenhar o mapa (os marcadores já saem da nova área, sem forçar outra execução).
+        Sem a chave do componente no session_state, usa os limites retornados pelo st_folium na execução anterior
+        Input: key = chave do mapa passada ao st_folium
+        Output: limites da área visível (None antes da primeira interação)
+    '''
+    widget_key = map_widget_key( key )
+    if widget_key in st.session_state:
+        return (st.session_state[widget_key] or {}).get('bounds')
+    return st.session_state.get(MAP_BOUNDS_KEY)
+
+def check_map_key( key, bounds ):
+    '''
+        Função que verifica, após o st_folium, se a chave do componente calculada por map_widget_key está no
+        session_state; se não estiver, registra um aviso no log e guarda os limites retornados para a próxima execução
+        Inputs:
+            key = chave do mapa passada ao st_folium
+            bounds = limites retornados pelo st_folium
+        Output: None
+    '''
+    if map_widget_key( key ) in st.session_state:
+        return None
+    map_key_warning( key )
+    st.session_state[MAP_BOUNDS_KEY] = bounds
+    return None
+
+@timed()
+def viewport_positions( restaurant_index, mask, bounds ):
+    '''
+        Função que:
+            1. Retorna as posições dos restaurantes filtrados dentro da área visível do mapa
+            2. Sem área visível (primeira renderização), retorna todos os restaurantes filtrados
+        Inputs:
+            restaurant_index = SpatialIndex
+            mask = array booleano com os restaurantes filtrados
+            bounds = limites retornados pelo st_folium
+        Output: array com as posições
+    '''
+    if not bounds or bounds['_southWest']['lat'] is None:
+        return np.flatnonzero(mask)
+
+    south, west = bounds['_southWest']['lat'], bounds['_southWest']['lng']
+    north, east = bounds['_northEast']['lat'], bounds['_northEast']['lng']
+    #o leaflet pode retornar longitudes fora de [-180, 180] ao arrastar o mapa
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+    return restaurant_index.within_bounds(south, west, north, east, mask)
+
+@timed()
+def country_map( df1, positions ):
+    '''
+        Função que elabora um mapa destacando a localização dos restaurantes cadastrados
+        (apenas os marcadores da área visível são enviados ao navegador)
+        Inputs:
+            df1 = dataframe completo (com a coluna 'popup_html')
+            positions = posições dos restaurantes a exibir
+        Output: limites da área visível retornados pelo st_folium
+    '''
+    #mapa base fixo: só o grupo de marcadores muda entre as interações
+    restaurant_map = folium.Map()
+    feature_group = folium.FeatureGroup(name='Restaurantes')
+    #marcadores criados no navegador a partir das colunas pré-calculadas
+    folium_plugins.FastMarkerCluster(marker_rows(df1, positions), callback=MARKER_CALLBACK).add_to(feature_group)
+
+    with stage('st_folium', rows_in=len(positions)):
+        map_data = streamlit_folium.st_folium(restaurant_map, key=MAP_KEY, feature_group_to_add=feature_group,
+                                              returned_objects=['bounds'], width=1024, height=600)
+
+    return map_data['bounds'] if map_data else None
+
+#métricas disponíveis para o mapa de densidade
+DENSITY_WEIGHTS = {
+    'Quantidade de restaurantes': None,
+    'Nota média': 'aggregate_rating',
+    'Preço médio para dois (USD)': 'average_cost_for_two_USD'
+}
+
+@timed()
+def density_map( df1, mode, weight, cell_size ):
+    '''
+        Função que elabora um mapa de densidade dos restaurantes filtrados
+        (o volume enviado ao navegador depende do número de células ocupadas, não de restaurantes)
+        Inputs:
+            df1 = dataframe filtrado
+            mode = 'Mapa de calor' ou 'Grade de densidade'
+            weight = chave de DENSITY_WEIGHTS
+            cell_size = tamanho da célula em graus
+        Output: None
+    '''
+    column = DENSITY_WEIGHTS[weight]
+    values = None if column is None else df1[column].astype(float)
+    df2 = grid_density(df1['latitude'], df1['longitude'], values, cell_size)
 
     restaurant_map = folium.Map()
-    marker_cluster = MarkerCluster().add_to(restaurant_map)
-    for i, location_info in df2.iterrows():
-        folium.Marker(
-            [location_info['latitude'],
-            location_info['longitude']],
-            popup=folium.Popup(html=f"<b>{location_info['restaurant_name']}</b><br><br>Valor médio para dois: ${location_info['average_cost_for_two_USD']} Dólares<br>Culinária: {location_info['cuisines']}<br>Nota média: {location_info['aggregate_rating']}/5.0", max_width=300),
-            icon=folium.Icon(color=location_info['color_name'], icon='utensils', prefix='fa')
-        ).add_to(marker_cluster)
+    feature_group = folium.FeatureGroup(name='Densidade')
+    if len(df2) > 0:
+        if mode == 'Mapa de calor':
+            intensity = df2['value'] / df2['value'].max() if df2['value'].max() > 0 else df2['value']
+            folium_plugins.HeatMap(np.column_stack([df2['latitude'], df2['longitude'], intensity]).tolist(),
+                    radius=20, min_opacity=0.3).add_to(feature_group)
+        else:
+            colormap = branca_colormap.linear.YlOrRd_09.scale(df2['value'].min(), df2['value'].max())
+            colormap.caption = weight
+            folium.GeoJson(density_geojson(df2),
+                           style_function=lambda feature: {'fillColor': colormap(feature['properties']['value']),
+                                                           'color': colormap(feature['properties']['value']),
+                                                           'weight': 1, 'fillOpacity': 0.6},
+                           tooltip=folium.GeoJsonTooltip(fields=['count', 'value'], aliases=['Restaurantes', weight])
+                          ).add_to(feature_group)
 
-    folium_static(restaurant_map, width=1024, height=600)
+    with stage('st_folium', rows_in=len(df2)):
+        streamlit_folium.st_folium(restaurant_map, key='density_map', feature_group_to_add=feature_group,
+                                   returned_objects=[], width=1024, height=600)
 
     return None
+
+@timed()
+def nearest_restaurants( df1, restaurant_index, mask, latitude, longitude, qtd ):
+    '''
+        Função que:
+            1. Retorna os restaurantes filtrados mais próximos de um ponto
+        Inputs:
+            df1 = dataframe completo
+            restaurant_index = SpatialIndex
+            mask = array booleano com os restaurantes filtrados
+            latitude, longitude = coordenadas do ponto
+            qtd = quantidade de restaurantes
+        Output: Dataframe
+    '''
+    positions, distances = restaurant_index.nearest(latitude, longitude, qtd, mask)
+    df2 = df1.loc[positions, ['restaurant_name', 'country_name', 'city', 'cuisines', 'average_cost_for_two_USD', 'aggregate_rating']].reset_index(drop=True)
+    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    df2['distance_km'] = distances.round(2)
+
+    return df2
 #---------------------------------- CODE LOGIC STRUTURE -----------------------------------
 
 #========================================================
-# IMPORT DATASET
+# INSTRUMENTATION
 #========================================================
-df = pd.read_csv('dataset/zomato.csv')
+start_run('Visão Geral')
+start_profile('Visão Geral')
 
 #========================================================
-# CLEAN DATA
+# IMPORT DATASET
 #========================================================
-df1 = clean_data( df )
+#dataset limpo (última versão aquecida pelo warm-up), lido uma vez por processo e compartilhado (somente leitura) entre as sessões
+data_version = serving_version()
+df_all = load_data( data_version )
 
 #========================================================
 # SET STREAMLIT PAGE WIDTH
 #========================================================
 st.set_page_config(page_title='Visão Geral', page_icon='📊', layout='wide')
 
+#========================================================
+# MAP ASSETS
+#========================================================
+#nova coluna em um novo dataframe: o dataset compartilhado não é alterado
+df_all = df_all.assign(popup_html=build_popup_html( df_all, data_version ))
+
 #========================================================
 # SIDEBAR LAYOUT
 #========================================================
 with st.sidebar:
-    image = Image.open('logo.png')
-    st.image(image, width=120)
-
-    st.title('Fome Zero')
-    st.header('Marketplace de restaurantes')
-    st.markdown('''---''')
+    sidebar_header()
 
     st.header('Filtros')
 
     #selecionar países
-    country_options = st.multiselect(
-        'Selecione quais países deseja visualizar os dados',
-        ['Philippines', 'Brazil', 'Australia', 'United States of America',
-        'Canada', 'Singapore', 'United Arab Emirates', 'India',
-        'Indonesia', 'New Zealand', 'England', 'Qatar', 'South Africa',
-         'Sri Lanka', 'Turkey'],
-        default = []
-    )
-    st.markdown('''---''')
-
-    st.header('Powered by Oiluj')
-
-#filtro países
-if not country_options:
-    df1 = df1
-else:
-    linhas_select = df1['country_name'].isin(country_options)
-    df1 = df1.loc[linhas_select, :]
+    country_options = country_filter( filter_options( df_all, data_version ) )
+
+    #aviso de linhas do dataset em quarentena (validação da carga)
+    validation_warning( *data_validation( data_version ) )
+
+    sidebar_footer()
+
+#índice espacial e métricas gerais por país do dataset completo
+restaurant_index = build_spatial_index( df_all, data_version )
+kpi_snapshot = build_kpi_snapshot( df_all, data_version, approx_error() )
+
+with stage('filters', rows_in=len(df_all)) as stage_info:
+    #filtros como posições do dataset compartilhado (memorizadas por estado canônico dos filtros)
+    positions_filtered = shared_positions( df_all, data_version, (country_options,) )
+    df1 = filtered_view( df_all, positions_filtered )
+    stage_info['rows_out'] = len(positions_filtered)
+
+#restaurantes filtrados (posições do dataset completo)
+map_mask = positions_mask( df_all, positions_filtered )
 
 #========================================================
 # PAGE LAYOUT
@@ -245,26 +295,57 @@ st.markdown('# 📊 Visão Geral')
 
 with st.container():
     st.markdown('## Métricas Gerais')
+    #métricas dos países selecionados a partir do snapshot (não percorre as linhas do dataset)
+    kpis = kpi_snapshot.metrics( country_options )
     col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
-        df2 = df1['restaurant_id'].nunique()
-        st.metric(label = 'Restaurantes cadastrados', value=df2)
+        st.metric(label = 'Restaurantes cadastrados', value=kpis['restaurants'])
     
     with col2:
-        df2 = df1['country_code'].nunique()
-        st.metric(label = 'Países cadastrados', value=df2)
+        st.metric(label = 'Países cadastrados', value=kpis['countries'])
     
     with col3:
-        df2 = df1['city'].nunique()
-        st.metric(label='Cidades cadastradas', value=df2)
+        st.metric(label='Cidades cadastradas', value=kpis['cities'])
     
     with col4:
-        df2 = df1['votes'].sum()
-        st.metric(label='Total de avaliações realizadas', value=df2)
+        st.metric(label='Total de avaliações realizadas', value=kpis['votes'])
     
     with col5:
-        df2 = df1['cuisines'].nunique()
-        st.metric(label='Tipos de culinária', value=df2)
+        st.metric(label='Tipos de culinária', value=kpis['cuisines'])
 
 st.markdown('## Mapa dos restaurantes')
-country_map(df1)
\ No newline at end of file
+col1, col2, col3 = st.columns(3)
+with col1:
+    map_mode = st.radio('Modo do mapa', ['Marcadores', 'Mapa de calor', 'Grade de densidade'], horizontal=True)
+with col2:
+    density_weight = st.selectbox('Métrica da densidade', list(DENSITY_WEIGHTS.keys()),
+                                  disabled=map_mode == 'Marcadores')
+with col3:
+    density_cell = st.select_slider('Tamanho da célula (graus)', options=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0], value=0.5,
+                                    disabled=map_mode == 'Marcadores')
+
+if map_mode == 'Marcadores':
+    #a execução disparada por uma interação com o mapa já recebe a nova área visível: os marcadores
+    #são recalculados nela mesma, sem uma segunda execução da página
+    positions = viewport_positions( restaurant_index, map_mask, map_bounds( MAP_KEY ) )
+    check_map_key( MAP_KEY, country_map( df_all, positions ) )
+else:
+    density_map( df1, map_mode, density_weight, density_cell )
+
+st.markdown('## Restaurantes próximos')
+col1, col2, col3 = st.columns(3)
+with col1:
+    near_latitude = st.number_input('Latitude', min_value=-90.0, max_value=90.0, value=28.6139, format='%.4f')
+with col2:
+    near_longitude = st.number_input('Longitude', min_value=-180.0, max_value=180.0, value=77.2090, format='%.4f')
+with col3:
+    near_qtd = st.slider('Quantidade de restaurantes', value=10, min_value=1, max_value=50)
+
+df2 = nearest_restaurants( df_all, restaurant_index, map_mask, near_latitude, near_longitude, near_qtd )
+st.dataframe(df2)
+
+#========================================================
+# INSTRUMENTATION
+#========================================================
+finish_profile({'country_options': country_options, 'map_mode': map_mode})
+finish_run()
@@ -3,311 +3,112 @@
 #========================================================
 import pandas as pd
 import numpy as np
-import inflection
-import folium
-from folium.plugins import MarkerCluster
-import plotly.graph_objects as go
 import streamlit as st
-from streamlit_folium import folium_static
-from PIL import Image
+from utils.lazy import LazyModule
+from utils.charts import ChartSpec, chart_specs, chart_tables, chart_figure, distinct_sketches, distinct_estimates
+from utils.sketches import approx_error
+from utils.snapshots import read_manifest, manifest_version, load_snapshot, compare_snapshot
+from utils.disk_cache import disk_cache
+from utils.data import VERSION_ENTRIES, load_data, data_validation, filter_positions, shared_positions, filtered_view
+from utils.sidebar import sidebar_header, sidebar_footer, validation_warning, filter_options, restaurant_filters, snapshot_filter
+from utils.warmup import serving_version
+from utils.instrumentation import start_run, stage, timed, finish_run
+from utils.profiling import start_profile, finish_profile
+
+#biblioteca pesada importada apenas no primeiro uso
+go = LazyModule('plotly.graph_objects')
+
+#gráficos dos países calculados em um único groupby().agg por country_name
+COUNTRY = ('country_name',)
+COUNTRY_CHARTS = chart_specs(
+    ChartSpec('city_by_country', 'Quantidade de cidades cadastradas por país',
+              COUNTRY, 'city', 'nunique', x_title='País', y_title='Quantidade de cidades'),
+    ChartSpec('restaurant_by_country', 'Quantidade de restaurantes cadastrados por país',
+              COUNTRY, 'restaurant_id', 'count', x_title='País', y_title='Quantidade de restaurantes'),
+    ChartSpec('votes_by_country', 'Total de avaliações por país',
+              COUNTRY, 'votes', 'sum', hover_label='Quantidade de avaliações', kind='pie'),
+    ChartSpec('average_cost_by_country', 'Preço médio de um prato para dois em Dólares Americanos (USD) por país',
+              COUNTRY, 'average_cost_for_two_USD', 'mean', decimals=2,
+              x_title='País', y_title='Preço médio para dois (USD)', hover_label='Preço médio para dois'),
+    ChartSpec('aggregate_rating_by_country', 'Nota média dos restaurantes por país',
+              COUNTRY, 'aggregate_rating', 'mean', decimals=2, x_title='País', y_title='Nota média'),
+    ChartSpec('cuisines_by_country', 'Tipos diferentes de culinária por país',
+              COUNTRY, 'cuisines', 'nunique', x_title='País', y_title='Tipos de culinária')
+)
 
 #=======================================================
 # FUNCTIONS
 #=======================================================
-def clean_data( df1 ):
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_distinct_sketches( _df1, version, error ):
     '''
-    Função que prepara e limpa o dataframe
-        
-        Limpezas efetuadas:
-            1. Formatação do título das colunas
-            2. Remoção de linhas duplicadas
-            3. Remoção de colunas com valores idênticos
-            4. Formatação da coluna 'cuisines' para mostrar 1 tipo de culinária
-            5. Remoção dos 'nan' da coluna 'cuisines'
-            6. Remoção de possível erro de digitação
-            7. Criação das colunas:
-                'color_name'= nome das cores
-                'country_name' = nome dos países
-                'price_type' = nome do tipo de preço
-                'exchange_rate' = taxa de câmbio USD/currency
-                'average_cost_for_two_USD' = preço para dois em dólar (data fixa)
-        
-        Input: Dataframe
-        Output: Dataframe
+        Função que cria os sketches HyperLogLog dos gráficos de valores distintos (uma vez por versão do dataset e erro)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+            error = erro relativo do modo aproximado
+        Output: dict nome do gráfico -> DistinctSketch
     '''
-    #---------------------------------------------------
-    # SUBFUNCIONS
-    #---------------------------------------------------
-    #renomear colunas do dataframe
-    def rename_columns(dataframe):
-        df = dataframe.copy()
-        title = lambda x: inflection.titleize(x)
-        spaces = lambda x: x.replace(' ', '')
-        snakecase = lambda x: inflection.underscore(x)
-        cols_old = list(df.columns)
-        cols_old = list(map(title, cols_old))
-        cols_old = list(map(spaces, cols_old))
-        cols_new = list(map(snakecase, cols_old))
-        df.columns = cols_new
-        return df
-    
-    #nome das cores por código
-    COLORS = {
-    '3F7E00': 'darkgreen',
-    '5BA829': 'green',
-    '9ACD32': 'lightgreen',
-    'CDD614': 'orange',
-    'FFBA00': 'red',
-    'CBCBC8': 'darkred',
-    'FF7800': 'darkred'
-    }
-    def color_name(color_code):
-        return COLORS[color_code]
-    
-    #preenchimento do nome dos países
-    COUNTRIES = {
-    1: 'India',
-    14: 'Australia',
-    30: 'Brazil',
-    37: 'Canada',
-    94: 'Indonesia',
-    148: 'New Zealand',
-    162: 'Philippines',
-    166: 'Qatar',
-    184: 'Singapore',
-    189: 'South Africa',
-    191: 'Sri Lanka',
-    208: 'Turkey',
-    214: 'United Arab Emirates',
-    215: 'England',
-    216: 'United States of America'
-    }
-    def country_name(country_id):
-        return COUNTRIES[country_id]
-    
-    #rótulo do tipo de preço dos pratos
-    def create_price_type(price_range):
-        if price_range == 1:
-            return 'cheap'
-        elif price_range == 2:
-            return 'normal'
-        elif price_range == 3:
-            return 'expensive'
-        else:
-            return 'gourmet'
+    return distinct_sketches(_df1, COUNTRY_CHARTS, error)
 
-    #conversão de moeda para 'US dollar'
-    #date = 13-08-2023
-    EXCHANGE = {
-        'Indonesia': 0.000065735428,
-        'Sri Lanka': 0.0031340417,
-        'Philippines': 0.073999949,
-        'India': 0.012060175,
-        'South Africa': 0.052876995,
-        'Qatar': 0.27472527,
-        'United Arab Emirates': 0.27229408,
-        'Singapore': 0.73957914,
-        'Brazil': 0.20388112,
-        'Turkey': 0.037143494,
-        'Australia': 0.65059812,
-        'New Zealand': 0.59840393,
-        'United States of America': 1,
-        'England': 1.2695533,
-        'Canada': 0.7441021
-    }
-    def exchange_rate(country_name):
-        return EXCHANGE[country_name]
-
-    #---------------------------------------------------
-    # CLEAN CODE
-    #---------------------------------------------------
-    #renomeando títulos das colunas
-    df1 = rename_columns( df1 )
-
-    #removendo dados duplicados
-    df1 = df1.drop_duplicates().reset_index(drop=True)
-
-    #removendo coluna com mesmos valores
-    df1 = df1.drop('switch_to_order_menu', axis=1)
-
-    #removendo linha com outlier muito acentuado 
-        #Obs: provável erro de digitação, pois custava mais de 2 milhões e era categorizado como 'cheap'
-    df1 = df1.drop(356, axis=0).reset_index(drop=True)
-
-    #categorizar restaurantes por um tipo de culinária
-    df1['cuisines'] = df1['cuisines'].astype(str)
-    df1.loc[:, 'cuisines'] = df1.loc[:, 'cuisines'].apply(lambda x: x.split(', ')[0])
-
-    #retirada dos nan's da coluna cuisines
-    linhas_select = df1['cuisines'] != 'nan'
-    df1 = df1.loc[linhas_select, :].reset_index(drop=True)
-
-    #criando coluna 'color_name' e preenchendo com o nome das cores
-    df1['color_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'color_name'] = color_name(df1.loc[i, 'rating_color'])
-    
-    #criando coluna 'country_name' e preenchendo com o nome dos países
-    df1['country_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'country_name'] = country_name(df1.loc[i, 'country_code'])
-    
-    #criando coluna 'price_type'
-    df1['price_type'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'price_type'] = create_price_type(df1.loc[i, 'price_range'])
-    
-    #criando coluna 'exchange_rate' e convertendo os preços para dólar
-    df1['exchange_rate'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'exchange_rate'] = exchange_rate(df1.loc[i, 'country_name'])
-        #conversão para dólar
-    df1['average_cost_for_two_USD'] = np.array(df1['average_cost_for_two']) * np.array(df1['exchange_rate'])
-
-    return df1
-
-def city_by_country( df1 ):
-    '''
-        Função que:
-            1. Retorna o número de cidades cadastradas por país
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras
-    '''
-    df2 = (df1.loc[:, ['city', 'country_name']].groupby('country_name')
-                                           .nunique()
-                                           .sort_values('city', ascending=False)
-                                           .reset_index())
-
-    fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['city'], text=df2['city'],
-                        hovertemplate='%{x}<br>Quantidade de cidades: %{y}<extra></extra>' ) )
-    fig.update_layout(title={'text':'Quantidade de cidades cadastradas por país', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='País')
-    fig.update_yaxes(title_text='Quantidade de cidades')
-    
-    return fig
-
-def restaurant_by_country( df1 ):
-    '''
-        Função que:
-            1. Retorna o número de restaurantes cadastrado por país
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras
-    '''
-    df2 = (df1.loc[:, ['restaurant_id', 'country_name']].groupby('country_name')
-                                                    .count()
-                                                    .sort_values('restaurant_id', ascending=False)
-                                                    .reset_index())
-
-    fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['restaurant_id'], text=df2['restaurant_id'],
-                            hovertemplate='%{x}<br>Quantidade de restaurantes: %{y}<extra></extra>' ) )
-    fig.update_layout(title={'text':'Quantidade de restaurantes cadastrados por país', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='País')
-    fig.update_yaxes(title_text='Quantidade de restaurantes')
-    
-    return fig
-
-def votes_by_country( df1 ):
-    '''
-        Função que:
-            1. Retorna o total de votos efetuados por país
-            2. Plota um gráfico de pizza     
-        Input: Dataframe
-        Output: Gráfico de pizza
-    '''
-    df2 = (df1.loc[:, ['country_name', 'votes']].groupby('country_name')
-                                            .sum()
-                                            .sort_values('votes', ascending=False)
-                                            .reset_index())
-    fig = go.Figure()
-    fig.add_trace( go.Pie ( labels=df2['country_name'], values=df2['votes'],
-                            hovertemplate='%{label}<br>Quantidade de avaliações: %{value}<extra></extra>' ) )
-    fig.update_traces(textposition='inside')
-    fig.update_layout(title={'text':'Total de avaliações por país', 'x':0.5, 'xanchor': 'center'})
-    
-    return fig
-
-def average_cost_by_country( df1 ):
+@timed()
+@st.cache_data(max_entries=128)
+@disk_cache()
+def country_tables( _df1, version, filters, error=None, _sketches=None ):
     '''
-        Função que:
-            1. Retorna o custo médio para 2 por país
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras
+        Função que calcula as tabelas dos gráficos dos países uma vez por estado dos filtros
+        (em um único groupby().agg, também guardadas no cache em disco)
+        Inputs:
+            _df1 = Dataframe filtrado (não entra na chave do cache)
+            version = versão do dataset
+            filters = opções selecionadas nos filtros (chave do cache)
+            error = erro relativo do modo aproximado (None = valores distintos exatos)
+            _sketches = sketches do modo aproximado (build_distinct_sketches)
+        Output: dict nome do gráfico -> Dataframe
     '''
-    df2 = (df1.loc[:, ['country_name', 'average_cost_for_two_USD']].groupby(['country_name'])
-                                                               .mean()
-                                                               .sort_values('average_cost_for_two_USD', ascending=False)
-                                                               .reset_index())
-    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    distinct = distinct_estimates(_sketches, filters) if _sketches else None
+    return chart_tables(_df1, COUNTRY_CHARTS, distinct)
 
-    fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['average_cost_for_two_USD'], text=df2['average_cost_for_two_USD'],
-                        hovertemplate='%{x}<br>Preço médio para dois: %{y}<extra></extra>' ) )
-    fig.update_layout(title={'text':'Preço médio de um prato para dois em Dólares Americanos (USD) por país', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='País')
-    fig.update_yaxes(title_text='Preço médio para dois (USD)')
-    
-    return fig
-
-def aggregate_rating_by_country( df1 ):
+@timed()
+def restaurant_change_by_country( df1, df_snapshot, snapshot_date ):
     '''
         Função que:
-            1. Retorna a avaliação média por país
-            2. Plota um gráfico de barras     
-        Input: Dataframe
+            1. Retorna a variação do número de restaurantes cadastrados por país desde o snapshot
+            2. Plota um gráfico de barras
+        Inputs:
+            df1 = Dataframe filtrado
+            df_snapshot = Dataframe do snapshot com os mesmos filtros
+            snapshot_date = data do snapshot
         Output: Gráfico de barras
     '''
-    df2 = (df1.loc[:, ['country_name', 'aggregate_rating']].groupby('country_name')
-                                                       .mean()
-                                                       .sort_values('aggregate_rating', ascending=False)
-                                                       .reset_index())
-    df2['aggregate_rating'] = df2['aggregate_rating'].astype(float).round(2)
+    df2 = (compare_snapshot(df1, df_snapshot, ['country_name'], 'restaurant_id', 'count', fill_value=0)
+                            .astype({'snapshot': int, 'atual': int, 'variacao': int})
+                            .sort_values('variacao', ascending=False))
 
     fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['aggregate_rating'], text=df2['aggregate_rating'],
-                            hovertemplate='%{x}<br>Nota média: %{y}<extra></extra>' ) )
-    fig.update_layout(title={'text':'Nota média dos restaurantes por país', 'x':0.5, 'xanchor': 'center'})
+    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['variacao'], text=df2['variacao'], customdata=df2[['snapshot', 'atual']],
+                            hovertemplate='%{x}<br>Snapshot: %{customdata[0]}<br>Atual: %{customdata[1]}<br>Variação: %{y}<extra></extra>' ) )
+    fig.update_layout(title={'text':f'Variação de restaurantes cadastrados por país desde o snapshot de {snapshot_date}', 'x':0.5, 'xanchor': 'center'})
     fig.update_xaxes(title_text='País')
-    fig.update_yaxes(title_text='Nota média')
+    fig.update_yaxes(title_text='Variação de restaurantes')
 
     return fig
 
-def cuisines_by_country( df1 ):
-    '''
-        Função que:
-            1. Retorna os tipos de culinária cadastrados por país
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras
-    '''
-    df2 = (df1.loc[:, ['country_name', 'cuisines']].groupby('country_name')
-                                                .nunique()
-                                                .sort_values('cuisines', ascending=False)
-                                                .reset_index())
-
-    fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['country_name'], y=df2['cuisines'], text=df2['cuisines'],
-                            hovertemplate='%{x}<br>Tipos de culinária: %{y}<extra></extra>' ) )
-    fig.update_layout(title={'text':'Tipos diferentes de culinária por país', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='País',)
-    fig.update_yaxes(title_text='Tipos de culinária')
-    
-    return fig
 #---------------------------------- CODE LOGIC STRUTURE -----------------------------------
 
 #========================================================
-# IMPORT DATASET
+# INSTRUMENTATION
 #========================================================
-df = pd.read_csv('dataset/zomato.csv')
+start_run('Visão Países')
+start_profile('Visão Países')
 
 #========================================================
-# CLEAN DATA
+# IMPORT DATASET
 #========================================================
-df1 = clean_data( df )
+#dataset limpo (última versão aquecida pelo warm-up), lido uma vez por processo e compartilhado (somente leitura) entre as sessões
+data_version = serving_version()
+df_all = load_data( data_version )
 
 #========================================================
 # SET STREAMLIT PAGE WIDTH
@@ -318,125 +119,86 @@ st.set_page_config(page_title='Visão Países', page_icon='🌎', layout='wide')
 # SIDEBAR LAYOUT
 #========================================================
 with st.sidebar:
-    image = Image.open('logo.png')
-    st.image(image, width=120)
-
-    st.title('Fome Zero')
-    st.header('Marketplace de restaurantes')
-    st.markdown('''---''')
+    sidebar_header()
 
     st.header('Filtros')
 
-    #selecionar países
-    country_options = st.multiselect(
-        'Selecione quais países deseja visualizar os dados:',
-        ['Philippines', 'Brazil', 'Australia', 'United States of America',
-        'Canada', 'Singapore', 'United Arab Emirates', 'India',
-        'Indonesia', 'New Zealand', 'England', 'Qatar', 'South Africa',
-         'Sri Lanka', 'Turkey'],
-        default = []
-    )
-
-    #selecionar tipo de preço
-    price_options = st.multiselect('Selecione a faixa de preço do restaurante:', 
-                                   ['gourmet', 'expensive', 'normal', 'cheap'], 
-                                   default = [])
+    #filtros com as opções do dataset
+    (country_options, price_options, table_booking_options,
+     delivery_options, online_options) = restaurant_filters( filter_options( df_all, data_version ) )
 
-    #selecionar reserva restaurantes
-    table_booking_options = st.multiselect('Selecione se o restaurante faz reservas:', 
-                                           ['Sim', 'Não'],
-                                           default=['Sim', 'Não'])
-    
-    #selecionar entrega restaurantes
-    delivery_options = st.multiselect('Selecione se o restaurante realiza entregas:', 
-                                      ['Sim', 'Não'],
-                                      default=['Sim', 'Não'])
-    
-    #selecionar online restaurantes
-    online_options = st.multiselect('Selecione se o restaurante possui pedidos online:', 
-                                    ['Sim', 'Não'],
-                                    default=['Sim', 'Não'])
+    #selecionar snapshot para comparação (apenas se houver snapshots gravados)
+    snapshot_date = snapshot_filter( read_manifest() )
 
-    st.markdown('''---''')
+    #aviso de linhas do dataset em quarentena (validação da carga)
+    validation_warning( *data_validation( data_version ) )
 
-    st.header('Powered by Oiluj')
+    sidebar_footer()
 
-#filtro países
-if not country_options:
-    df1 = df1
-else:
-    linhas_select = df1['country_name'].isin(country_options)
-    df1 = df1.loc[linhas_select, :]
-
-#filtro price_type
-if not price_options:
-    df1 = df1
-else:
-    linhas_select = df1['price_type'].isin(price_options)
-    df1=df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not table_booking_options:
-    df1 = df1
-else:
-    if 'Sim' in table_booking_options and 'Não' in table_booking_options:
-        df1 = df1
-    else:
-        valores_filtrados = [0 if 'Sim' in table_booking_options else 1]
-        linhas_select = df1['has_table_booking'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not delivery_options:
-    df1 = df1
-else:
-    if 'Sim' in delivery_options and 'Não' in delivery_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in delivery_options else 0]
-        linhas_select = df1['is_delivering_now'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not online_options:
-    df1 = df1
-else:
-    if 'Sim' in online_options and 'Não' in online_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in online_options else 0]
-        linhas_select = df1['has_online_delivery'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
+with stage('filters', rows_in=len(df_all)) as stage_info:
+    #filtros como posições do dataset compartilhado (memorizadas por estado canônico dos filtros)
+    positions_filtered = shared_positions( df_all, data_version, (country_options, price_options, table_booking_options, delivery_options, online_options) )
+    df1 = filtered_view( df_all, positions_filtered )
+    stage_info['rows_out'] = len(positions_filtered)
 
 #========================================================
 # PAGE LAYOUT
 #========================================================
 st.markdown('# 🌎 Visão Países')
 
+#tabelas dos gráficos dos países do estado atual dos filtros
+filters_state = (country_options, price_options, table_booking_options, delivery_options, online_options)
+distinct_error = approx_error()
+sketches = build_distinct_sketches( df_all, data_version, distinct_error ) if distinct_error else None
+country_charts = country_tables( df1, data_version, filters_state, distinct_error, sketches )
+
 #Gráfico barras cidades por país
-fig = city_by_country( df1 )
-st.plotly_chart(fig, use_container_width=True)
+fig = chart_figure( COUNTRY_CHARTS['city_by_country'], country_charts['city_by_country'] )
+with stage('plotly_chart:city_by_country'):
+    st.plotly_chart(fig, use_container_width=True)
 
 #gráfico barras restaurantes por país
-fig = restaurant_by_country( df1 )
-st.plotly_chart(fig, use_container_width=True)
+fig = chart_figure( COUNTRY_CHARTS['restaurant_by_country'], country_charts['restaurant_by_country'] )
+with stage('plotly_chart:restaurant_by_country'):
+    st.plotly_chart(fig, use_container_width=True)
 
 col1, col2 = st.columns(2)
 with col1:
     # gráfico pizza votes por país
-    fig = votes_by_country( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = chart_figure( COUNTRY_CHARTS['votes_by_country'], country_charts['votes_by_country'] )
+    with stage('plotly_chart:votes_by_country'):
+        st.plotly_chart(fig, use_container_width=True)
 
 with col2:
     # gráfico barras aggregate_rating por país
-    fig = aggregate_rating_by_country( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = chart_figure( COUNTRY_CHARTS['aggregate_rating_by_country'], country_charts['aggregate_rating_by_country'] )
+    with stage('plotly_chart:aggregate_rating_by_country'):
+        st.plotly_chart(fig, use_container_width=True)
 
 col1, col2 = st.columns(2)
 with col1:
-    fig = average_cost_by_country( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = chart_figure( COUNTRY_CHARTS['average_cost_by_country'], country_charts['average_cost_by_country'] )
+    with stage('plotly_chart:average_cost_by_country'):
+        st.plotly_chart(fig, use_container_width=True)
 
 with col2:
-    fig = cuisines_by_country( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = chart_figure( COUNTRY_CHARTS['cuisines_by_country'], country_charts['cuisines_by_country'] )
+    with stage('plotly_chart:cuisines_by_country'):
+        st.plotly_chart(fig, use_container_width=True)
+
+#comparação com o snapshot selecionado (mesmos filtros nos dois lados)
+if snapshot_date is not None:
+    st.markdown(f'## Comparação com o snapshot de {snapshot_date}')
+    df_snapshot = load_snapshot( snapshot_date, manifest_version() )
+    df_snapshot = filtered_view( df_snapshot, filter_positions( df_snapshot, *filters_state ) )
+
+    fig = restaurant_change_by_country( df1, df_snapshot, snapshot_date )
+    with stage('plotly_chart:restaurant_change_by_country'):
+        st.plotly_chart(fig, use_container_width=True)
+
+#========================================================
+# INSTRUMENTATION
+#========================================================
+finish_profile({'country_options': country_options, 'price_options': price_options, 'table_booking_options': table_booking_options,
+                'delivery_options': delivery_options, 'online_options': online_options, 'snapshot_date': snapshot_date})
+finish_run()
@@ -3,307 +3,232 @@
 #========================================================
 import pandas as pd
 import numpy as np
-import inflection
-import folium
-from folium.plugins import MarkerCluster
-import plotly.graph_objects as go
 import streamlit as st
-from streamlit_folium import folium_static
-from PIL import Image
+from utils.lazy import LazyModule
+from utils.ranking import SORT_KEYS, rating_prior, rank_groups
+from utils.charts import ChartSpec, chart_specs, summary_table, top_tables, chart_figure, distinct_sketches, distinct_estimates
+from utils.sketches import approx_error
+from utils.snapshots import read_manifest, manifest_version, load_snapshot, compare_snapshot
+from utils.disk_cache import disk_cache
+from utils.hierarchy import AggregateTree
+from utils.data import VERSION_ENTRIES, load_data, data_validation, filter_positions, shared_positions, filtered_view
+from utils.sidebar import sidebar_header, sidebar_footer, validation_warning, filter_options, restaurant_filters, snapshot_filter
+from utils.warmup import serving_version
+from utils.instrumentation import start_run, stage, timed, finish_run
+from utils.profiling import start_profile, finish_profile
+
+#biblioteca pesada importada apenas no primeiro uso
+go = LazyModule('plotly.graph_objects')
+
+#gráficos das cidades, cortados do resumo das cidades (city_summary)
+CITY = ('city', 'country_name')
+CITY_CHARTS = chart_specs(
+    ChartSpec('restaurant_by_city', 'Top 10 - cidades com mais restaurantes cadastrados',
+              CITY, 'restaurant_id', 'count', top=10,
+              x_title='Cidade', y_title='Quantidade de restaurantes', color='country_name'),
+    ChartSpec('high_aggregate_rating_by_city', 'Top 10 - cidades com avaliação média maior que 4',
+              CITY, 'restaurant_id', 'count', predicate=('aggregate_rating', '>', 4), top=10,
+              x_title='Cidade', y_title='Quantidade de restaurantes', color='country_name'),
+    ChartSpec('low_aggregate_rating_by_city', 'Top 10 - cidades com avaliação média menor que 2.5',
+              CITY, 'restaurant_id', 'count', predicate=('aggregate_rating', '<', 2.5), top=10,
+              x_title='Cidade', y_title='Quantidade de restaurantes', color='country_name'),
+    ChartSpec('cuisines_by_city', 'Top 10 - quantidade de tipos de culinária por cidade',
+              CITY, 'cuisines', 'nunique', top=10,
+              x_title='Cidade', y_title='Tipos de culinária', color='country_name'),
+    ChartSpec('average_cost_by_city', 'Top 10 - Preço médio de um prato para dois em Dólares Americanos (USD) por cidade',
+              CITY, 'average_cost_for_two_USD', 'max', top=10, decimals=2,
+              x_title='Cidade', y_title='Preço médio para dois (USD)', color='country_name')
+)
+
+#títulos das colunas do drill-down geográfico: nível -> (rótulo, quantidade de filhos)
+GEO_TITLES = {
+    'country_name': ('País', 'Cidades'),
+    'city': ('Cidade', 'Localidades'),
+    'locality': ('Localidade', None)
+}
 
 #=======================================================
 # FUNCTIONS
 #=======================================================
-def clean_data( df1 ):
+@timed()
+@st.cache_data(max_entries=VERSION_ENTRIES)
+def build_rating_prior( _df1, version ):
     '''
-    Função que prepara e limpa o dataframe
-        
-        Limpezas efetuadas:
-            1. Formatação do título das colunas
-            2. Remoção de linhas duplicadas
-            3. Remoção de colunas com valores idênticos
-            4. Formatação da coluna 'cuisines' para mostrar 1 tipo de culinária
-            5. Remoção dos 'nan' da coluna 'cuisines'
-            6. Remoção de possível erro de digitação
-            7. Criação das colunas:
-                'color_name'= nome das cores
-                'country_name' = nome dos países
-                'price_type' = nome do tipo de preço
-                'exchange_rate' = taxa de câmbio USD/currency
-                'average_cost_for_two_USD' = preço para dois em dólar (data fixa)
-        
-        Input: Dataframe
-        Output: Dataframe
+        Função que calcula a média a priori e o peso da nota bayesiana (uma vez por versão do dataset)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: (média a priori, peso)
     '''
-    #---------------------------------------------------
-    # SUBFUNCIONS
-    #---------------------------------------------------
-    #renomear colunas do dataframe
-    def rename_columns(dataframe):
-        df = dataframe.copy()
-        title = lambda x: inflection.titleize(x)
-        spaces = lambda x: x.replace(' ', '')
-        snakecase = lambda x: inflection.underscore(x)
-        cols_old = list(df.columns)
-        cols_old = list(map(title, cols_old))
-        cols_old = list(map(spaces, cols_old))
-        cols_new = list(map(snakecase, cols_old))
-        df.columns = cols_new
-        return df
-    
-    #nome das cores por código
-    COLORS = {
-    '3F7E00': 'darkgreen',
-    '5BA829': 'green',
-    '9ACD32': 'lightgreen',
-    'CDD614': 'orange',
-    'FFBA00': 'red',
-    'CBCBC8': 'darkred',
-    'FF7800': 'darkred'
-    }
-    def color_name(color_code):
-        return COLORS[color_code]
-    
-    #preenchimento do nome dos países
-    COUNTRIES = {
-    1: 'India',
-    14: 'Australia',
-    30: 'Brazil',
-    37: 'Canada',
-    94: 'Indonesia',
-    148: 'New Zealand',
-    162: 'Philippines',
-    166: 'Qatar',
-    184: 'Singapore',
-    189: 'South Africa',
-    191: 'Sri Lanka',
-    208: 'Turkey',
-    214: 'United Arab Emirates',
-    215: 'England',
-    216: 'United States of America'
-    }
-    def country_name(country_id):
-        return COUNTRIES[country_id]
-    
-    #rótulo do tipo de preço dos pratos
-    def create_price_type(price_range):
-        if price_range == 1:
-            return 'cheap'
-        elif price_range == 2:
-            return 'normal'
-        elif price_range == 3:
-            return 'expensive'
-        else:
-            return 'gourmet'
-
-    #conversão de moeda para 'US dollar'
-    #date = 13-08-2023
-    EXCHANGE = {
-        'Indonesia': 0.000065735428,
-        'Sri Lanka': 0.0031340417,
-        'Philippines': 0.073999949,
-        'India': 0.012060175,
-        'South Africa': 0.052876995,
-        'Qatar': 0.27472527,
-        'United Arab Emirates': 0.27229408,
-        'Singapore': 0.73957914,
-        'Brazil': 0.20388112,
-        'Turkey': 0.037143494,
-        'Australia': 0.65059812,
-        'New Zealand': 0.59840393,
-        'United States of America': 1,
-        'England': 1.2695533,
-        'Canada': 0.7441021
-    }
-    def exchange_rate(country_name):
-        return EXCHANGE[country_name]
-
-    #---------------------------------------------------
-    # CLEAN CODE
-    #---------------------------------------------------
-    #renomeando títulos das colunas
-    df1 = rename_columns( df1 )
-
-    #removendo dados duplicados
-    df1 = df1.drop_duplicates().reset_index(drop=True)
-
-    #removendo coluna com mesmos valores
-    df1 = df1.drop('switch_to_order_menu', axis=1)
-
-    #removendo linha com outlier muito acentuado 
-        #Obs: provável erro de digitação, pois custava mais de 2 milhões e era categorizado como 'cheap'
-    df1 = df1.drop(356, axis=0).reset_index(drop=True)
-
-    #categorizar restaurantes por um tipo de culinária
-    df1['cuisines'] = df1['cuisines'].astype(str)
-    df1.loc[:, 'cuisines'] = df1.loc[:, 'cuisines'].apply(lambda x: x.split(', ')[0])
-
-    #retirada dos nan's da coluna cuisines
-    linhas_select = df1['cuisines'] != 'nan'
-    df1 = df1.loc[linhas_select, :].reset_index(drop=True)
-
-    #criando coluna 'color_name' e preenchendo com o nome das cores
-    df1['color_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'color_name'] = color_name(df1.loc[i, 'rating_color'])
-    
-    #criando coluna 'country_name' e preenchendo com o nome dos países
-    df1['country_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'country_name'] = country_name(df1.loc[i, 'country_code'])
-    
-    #criando coluna 'price_type'
-    df1['price_type'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'price_type'] = create_price_type(df1.loc[i, 'price_range'])
-    
-    #criando coluna 'exchange_rate' e convertendo os preços para dólar
-    df1['exchange_rate'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'exchange_rate'] = exchange_rate(df1.loc[i, 'country_name'])
-        #conversão para dólar
-    df1['average_cost_for_two_USD'] = np.array(df1['average_cost_for_two']) * np.array(df1['exchange_rate'])
+    return rating_prior(_df1)
 
-    return df1
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_distinct_sketches( _df1, version, error ):
+    '''
+        Função que cria os sketches HyperLogLog dos gráficos de valores distintos (uma vez por versão do dataset e erro)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+            error = erro relativo do modo aproximado
+        Output: dict nome do gráfico -> DistinctSketch
+    '''
+    return distinct_sketches(_df1, CITY_CHARTS, error)
 
-def restaurant_by_city( df1 ):
+@timed()
+@st.cache_resource(max_entries=64)
+def build_geo_tree( _df1, version, filters ):
     '''
-        Função que:
-            1. Retorna o número de restaurantes cadastrado por cidade
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras
+        Função que cria a árvore de agregados país -> cidade -> localidade (uma vez por versão do dataset e estado dos filtros)
+        Inputs:
+            _df1 = Dataframe filtrado (não entra na chave do cache)
+            version = versão do dataset
+            filters = opções selecionadas nos filtros (chave do cache)
+        Output: AggregateTree
     '''
-    df2 = (df1.loc[:, ['city', 'restaurant_id', 'country_name']].groupby(['city', 'country_name'])
-                                                                .count()
-                                                                .sort_values('restaurant_id', ascending=False)
-                                                                .reset_index()
-                                                                .head(10))
-    fig = go.Figure()
-    for country, group in df2.groupby('country_name'):    
-        fig.add_trace( go.Bar ( x=group['city'], y=group['restaurant_id'], name=country, text=group['restaurant_id'],
-                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Quantidade de restaurantes: %%{y}<extra></extra>'% country) )
-    fig.update_layout(legend_title_text='País',
-                    title={'text':'Top 10 - cidades com mais restaurantes cadastrados', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='Cidade', categoryorder='total descending')
-    fig.update_yaxes(title_text='Quantidade de restaurantes')
-    
-    return fig
+    return AggregateTree(_df1)
+
+@timed()
+@st.cache_data(max_entries=128)
+@disk_cache()
+def city_summary( _df1, version, filters, error=None, _sketches=None ):
+    '''
+        Função que calcula a tabela resumo das cidades uma vez por estado dos filtros: quantidade de
+        restaurantes, quantidade com nota > 4 e < 2.5, tipos de culinária e maior preço para dois (USD),
+        em um único groupby().agg (também guardada no cache em disco). Os gráficos de top 10 são cortados dessa tabela
+        Inputs:
+            _df1 = Dataframe filtrado (não entra na chave do cache)
+            version = versão do dataset
+            filters = opções selecionadas nos filtros (chave do cache)
+            error = erro relativo do modo aproximado (None = valores distintos exatos)
+            _sketches = sketches do modo aproximado (build_distinct_sketches)
+        Output: Dataframe com uma linha por cidade
+    '''
+    distinct = distinct_estimates(_sketches, filters) if _sketches else None
+    return summary_table(_df1, CITY_CHARTS, distinct)
 
-def high_aggregate_rating_by_city( df1 ):
+@timed()
+def best_rated_cities( df1, prior, sort_key, sort_label ):
     '''
         Função que:
-            1. Retorna o número de restaurantes acima de 4.0 de avaliação média por cidade
+            1. Retorna as cidades com a melhor avaliação, de acordo com a ordenação selecionada
             2. Plota um gráfico de barras     
-        Input: Dataframe
+        Inputs:
+            Dataframe
+            prior = média a priori e peso da nota bayesiana
+            sort_key = coluna usada para ordenar as cidades (valor de SORT_KEYS)
+            sort_label = nome da ordenação exibido no gráfico
         Output: Gráfico de barras    
     '''
-    linhas_select = df1['aggregate_rating'] > 4
-    df2 = (df1.loc[linhas_select, ['city', 'restaurant_id', 'country_name']].groupby(['city', 'country_name'])
-                                                                            .count()
-                                                                            .sort_values('restaurant_id', ascending=False)
-                                                                            .reset_index()
-                                                                            .head(10))
+    df2 = (rank_groups(df1, ['city', 'country_name'], prior).sort_values([sort_key, 'votes'], ascending=[False, False])
+                                                            .head(10))
+    df2[sort_key] = df2[sort_key].astype(float).round(2)
 
     fig = go.Figure()
-    for country, group in df2.groupby('country_name'):
-        fig.add_trace( go.Bar ( x=group['city'], y=group['restaurant_id'], name=country, text=group['restaurant_id'],
-                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Quantidade de restaurantes: %%{y}<extra></extra>'% country) )
-    fig.update_layout(legend_title_text='País',
-                    title={'text':'Top 10 - cidades com avaliação média maior que 4', 'x':0.5, 'xanchor': 'center'})
+    for country, group in df2.groupby('country_name'):    
+        fig.add_trace( go.Bar ( x=group['city'], y=group[sort_key], name=country, text=group[sort_key],
+                                hovertemplate='País: %s<br>Cidade: %%{x}<br>%s: %%{y}<extra></extra>'% (country, sort_label)) )
+    fig.update_layout(legend_title_text='País', 
+                    title={'text':'Top 10 - cidades mais bem avaliadas', 'x':0.5, 'xanchor': 'center'})
     fig.update_xaxes(title_text='Cidade', categoryorder='total descending')
-    fig.update_yaxes(title_text='Quantidade de restaurantes')
+    fig.update_yaxes(title_text=sort_label)
     
     return fig
 
-def low_aggregate_rating_by_city( df1 ):
+@timed()
+def rating_drift_by_city( df1, df_snapshot, snapshot_date ):
     '''
         Função que:
-            1. Retorna o número de restaurantes abaixo de 2.5 de avaliação média por cidade
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras      
+            1. Retorna as cidades com a maior variação da nota média desde o snapshot
+            2. Plota um gráfico de barras
+        Inputs:
+            df1 = Dataframe filtrado
+            df_snapshot = Dataframe do snapshot com os mesmos filtros
+            snapshot_date = data do snapshot
+        Output: Gráfico de barras
     '''
-    linhas_select = df1['aggregate_rating'] < 2.5
-    df2 = (df1.loc[linhas_select, ['city', 'restaurant_id', 'country_name']].groupby(['city', 'country_name'])
-                                                                            .count()
-                                                                            .sort_values('restaurant_id', ascending=False)
-                                                                            .reset_index()
-                                                                            .head(10))
+    df2 = compare_snapshot(df1, df_snapshot, ['city', 'country_name'], 'aggregate_rating', 'mean')
+    df2 = df2.loc[df2['variacao'].abs().sort_values(ascending=False, kind='stable').index, :].head(10).round(2)
 
     fig = go.Figure()
-    for country, group in df2.groupby('country_name'):    
-        fig.add_trace( go.Bar ( x=group['city'], y=group['restaurant_id'], name=country, text=group['restaurant_id'],
-                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Quantidade de restaurantes: %%{y}<extra></extra>'% country) )
+    for country, group in df2.groupby('country_name'):
+        fig.add_trace( go.Bar ( x=group['city'], y=group['variacao'], name=country, text=group['variacao'],
+                                customdata=group[['snapshot', 'atual']],
+                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Snapshot: %%{customdata[0]}<br>Atual: %%{customdata[1]}<br>Variação: %%{y}<extra></extra>'% country) )
     fig.update_layout(legend_title_text='País',
-                    title={'text':'Top 10 - cidades com avaliação média menor que 2.5', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='Cidade', categoryorder='total descending')
-    fig.update_yaxes(title_text='Quantidade de restaurantes')
-    
+                    title={'text':f'Top 10 - cidades com maior variação da nota média desde o snapshot de {snapshot_date}', 'x':0.5, 'xanchor': 'center'})
+    fig.update_xaxes(title_text='Cidade')
+    fig.update_yaxes(title_text='Variação da nota média')
+
     return fig
 
-def cuisines_by_city( df1 ):
+def geo_drilldown( tree ):
     '''
         Função que:
-            1. Retorna os tipos de culinárias cadastrados por cidade
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras    
+            1. Exibe os filhos do nó selecionado em cada nível (países, cidades da seleção, localidades da seleção),
+               lidos da árvore de agregados sem agrupar novamente o dataset
+            2. Retorna o nó selecionado no nível mais profundo
+        Input: AggregateTree
+        Output: nó selecionado ('int', root = todos os países)
     '''
-    df2 = (df1.loc[:, ['city', 'cuisines', 'country_name']].groupby(['city', 'country_name'])
-                                                        .nunique()
-                                                        .sort_values('cuisines', ascending=False)
-                                                        .reset_index()
-                                                        .head(10))
-
-    fig = go.Figure()
-    for country, group in df2.groupby('country_name'):    
-        fig.add_trace( go.Bar ( x=group['city'], y=group['cuisines'], name=country, text=group['cuisines'],
-                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Tipos de culinária: %%{y}<extra></extra>'% country) )
-    fig.update_layout(legend_title_text='País', 
-                    title={'text':'Top 10 - quantidade de tipos de culinária por cidade', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='Cidade', categoryorder='total descending')
-    fig.update_yaxes(title_text='Tipos de culinária')
-    
-    return fig
-
-def average_cost_by_city( df1 ):
+    node = tree.root
+    while tree.level_name(node) is not None:
+        label, children_title = GEO_TITLES[tree.level_name(node)]
+        df2 = tree.children(node)
+        if df2.empty:
+            break
+
+        df3 = df2.drop(columns=['node'] if children_title else ['node', 'children']).round(2)
+        df3 = df3.rename(columns={'label': label, 'restaurants': 'Restaurantes', 'aggregate_rating': 'Nota média',
+                                  'votes': 'Votos', 'average_cost_for_two_USD': 'Preço médio para dois (USD)',
+                                  'children': children_title, 'top_cuisines': 'Principais culinárias'})
+        with stage(f'dataframe:geo_drilldown:{tree.level_name(node)}'):
+            st.dataframe(df3, hide_index=True, use_container_width=True)
+
+        #seleção do próximo nível (chave por nó: trocar o país não herda a cidade selecionada)
+        option = st.selectbox(f'Detalhar {label.lower()}:', ['-'] + list(df2['label']), key=f'geo_drilldown_{node}')
+        if option == '-':
+            break
+        node = int(df2.loc[df2['label'] == option, 'node'].iloc[0])
+
+    return node
+
+@timed()
+def cuisines_by_node( tree, node ):
     '''
         Função que:
-            1. Retorna o custo médio para 2 por cidade
-            2. Plota um gráfico de barras     
-        Input: Dataframe
-        Output: Gráfico de barras    
+            1. Retorna as culinárias com mais restaurantes do nó selecionado no drill-down
+            2. Plota um gráfico de barras
+        Inputs:
+            tree = AggregateTree
+            node = nó selecionado
+        Output: Gráfico de barras
     '''
-    df2 = (df1.loc[:, ['city', 'average_cost_for_two_USD', 'country_name']].groupby(['city', 'country_name'])
-                                                                        .max()
-                                                                        .sort_values('average_cost_for_two_USD', ascending=False)
-                                                                        .reset_index()
-                                                                        .head(10))
-    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    df2 = tree.cuisines(node, top=10)
+    place = ' / '.join(tree.path(node)) or 'todos os países'
+
+    fig = go.Figure( go.Bar ( x=df2['cuisines'], y=df2['restaurants'], text=df2['restaurants'],
+                              hovertemplate='Culinária: %{x}<br>Restaurantes: %{y}<extra></extra>') )
+    fig.update_layout(title={'text':f'Top 10 - culinárias com mais restaurantes em {place}', 'x':0.5, 'xanchor': 'center'})
+    fig.update_xaxes(title_text='Culinária')
+    fig.update_yaxes(title_text='Quantidade de restaurantes')
 
-    fig = go.Figure()
-    for country, group in df2.groupby('country_name'):    
-        fig.add_trace( go.Bar ( x=group['city'], y=group['average_cost_for_two_USD'], name=country, text=group['average_cost_for_two_USD'],
-                                hovertemplate='País: %s<br>Cidade: %%{x}<br>Preço médio para dois (USD): %%{y}<extra></extra>'% country) )
-    fig.update_layout(legend_title_text='País', 
-                    title={'text':'Top 10 - Preço médio de um prato para dois em Dólares Americanos (USD) por cidade', 'x':0.5, 'xanchor': 'center'})
-    fig.update_xaxes(title_text='Cidade', categoryorder='total descending')
-    fig.update_yaxes(title_text='Preço médio para dois (USD)')
-    
     return fig
 
 #---------------------------------- CODE LOGIC STRUTURE -----------------------------------
 
 #========================================================
-# IMPORT DATASET
+# INSTRUMENTATION
 #========================================================
-df = pd.read_csv('dataset/zomato.csv')
+start_run('Visão Cidades')
+start_profile('Visão Cidades')
 
 #========================================================
-# CLEAN DATA
+# IMPORT DATASET
 #========================================================
-df1 = clean_data( df )
+#dataset limpo (última versão aquecida pelo warm-up), lido uma vez por processo e compartilhado (somente leitura) entre as sessões
+data_version = serving_version()
+df_all = load_data( data_version )
 
 #========================================================
 # SET STREAMLIT PAGE WIDTH
@@ -314,120 +239,102 @@ st.set_page_config(page_title='Visão Cidades', page_icon='🏙️', layout='wid
 # SIDEBAR LAYOUT
 #========================================================
 with st.sidebar:
-    image = Image.open('logo.png')
-    st.image(image, width=120)
-
-    st.title('Fome Zero')
-    st.header('Marketplace de restaurantes')
-    st.markdown('''---''')
+    sidebar_header()
 
     st.header('Filtros')
 
-    #selecionar países
-    country_options = st.multiselect(
-        'Selecione quais países deseja visualizar os dados:',
-        ['Philippines', 'Brazil', 'Australia', 'United States of America',
-        'Canada', 'Singapore', 'United Arab Emirates', 'India',
-        'Indonesia', 'New Zealand', 'England', 'Qatar', 'South Africa',
-         'Sri Lanka', 'Turkey'],
-        default = []
-    )
-
-    #selecionar tipo de preço
-    price_options = st.multiselect('Selecione a faixa de preço do restaurante:', 
-                                   ['gourmet', 'expensive', 'normal', 'cheap'], 
-                                   default = [])
-
-    #selecionar reserva restaurantes
-    table_booking_options = st.multiselect('Selecione se o restaurante faz reservas:', 
-                                           ['Sim', 'Não'],
-                                           default=['Sim', 'Não'])
-    
-    #selecionar entrega restaurantes
-    delivery_options = st.multiselect('Selecione se o restaurante realiza entregas:', 
-                                      ['Sim', 'Não'],
-                                      default=['Sim', 'Não'])
-    
-    #selecionar online restaurantes
-    online_options = st.multiselect('Selecione se o restaurante possui pedidos online:', 
-                                    ['Sim', 'Não'],
-                                    default=['Sim', 'Não'])
-
-    st.markdown('''---''')
-
-    st.header('Powered by Oiluj')
-
-#filtro países
-if not country_options:
-    df1 = df1
-else:
-    linhas_select = df1['country_name'].isin(country_options)
-    df1 = df1.loc[linhas_select, :]
-
-#filtro price_type
-if not price_options:
-    df1 = df1
-else:
-    linhas_select = df1['price_type'].isin(price_options)
-    df1=df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not table_booking_options:
-    df1 = df1
-else:
-    if 'Sim' in table_booking_options and 'Não' in table_booking_options:
-        df1 = df1
-    else:
-        valores_filtrados = [0 if 'Sim' in table_booking_options else 1]
-        linhas_select = df1['has_table_booking'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not delivery_options:
-    df1 = df1
-else:
-    if 'Sim' in delivery_options and 'Não' in delivery_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in delivery_options else 0]
-        linhas_select = df1['is_delivering_now'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not online_options:
-    df1 = df1
-else:
-    if 'Sim' in online_options and 'Não' in online_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in online_options else 0]
-        linhas_select = df1['has_online_delivery'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
+    #filtros com as opções do dataset
+    (country_options, price_options, table_booking_options,
+     delivery_options, online_options) = restaurant_filters( filter_options( df_all, data_version ) )
+
+    #selecionar snapshot para comparação (apenas se houver snapshots gravados)
+    snapshot_date = snapshot_filter( read_manifest() )
+
+    #selecionar ordenação das avaliações
+    sort_option = st.selectbox('Selecione como ordenar as avaliações:', list(SORT_KEYS.keys()))
+
+    #aviso de linhas do dataset em quarentena (validação da carga)
+    validation_warning( *data_validation( data_version ) )
+
+    sidebar_footer()
+
+#ordenação das avaliações
+sort_key = SORT_KEYS[sort_option]
+rating_prior_values = build_rating_prior( df_all, data_version )
+
+with stage('filters', rows_in=len(df_all)) as stage_info:
+    #filtros como posições do dataset compartilhado (memorizadas por estado canônico dos filtros)
+    positions_filtered = shared_positions( df_all, data_version, (country_options, price_options, table_booking_options, delivery_options, online_options) )
+    df1 = filtered_view( df_all, positions_filtered )
+    stage_info['rows_out'] = len(positions_filtered)
 
 #========================================================
 # PAGE LAYOUT
 #========================================================
 st.markdown('# 🏙️ Visão Cidades')
 
+#tabelas dos gráficos das cidades, cortadas do resumo das cidades do estado atual dos filtros
+filters_state = (country_options, price_options, table_booking_options, delivery_options, online_options)
+distinct_error = approx_error()
+sketches = build_distinct_sketches( df_all, data_version, distinct_error ) if distinct_error else None
+city_tables = top_tables( city_summary( df1, data_version, filters_state, distinct_error, sketches ), CITY_CHARTS )
+
 # Gráfico barras top 10 qtd restaurantes por cidade
-fig = restaurant_by_city( df1 )
-st.plotly_chart(fig, use_container_width=True)
+fig = chart_figure( CITY_CHARTS['restaurant_by_city'], city_tables['restaurant_by_city'] )
+with stage('plotly_chart:restaurant_by_city'):
+    st.plotly_chart(fig, use_container_width=True)
 
 col1, col2 = st.columns(2)
 with col1:
     # Gráfico barras top 10 cidades > 4 aggregate_rating
-    fig = high_aggregate_rating_by_city( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = chart_figure( CITY_CHARTS['high_aggregate_rating_by_city'], city_tables['high_aggregate_rating_by_city'] )
+    with stage('plotly_chart:high_aggregate_rating_by_city'):
+        st.plotly_chart(fig, use_container_width=True)
 
 with col2:
     # Gráfico barras top 10 cidades < 2.5 aggregate_rating
-    fig = low_aggregate_rating_by_city( df1 )
+    fig = chart_figure( CITY_CHARTS['low_aggregate_rating_by_city'], city_tables['low_aggregate_rating_by_city'] )
+    with stage('plotly_chart:low_aggregate_rating_by_city'):
+        st.plotly_chart(fig, use_container_width=True)
+
+# Gráfico barras top 10 cidades mais bem avaliadas
+fig = best_rated_cities( df1, rating_prior_values, sort_key, sort_option )
+with stage('plotly_chart:best_rated_cities'):
     st.plotly_chart(fig, use_container_width=True)
 
 # Gráfico barras top 10 custo médio para 2 por cidade
-fig = average_cost_by_city( df1 )
-st.plotly_chart(fig, use_container_width=True)
+fig = chart_figure( CITY_CHARTS['average_cost_by_city'], city_tables['average_cost_by_city'] )
+with stage('plotly_chart:average_cost_by_city'):
+    st.plotly_chart(fig, use_container_width=True)
 
 # gráfico barras top 10 mais tipos de cuisines por cidade
-fig = cuisines_by_city( df1 )
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+fig = chart_figure( CITY_CHARTS['cuisines_by_city'], city_tables['cuisines_by_city'] )
+with stage('plotly_chart:cuisines_by_city'):
+    st.plotly_chart(fig, use_container_width=True)
+
+#drill-down país -> cidade -> localidade, lido da árvore de agregados do estado atual dos filtros
+st.markdown('## Drill-down: país → cidade → localidade')
+geo_tree = build_geo_tree( df1, data_version, filters_state )
+geo_node = geo_drilldown( geo_tree )
+
+fig = cuisines_by_node( geo_tree, geo_node )
+with stage('plotly_chart:cuisines_by_node'):
+    st.plotly_chart(fig, use_container_width=True)
+
+#comparação com o snapshot selecionado (mesmos filtros nos dois lados)
+if snapshot_date is not None:
+    st.markdown(f'## Comparação com o snapshot de {snapshot_date}')
+    df_snapshot = load_snapshot( snapshot_date, manifest_version() )
+    df_snapshot = filtered_view( df_snapshot, filter_positions( df_snapshot, *filters_state ) )
+
+    fig = rating_drift_by_city( df1, df_snapshot, snapshot_date )
+    with stage('plotly_chart:rating_drift_by_city'):
+        st.plotly_chart(fig, use_container_width=True)
+
+#========================================================
+# INSTRUMENTATION
+#========================================================
+finish_profile({'country_options': country_options, 'price_options': price_options, 'table_booking_options': table_booking_options,
+                'delivery_options': delivery_options, 'online_options': online_options, 'sort_option': sort_option,
+                'snapshot_date': snapshot_date})
+finish_run()
@@ -3,170 +3,26 @@
 #========================================================
 import pandas as pd
 import numpy as np
-import inflection
-import folium
-from folium.plugins import MarkerCluster
-import plotly.graph_objects as go
 import streamlit as st
-from streamlit_folium import folium_static
-from PIL import Image
+from utils.lazy import LazyModule
+from utils.search import SearchIndex
+from utils.similarity import SimilarityIndex
+from utils.ranking import SORT_KEYS, rating_prior, rank_restaurants, rank_groups
+from utils.disk_cache import disk_cache
+from utils.data import VERSION_ENTRIES, load_data, data_validation, shared_positions, positions_mask, filtered_view
+from utils.sidebar import sidebar_header, sidebar_footer, validation_warning, filter_options, restaurant_filters
+from utils.warmup import serving_version
+from utils.instrumentation import start_run, stage, timed, finish_run
+from utils.profiling import start_profile, finish_profile
+
+#biblioteca pesada importada apenas no primeiro uso
+go = LazyModule('plotly.graph_objects')
 
 #=======================================================
 # FUNCTIONS
 #=======================================================
-def clean_data( df1 ):
-    '''
-    Função que prepara e limpa o dataframe
-        
-        Limpezas efetuadas:
-            1. Formatação do título das colunas
-            2. Remoção de linhas duplicadas
-            3. Remoção de colunas com valores idênticos
-            4. Formatação da coluna 'cuisines' para mostrar 1 tipo de culinária
-            5. Remoção dos 'nan' da coluna 'cuisines'
-            6. Remoção de possível erro de digitação
-            7. Criação das colunas:
-                'color_name'= nome das cores
-                'country_name' = nome dos países
-                'price_type' = nome do tipo de preço
-                'exchange_rate' = taxa de câmbio USD/currency
-                'average_cost_for_two_USD' = preço para dois em dólar (data fixa)
-        
-        Input: Dataframe
-        Output: Dataframe
-    '''
-    #---------------------------------------------------
-    # SUBFUNCIONS
-    #---------------------------------------------------
-    #renomear colunas do dataframe
-    def rename_columns(dataframe):
-        df = dataframe.copy()
-        title = lambda x: inflection.titleize(x)
-        spaces = lambda x: x.replace(' ', '')
-        snakecase = lambda x: inflection.underscore(x)
-        cols_old = list(df.columns)
-        cols_old = list(map(title, cols_old))
-        cols_old = list(map(spaces, cols_old))
-        cols_new = list(map(snakecase, cols_old))
-        df.columns = cols_new
-        return df
-    
-    #nome das cores por código
-    COLORS = {
-    '3F7E00': 'darkgreen',
-    '5BA829': 'green',
-    '9ACD32': 'lightgreen',
-    'CDD614': 'orange',
-    'FFBA00': 'red',
-    'CBCBC8': 'darkred',
-    'FF7800': 'darkred'
-    }
-    def color_name(color_code):
-        return COLORS[color_code]
-    
-    #preenchimento do nome dos países
-    COUNTRIES = {
-    1: 'India',
-    14: 'Australia',
-    30: 'Brazil',
-    37: 'Canada',
-    94: 'Indonesia',
-    148: 'New Zealand',
-    162: 'Philippines',
-    166: 'Qatar',
-    184: 'Singapore',
-    189: 'South Africa',
-    191: 'Sri Lanka',
-    208: 'Turkey',
-    214: 'United Arab Emirates',
-    215: 'England',
-    216: 'United States of America'
-    }
-    def country_name(country_id):
-        return COUNTRIES[country_id]
-    
-    #rótulo do tipo de preço dos pratos
-    def create_price_type(price_range):
-        if price_range == 1:
-            return 'cheap'
-        elif price_range == 2:
-            return 'normal'
-        elif price_range == 3:
-            return 'expensive'
-        else:
-            return 'gourmet'
-
-    #conversão de moeda para 'US dollar'
-    #date = 13-08-2023
-    EXCHANGE = {
-        'Indonesia': 0.000065735428,
-        'Sri Lanka': 0.0031340417,
-        'Philippines': 0.073999949,
-        'India': 0.012060175,
-        'South Africa': 0.052876995,
-        'Qatar': 0.27472527,
-        'United Arab Emirates': 0.27229408,
-        'Singapore': 0.73957914,
-        'Brazil': 0.20388112,
-        'Turkey': 0.037143494,
-        'Australia': 0.65059812,
-        'New Zealand': 0.59840393,
-        'United States of America': 1,
-        'England': 1.2695533,
-        'Canada': 0.7441021
-    }
-    def exchange_rate(country_name):
-        return EXCHANGE[country_name]
-
-    #---------------------------------------------------
-    # CLEAN CODE
-    #---------------------------------------------------
-    #renomeando títulos das colunas
-    df1 = rename_columns( df1 )
-
-    #removendo dados duplicados
-    df1 = df1.drop_duplicates().reset_index(drop=True)
-
-    #removendo coluna com mesmos valores
-    df1 = df1.drop('switch_to_order_menu', axis=1)
-
-    #removendo linha com outlier muito acentuado 
-        #Obs: provável erro de digitação, pois custava mais de 2 milhões e era categorizado como 'cheap'
-    df1 = df1.drop(356, axis=0).reset_index(drop=True)
-
-    #categorizar restaurantes por um tipo de culinária
-    df1['cuisines'] = df1['cuisines'].astype(str)
-    df1.loc[:, 'cuisines'] = df1.loc[:, 'cuisines'].apply(lambda x: x.split(', ')[0])
-
-    #retirada dos nan's da coluna cuisines
-    linhas_select = df1['cuisines'] != 'nan'
-    df1 = df1.loc[linhas_select, :].reset_index(drop=True)
-
-    #criando coluna 'color_name' e preenchendo com o nome das cores
-    df1['color_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'color_name'] = color_name(df1.loc[i, 'rating_color'])
-    
-    #criando coluna 'country_name' e preenchendo com o nome dos países
-    df1['country_name'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'country_name'] = country_name(df1.loc[i, 'country_code'])
-    
-    #criando coluna 'price_type'
-    df1['price_type'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'price_type'] = create_price_type(df1.loc[i, 'price_range'])
-    
-    #criando coluna 'exchange_rate' e convertendo os preços para dólar
-    df1['exchange_rate'] = ''
-    for i in range(len(df1)):
-        df1.loc[i, 'exchange_rate'] = exchange_rate(df1.loc[i, 'country_name'])
-        #conversão para dólar
-    df1['average_cost_for_two_USD'] = np.array(df1['average_cost_for_two']) * np.array(df1['exchange_rate'])
-
-    return df1
-
-def metric_restaurant( df1 , cuisines ):
+@timed()
+def metric_restaurant( df1 , cuisines, sort_key ):
     '''
         Função que:
             1. Retorna o número de restaurantes cadastrado por cidade
@@ -174,11 +30,12 @@ def metric_restaurant( df1 , cuisines ):
         Inputs:
             Dataframe
             cuisines = tipo de culinária desejado ('str')
+            sort_key = coluna usada para ordenar os restaurantes (valor de SORT_KEYS)
         Output: Streamlit Metric
     '''
     linhas_select = df1['cuisines'] == cuisines
-    df2 = (df1.loc[linhas_select, ['restaurant_id','restaurant_name', 'aggregate_rating', 'country_name', 'city', 'average_cost_for_two_USD', 'cuisines']]
-          .sort_values(['aggregate_rating', 'restaurant_id'], ascending=[False, True])
+    df2 = (df1.loc[linhas_select, ['restaurant_id','restaurant_name', 'aggregate_rating', 'bayesian_rating', 'wilson_rating', 'votes', 'country_name', 'city', 'average_cost_for_two_USD', 'cuisines']]
+          .sort_values([sort_key, 'restaurant_id'], ascending=[False, True])
           .reset_index()
           .head(1))
     if len(df2['aggregate_rating']) == 0:
@@ -186,83 +43,171 @@ def metric_restaurant( df1 , cuisines ):
     else:
         st.metric(label = f"{df2['cuisines'].iloc[0]}: {df2['restaurant_name'].iloc[0]}",
                 value = f"{df2['aggregate_rating'].iloc[0]}/5.0",
-                help = f"País: {df2['country_name'].iloc[0]}.\n\nCidade: {df2['city'].iloc[0]}.\n\n Preço médio para dois: ${df2['average_cost_for_two_USD'].astype(float).round(2).iloc[0]} dólares."
+                help = f"País: {df2['country_name'].iloc[0]}.\n\nCidade: {df2['city'].iloc[0]}.\n\n Preço médio para dois: ${df2['average_cost_for_two_USD'].astype(float).round(2).iloc[0]} dólares.\n\nAvaliações: {df2['votes'].iloc[0]}.\n\nNota bayesiana: {df2['bayesian_rating'].round(2).iloc[0]}."
         )       
 
-def restaurant_dataframe( df1 ):
+@timed()
+def restaurant_dataframe( df1, sort_key ):
     '''
         Função que:
             1. Retorna um dataframe com os mais bem avaliados restaurantes cadastrados    
-        Input: Dataframe
+        Inputs:
+            Dataframe
+            sort_key = coluna usada para ordenar os restaurantes (valor de SORT_KEYS)
         Output: Dataframe
     '''
-    df2 = (df1.loc[:, ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'cuisines', 'average_cost_for_two_USD', 'aggregate_rating', 'votes']].groupby('restaurant_id')
+    df2 = (df1.loc[:, ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'cuisines', 'average_cost_for_two_USD', 'aggregate_rating', 'votes', 'bayesian_rating', 'wilson_rating']].groupby('restaurant_id')
                                                                                                                                               .max()
-                                                                                                                                              .sort_values(['aggregate_rating','restaurant_id'], ascending=[False, True])
+                                                                                                                                              .sort_values([sort_key,'restaurant_id'], ascending=[False, True])
                                                                                                                                               .reset_index()
                                                                                                                                               .head(qtd_restaurant))
     df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    df2[['bayesian_rating', 'wilson_rating']] = df2[['bayesian_rating', 'wilson_rating']].round(2)
     
     return df2
 
-def best_cuisines( df1 ):
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+def build_rankings( _df1, version ):
+    '''
+        Função que calcula a nota bayesiana e o limite de Wilson dos restaurantes (uma vez por versão do dataset)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: (média a priori e peso, Dataframe com as notas)
+    '''
+    prior = rating_prior(_df1)
+    return prior, rank_restaurants(_df1, prior)
+
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+@disk_cache()
+def build_search_index( _df1, version ):
+    '''
+        Função que cria o índice de busca dos restaurantes (uma vez por versão do dataset, guardado no cache em disco)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: SearchIndex
+    '''
+    return SearchIndex(_df1)
+
+@timed()
+def search_restaurants( df1, search_index, mask, query ):
+    '''
+        Função que:
+            1. Retorna os restaurantes filtrados que correspondem à busca por nome, localidade ou endereço
+        Inputs:
+            df1 = dataframe completo
+            search_index = SearchIndex
+            mask = array booleano com os restaurantes filtrados
+            query = texto buscado
+        Output: Dataframe
+    '''
+    positions, scores = search_index.search(query, limit=20, mask=mask)
+    df2 = df1.loc[positions, ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'locality_verbose', 'cuisines', 'average_cost_for_two_USD', 'aggregate_rating', 'votes']].reset_index(drop=True)
+    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+
+    return df2
+
+@timed()
+@st.cache_resource(max_entries=VERSION_ENTRIES)
+@disk_cache()
+def build_similarity_index( _df1, version ):
+    '''
+        Função que cria a matriz de atributos para a busca de restaurantes parecidos (uma vez por versão do dataset, guardada no cache em disco)
+        Inputs:
+            _df1 = dataframe completo (não entra na chave do cache)
+            version = versão do dataset
+        Output: SimilarityIndex
+    '''
+    return SimilarityIndex(_df1)
+
+@timed()
+def similar_restaurants( df1, similarity_index, mask, restaurant_id ):
+    '''
+        Função que:
+            1. Retorna os restaurantes filtrados mais parecidos com o restaurante selecionado
+        Inputs:
+            df1 = dataframe completo
+            similarity_index = SimilarityIndex
+            mask = array booleano com os restaurantes filtrados
+            restaurant_id = id do restaurante selecionado
+        Output: Dataframe
+    '''
+    position = np.flatnonzero(df1['restaurant_id'].values == restaurant_id)[0]
+    positions, scores = similarity_index.similar(position, k=qtd_restaurant, mask=mask)
+    df2 = df1.loc[positions, ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'cuisines', 'average_cost_for_two_USD', 'aggregate_rating', 'votes']].reset_index(drop=True)
+    df2['average_cost_for_two_USD'] = df2['average_cost_for_two_USD'].astype(float).round(2)
+    df2['similarity'] = scores.round(3)
+
+    return df2
+
+@timed()
+def best_cuisines( df1, prior, sort_key, sort_label ):
     '''
         Função que:
             1. Retorna os melhores tipos de culinária cadastrados
             2. Plota um gráfico de barras     
-        Input: Dataframe
+        Inputs:
+            Dataframe
+            prior = média a priori e peso da nota bayesiana
+            sort_key = coluna usada para ordenar os tipos de culinária (valor de SORT_KEYS)
+            sort_label = nome da ordenação exibido no gráfico
         Output: Gráfico de barras
     '''
-    df2 = (df1.loc[:, ['cuisines', 'aggregate_rating']].groupby('cuisines')
-                                                   .mean()
-                                                   .sort_values(['aggregate_rating'], ascending=[False])
-                                                   .reset_index()
-                                                   .head(qtd_restaurant))
-    df2['aggregate_rating'] = df2['aggregate_rating'].astype(float).round(2)
+    df2 = (rank_groups(df1, 'cuisines', prior).sort_values([sort_key], ascending=[False])
+                                              .head(qtd_restaurant))
+    df2[sort_key] = df2[sort_key].astype(float).round(2)
 
     fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['cuisines'], y=df2['aggregate_rating'], text=df2['aggregate_rating'],
-                            hovertemplate='Tipo de culinária: %{x}<br>Avaliação média: %{y}<extra></extra>' ) )
+    fig.add_trace( go.Bar ( x=df2['cuisines'], y=df2[sort_key], text=df2[sort_key],
+                            hovertemplate='Tipo de culinária: %%{x}<br>%s: %%{y}<extra></extra>' % sort_label ) )
     fig.update_layout(title={'text':f'Top {qtd_restaurant} - melhores tipos de culinária', 'x':0.5,'xanchor': 'center'})
     fig.update_xaxes(title_text='Tipos de culinária',)
-    fig.update_yaxes(title_text='Avaliação média')
+    fig.update_yaxes(title_text=sort_label)
     
     return fig
 
-def worst_cuisines( df1 ):
+@timed()
+def worst_cuisines( df1, prior, sort_key, sort_label ):
     '''
         Função que:
             1. Retorna os piores tipos de culinária cadastrados
             2. Plota um gráfico de barras     
-        Input: Dataframe
+        Inputs:
+            Dataframe
+            prior = média a priori e peso da nota bayesiana
+            sort_key = coluna usada para ordenar os tipos de culinária (valor de SORT_KEYS)
+            sort_label = nome da ordenação exibido no gráfico
         Output: Gráfico de barras
     '''
-    df2 = (df1.loc[:, ['cuisines', 'aggregate_rating']].groupby('cuisines')
-                                                   .mean()
-                                                   .sort_values(['aggregate_rating'], ascending=[True])
-                                                   .reset_index()
-                                                   .head(qtd_restaurant))
-    df2['aggregate_rating'] = df2['aggregate_rating'].astype(float).round(2)
+    df2 = (rank_groups(df1, 'cuisines', prior).sort_values([sort_key], ascending=[True])
+                                              .head(qtd_restaurant))
+    df2[sort_key] = df2[sort_key].astype(float).round(2)
 
     fig = go.Figure()
-    fig.add_trace( go.Bar ( x=df2['cuisines'], y=df2['aggregate_rating'], text=df2['aggregate_rating'],
-                            hovertemplate='Tipo de culinária: %{x}<br>Avaliação média: %{y}<extra></extra>' ) )
+    fig.add_trace( go.Bar ( x=df2['cuisines'], y=df2[sort_key], text=df2[sort_key],
+                            hovertemplate='Tipo de culinária: %%{x}<br>%s: %%{y}<extra></extra>' % sort_label ) )
     fig.update_layout(title={'text':f'Top {qtd_restaurant} - piores tipos de culinária', 'x':0.5, 'xanchor': 'center'})
     fig.update_xaxes(title_text='Tipos de culinária',)
-    fig.update_yaxes(title_text='Avaliação média')
+    fig.update_yaxes(title_text=sort_label)
     
     return fig
 #---------------------------------- CODE LOGIC STRUTURE -----------------------------------
 
 #========================================================
-# IMPORT DATASET
+# INSTRUMENTATION
 #========================================================
-df = pd.read_csv('dataset/zomato.csv')
+start_run('Visão Restaurantes')
+start_profile('Visão Restaurantes')
 
 #========================================================
-# CLEAN DATA
+# IMPORT DATASET
 #========================================================
-df1 = clean_data( df )
+#dataset limpo (última versão aquecida pelo warm-up), lido uma vez por processo e compartilhado (somente leitura) entre as sessões
+data_version = serving_version()
+df_all = load_data( data_version )
 
 #========================================================
 # SET STREAMLIT PAGE WIDTH
@@ -273,12 +218,7 @@ st.set_page_config(page_title='Visão Restaurantes', page_icon='🍽️', layout
 # SIDEBAR LAYOUT
 #========================================================
 with st.sidebar:
-    image = Image.open('logo.png')
-    st.image(image, width=120)
-
-    st.title('Fome Zero')
-    st.header('Marketplace de restaurantes')
-    st.markdown('''---''')
+    sidebar_header()
 
     st.header('Filtros')
 
@@ -290,120 +230,97 @@ with st.sidebar:
         max_value=20
     )
 
-    #selecionar países
-    country_options = st.multiselect(
-        'Selecione quais países deseja visualizar os dados:',
-        ['Philippines', 'Brazil', 'Australia', 'United States of America',
-        'Canada', 'Singapore', 'United Arab Emirates', 'India',
-        'Indonesia', 'New Zealand', 'England', 'Qatar', 'South Africa',
-         'Sri Lanka', 'Turkey'],
-        default = []
-    )
-
-    #selecionar tipo de preço
-    price_options = st.multiselect('Selecione a faixa de preço do restaurante:', 
-                                   ['gourmet', 'expensive', 'normal', 'cheap'], 
-                                   default = [])
+    #filtros com as opções do dataset
+    (country_options, price_options, table_booking_options,
+     delivery_options, online_options) = restaurant_filters( filter_options( df_all, data_version ) )
 
-    #selecionar reserva restaurantes
-    table_booking_options = st.multiselect('Selecione se o restaurante faz reservas:', 
-                                           ['Sim', 'Não'],
-                                           default=['Sim', 'Não'])
-    
-    #selecionar entrega restaurantes
-    delivery_options = st.multiselect('Selecione se o restaurante realiza entregas:', 
-                                      ['Sim', 'Não'],
-                                      default=['Sim', 'Não'])
-    
-    #selecionar online restaurantes
-    online_options = st.multiselect('Selecione se o restaurante possui pedidos online:', 
-                                    ['Sim', 'Não'],
-                                    default=['Sim', 'Não'])
+    #selecionar ordenação das avaliações
+    sort_option = st.selectbox('Selecione como ordenar as avaliações:', list(SORT_KEYS.keys()))
 
-    st.markdown('''---''')
+    #aviso de linhas do dataset em quarentena (validação da carga)
+    validation_warning( *data_validation( data_version ) )
 
-    st.header('Powered by Oiluj')
+    sidebar_footer()
 
 #filtro restaurantes
 qtd_restaurant = restaurant_slider
 
-#filtro países
-if not country_options:
-    df1 = df1
-else:
-    linhas_select = df1['country_name'].isin(country_options)
-    df1 = df1.loc[linhas_select, :]
-
-#filtro price_type
-if not price_options:
-    df1 = df1
-else:
-    linhas_select = df1['price_type'].isin(price_options)
-    df1=df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not table_booking_options:
-    df1 = df1
-else:
-    if 'Sim' in table_booking_options and 'Não' in table_booking_options:
-        df1 = df1
-    else:
-        valores_filtrados = [0 if 'Sim' in table_booking_options else 1]
-        linhas_select = df1['has_table_booking'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not delivery_options:
-    df1 = df1
-else:
-    if 'Sim' in delivery_options and 'Não' in delivery_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in delivery_options else 0]
-        linhas_select = df1['is_delivering_now'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
-
-#filtro has_table_booking
-if not online_options:
-    df1 = df1
-else:
-    if 'Sim' in online_options and 'Não' in online_options:
-        df1 = df1
-    else:
-        valores_filtrados = [1 if 'Sim' in online_options else 0]
-        linhas_select = df1['has_online_delivery'].isin(valores_filtrados)
-        df1 = df1.loc[linhas_select, :]
+#ordenação das avaliações
+sort_key = SORT_KEYS[sort_option]
+rating_prior_values, df_rankings = build_rankings( df_all, data_version )
+#novas colunas em um novo dataframe: o dataset compartilhado não é alterado
+df_all = df_all.join(df_rankings)
+
+#índice de busca do dataset completo
+search_index = build_search_index( df_all, data_version )
+similarity_index = build_similarity_index( df_all, data_version )
+
+with stage('filters', rows_in=len(df_all)) as stage_info:
+    #filtros como posições do dataset compartilhado (memorizadas por estado canônico dos filtros)
+    positions_filtered = shared_positions( df_all, data_version, (country_options, price_options, table_booking_options, delivery_options, online_options) )
+    df1 = filtered_view( df_all, positions_filtered )
+    stage_info['rows_out'] = len(positions_filtered)
+
+#restaurantes filtrados (posições do dataset completo)
+filter_mask = positions_mask( df_all, positions_filtered )
 
 #========================================================
 # PAGE LAYOUT
 #========================================================
 st.markdown('# 🍽️ Visão Restaurantes')
 
+st.markdown('## Buscar restaurantes')
+search_query = st.text_input('Busque por nome, localidade ou endereço:', placeholder='ex.: pizza, Connaught Place, Av. Paulista')
+if search_query:
+    df2 = search_restaurants( df_all, search_index, filter_mask, search_query )
+    if len(df2) == 0:
+        st.info('Nenhum restaurante encontrado.')
+    else:
+        st.dataframe(df2)
+
 st.markdown('## Melhores restaurantes pelos seguintes tipos culinários')
 col1, col2, col3, col4, col5 = st.columns(5)
 with col1:
-    metric_restaurant(df1, 'Italian')     
+    metric_restaurant(df1, 'Italian', sort_key)     
 with col2:
-    metric_restaurant(df1, 'American') 
+    metric_restaurant(df1, 'American', sort_key) 
 with col3:
-    metric_restaurant(df1, 'Arabian') 
+    metric_restaurant(df1, 'Arabian', sort_key) 
 with col4:
-    metric_restaurant(df1, 'Japanese') 
+    metric_restaurant(df1, 'Japanese', sort_key) 
 with col5:
-    metric_restaurant(df1, 'Home-made') 
+    metric_restaurant(df1, 'Home-made', sort_key) 
 
 st.markdown(f'## Top {qtd_restaurant} melhores restaurantes')
 #dataframe melhores restaurantes
-df2 = restaurant_dataframe( df1 )
+df2 = restaurant_dataframe( df1, sort_key )
 st.dataframe(df2)
 
+#restaurantes parecidos com um restaurante da tabela
+if len(df2) > 0:
+    restaurant_labels = dict(zip(df2['restaurant_id'], df2['restaurant_name'] + ' (' + df2['city'] + ')'))
+    selected_restaurant = st.selectbox('Veja restaurantes parecidos com:', list(restaurant_labels.keys()),
+                                       format_func=lambda restaurant_id: restaurant_labels[restaurant_id])
+    st.markdown(f'### Restaurantes parecidos com {restaurant_labels[selected_restaurant]}')
+    st.dataframe(similar_restaurants( df_all, similarity_index, filter_mask, selected_restaurant ))
+
 col1, col2 = st.columns(2)
 with col1:
     # top qtd_restaurant melhores culinárias
-    fig = best_cuisines( df1 )
-    st.plotly_chart(fig, use_container_width=True)
+    fig = best_cuisines( df1, rating_prior_values, sort_key, sort_option )
+    with stage('plotly_chart:best_cuisines'):
+        st.plotly_chart(fig, use_container_width=True)
 
 with col2:
     # top qtd_restaurant piores culinárias
-    fig = worst_cuisines( df1 )
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    fig = worst_cuisines( df1, rating_prior_values, sort_key, sort_option )
+    with stage('plotly_chart:worst_cuisines'):
+        st.plotly_chart(fig, use_container_width=True)
+
+#========================================================
+# INSTRUMENTATION
+#========================================================
+finish_profile({'country_options': country_options, 'price_options': price_options, 'table_booking_options': table_booking_options,
+                'delivery_options': delivery_options, 'online_options': online_options, 'sort_option': sort_option,
+                'qtd_restaurant': qtd_restaurant, 'search_query': search_query})
+finish_run()
@@ -0,0 +1,3 @@
+'''
+    Módulos compartilhados entre as páginas do Fome Zero Strategy Dashboard
+'''
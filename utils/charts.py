@@ -0,0 +1,300 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import operator
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.encoding import encoded, decode_groups, id_column
+from utils.instrumentation import timed
+from utils.kernels import KERNEL_AGGREGATIONS, compare_results, group_aggregate, group_index, group_nunique, kernel_mode
+from utils.lazy import LazyModule
+from utils.sketches import DistinctSketch
+
+#biblioteca pesada importada apenas no primeiro uso
+go = LazyModule('plotly.graph_objects')
+
+#operadores aceitos nos filtros dos gráficos
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+#agregações que exigem valores numéricos
+NUMERIC_AGGREGATIONS = ('sum', 'mean', 'max', 'min')
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+@dataclass(frozen=True)
+class ChartSpec:
+    '''
+        Classe que descreve um gráfico de forma declarativa
+
+        Inputs:
+            name = identificador do gráfico ('str')
+            title = título do gráfico
+            dimension = colunas de agrupamento (ex.: ('city', 'country_name'))
+            measure = coluna medida
+            aggregation = 'count', 'nunique', 'sum', 'mean', 'max' ou 'min'
+            predicate = filtro opcional (coluna, operador, valor), ex.: ('aggregate_rating', '>', 4)
+            top = quantidade de grupos exibidos (None = todos)
+            ascending = ordenação crescente da medida
+            decimals = casas decimais da medida (None = sem arredondamento)
+            x_title, y_title = títulos dos eixos
+            hover_label = nome da medida no hover (padrão = y_title)
+            color = coluna que separa as barras em séries (ex.: 'country_name')
+            kind = 'bar' ou 'pie'
+    '''
+    name: str
+    title: str
+    dimension: tuple
+    measure: str
+    aggregation: str
+    predicate: tuple = None
+    top: int = None
+    ascending: bool = False
+    decimals: int = None
+    x_title: str = ''
+    y_title: str = ''
+    hover_label: str = None
+    color: str = None
+    kind: str = 'bar'
+
+def chart_specs( *specs ):
+    '''
+        Função que indexa os gráficos pelo nome
+        Input: ChartSpec's
+        Output: dict nome -> ChartSpec
+    '''
+    return {spec.name: spec for spec in specs}
+
+def _predicate_mask( df1, predicate ):
+    column, op, value = predicate
+    return OPERATORS[op](df1[column], value).values
+
+def _value_codes( df1, column, mask=None ):
+    #códigos inteiros dos valores (-1 = ausente ou fora do filtro); colunas codificadas e categóricas já guardam os códigos
+    if encoded(df1, [column]):
+        codes = df1[id_column(column)].to_numpy()
+    elif isinstance(df1[column].dtype, pd.CategoricalDtype):
+        codes = df1[column].cat.codes.to_numpy()
+    else:
+        codes = pd.factorize(df1[column])[0]
+    return codes if mask is None else np.where(mask, codes, -1)
+
+def _kernel_ready( aggregation, values ):
+    #agregações com kernel sobre valores numéricos ('count' aceita qualquer tipo)
+    if aggregation not in KERNEL_AGGREGATIONS or isinstance(values.dtype, pd.CategoricalDtype):
+        return False
+    return aggregation == 'count' or pd.api.types.is_numeric_dtype(values.dtype)
+
+def _pandas_summary( df1, keys, measures, codes ):
+    #tabela agregada pelo groupby().agg do pandas
+    df2 = df1.loc[:, keys]
+    for name, (aggregation, values) in measures.items():
+        df2[name] = values
+    aggregations = {name: (name, aggregation) for name, (aggregation, values) in measures.items()}
+
+    grouped = df2.groupby(keys)
+    df_summary = grouped.agg(**aggregations) if aggregations else grouped.size().to_frame('__rows')
+    if codes:
+        group_ids = grouped.ngroup().to_numpy(dtype=np.float64)
+        group_ids = np.where(np.isnan(group_ids), -1, group_ids).astype(np.int64)
+        for name, value_codes in codes.items():
+            df_summary[name] = group_nunique(group_ids, len(df_summary), value_codes)
+    return df_summary.reset_index()
+
+def _kernel_summary( df1, keys, measures, codes ):
+    #tabela agregada pelos kernels NumPy (colunas de ids inteiros)
+    group_ids, group_keys = group_index([df1[key].to_numpy() for key in keys])
+    n_groups = len(group_keys[0])
+    columns = dict(zip(keys, group_keys))
+    for name, (aggregation, values) in measures.items():
+        columns[name] = group_aggregate(group_ids, n_groups, aggregation, values.to_numpy())
+    for name, value_codes in codes.items():
+        columns[name] = group_nunique(group_ids, n_groups, value_codes)
+    return pd.DataFrame(columns)
+
+def summary_table( df1, specs, distinct=None ):
+    '''
+        Função que calcula, em um único groupby().agg, todas as medidas dos gráficos que compartilham
+        as mesmas colunas de agrupamento (os filtros dos gráficos viram colunas com a medida mascarada,
+        sem um novo groupby por filtro). Os valores distintos ('nunique') são contados sobre códigos
+        inteiros, ou lidos das estimativas dos sketches no modo aproximado.
+        Colunas de agrupamento codificadas (utils.encoding) são agrupadas pelos ids inteiros, e os
+        rótulos só são decodificados na tabela agregada (uma linha por grupo). Sobre os ids, as medidas
+        são calculadas pelos kernels NumPy (utils.kernels), e no modo 'check' comparadas com o pandas
+        Inputs:
+            df1 = Dataframe filtrado
+            specs = dict nome -> ChartSpec com as mesmas colunas de agrupamento
+            distinct = dict nome -> Series com as estimativas por grupo (opcional, distinct_estimates)
+        Output: Dataframe com uma linha por grupo e uma coluna por gráfico
+    '''
+    dimensions = {tuple(spec.dimension) for spec in specs.values()}
+    if len(dimensions) != 1:
+        raise ValueError(f'os gráficos precisam ter as mesmas colunas de agrupamento: {sorted(dimensions)}')
+    dimension = list(dimensions.pop())
+    distinct = distinct or {}
+
+    keys = dimension
+    if encoded(df1, dimension):
+        keys = [id_column(column) for column in dimension]
+        #valores ausentes (id -1) ficam fora dos grupos, como no groupby sobre o texto
+        valid = np.logical_and.reduce([df1[key].to_numpy() >= 0 for key in keys])
+        if not valid.all():
+            df1 = df1.loc[valid, :]
+
+    #medidas: nome da coluna -> (agregação, valores); valores distintos: nome -> códigos inteiros
+    measures = {}
+    codes = {}
+    for spec in specs.values():
+        if spec.name in distinct:
+            continue
+        values = df1[spec.measure]
+        mask = None
+        if spec.aggregation in NUMERIC_AGGREGATIONS and values.dtype == object:
+            values = values.astype(float)
+        if spec.predicate is not None:
+            mask = _predicate_mask(df1, spec.predicate)
+            values = values.where(mask)
+            #grupos sem nenhuma linha no filtro não aparecem no gráfico
+            measures[f'{spec.name}__rows'] = ('sum', pd.Series(mask.astype(np.int64), index=df1.index))
+        if spec.aggregation == 'nunique':
+            codes[spec.name] = _value_codes(df1, spec.measure, mask)
+            continue
+        measures[spec.name] = (spec.aggregation, values)
+
+    mode = kernel_mode()
+    kernels = (mode != '0' and keys is not dimension
+               and all(_kernel_ready(aggregation, values) for aggregation, values in measures.values()))
+    if kernels:
+        df_summary = decode_groups(df1, _kernel_summary(df1, keys, measures, codes), dimension)
+        if mode == 'check':
+            expected = decode_groups(df1, _pandas_summary(df1, keys, measures, codes), dimension)
+            compare_results(df_summary, expected.drop(columns='__rows', errors='ignore'), 'summary_table')
+            df_summary = expected
+    else:
+        df_summary = _pandas_summary(df1, keys, measures, codes)
+        if keys is not dimension:
+            df_summary = decode_groups(df1, df_summary, dimension)
+    df_summary = df_summary.set_index(dimension)
+    for name, estimates in distinct.items():
+        df_summary[name] = estimates.reindex(df_summary.index, fill_value=0).to_numpy()
+
+    return df_summary.drop(columns='__rows', errors='ignore').reset_index()
+
+def top_tables( df_summary, specs ):
+    '''
+        Função que ordena e corta o top N de cada gráfico a partir da tabela agregada
+        (ordenação estável: empates seguem a ordem das colunas de agrupamento)
+        Inputs:
+            df_summary = tabela retornada por summary_table
+            specs = dict nome -> ChartSpec
+        Output: dict nome -> Dataframe (colunas de agrupamento + medida)
+    '''
+    tables = {}
+    for spec in specs.values():
+        dimension = list(spec.dimension)
+        df3 = df_summary
+        if spec.predicate is not None:
+            df3 = df3.loc[df3[f'{spec.name}__rows'] > 0, :]
+        df3 = (df3.loc[:, dimension + [spec.name]].rename(columns={spec.name: spec.measure})
+                                                  .sort_values(spec.measure, ascending=spec.ascending, kind='stable')
+                                                  .reset_index(drop=True))
+        if spec.top is not None:
+            df3 = df3.head(spec.top)
+        if spec.decimals is not None:
+            df3[spec.measure] = df3[spec.measure].astype(float).round(spec.decimals)
+        tables[spec.name] = df3
+
+    return tables
+
+@timed()
+def chart_tables( df1, specs, distinct=None ):
+    '''
+        Função que:
+            1. Agrupa os gráficos que compartilham as mesmas colunas de agrupamento
+            2. Calcula a tabela agregada de cada grupo em um único groupby().agg (summary_table)
+            3. Corta o top N de cada gráfico a partir da tabela agregada (top_tables)
+        Inputs:
+            df1 = Dataframe filtrado
+            specs = dict nome -> ChartSpec (chart_specs)
+            distinct = estimativas dos valores distintos no modo aproximado (opcional, distinct_estimates)
+        Output: dict nome -> Dataframe (colunas de agrupamento + medida)
+    '''
+    distinct = distinct or {}
+    by_dimension = {}
+    for name, spec in specs.items():
+        by_dimension.setdefault(tuple(spec.dimension), {})[name] = spec
+
+    tables = {}
+    for group_specs in by_dimension.values():
+        group_distinct = {name: distinct[name] for name in group_specs if name in distinct}
+        tables.update(top_tables(summary_table(df1, group_specs, group_distinct), group_specs))
+
+    return tables
+
+def distinct_sketches( df1, specs, error ):
+    '''
+        Função que cria os sketches HyperLogLog dos gráficos de valores distintos ('nunique' sem filtro próprio)
+        Inputs:
+            df1 = Dataframe completo
+            specs = dict nome -> ChartSpec
+            error = erro relativo do modo aproximado ('float')
+        Output: dict nome -> DistinctSketch
+    '''
+    return {name: DistinctSketch(df1, spec.dimension, spec.measure, error) for name, spec in specs.items()
+            if spec.aggregation == 'nunique' and spec.predicate is None}
+
+def distinct_estimates( sketches, filters ):
+    '''
+        Função que estima os valores distintos de cada gráfico para um estado dos filtros
+        Inputs:
+            sketches = dict retornado por distinct_sketches
+            filters = opções dos filtros, na ordem de filter_positions
+        Output: dict nome -> Series com as estimativas por grupo
+    '''
+    return {name: sketch.estimate(*filters) for name, sketch in sketches.items()}
+
+def chart_figure( spec, df2 ):
+    '''
+        Função que plota o gráfico descrito pela especificação
+        Inputs:
+            spec = ChartSpec
+            df2 = tabela do gráfico retornada por chart_tables
+        Output: Gráfico plotly
+    '''
+    x = spec.dimension[0]
+    y = spec.measure
+    hover_label = spec.hover_label or spec.y_title
+
+    fig = go.Figure()
+    if spec.kind == 'pie':
+        fig.add_trace( go.Pie ( labels=df2[x], values=df2[y],
+                                hovertemplate='%%{label}<br>%s: %%{value}<extra></extra>' % hover_label ) )
+        fig.update_traces(textposition='inside')
+        fig.update_layout(title={'text':spec.title, 'x':0.5, 'xanchor': 'center'})
+        return fig
+
+    if spec.color is None:
+        fig.add_trace( go.Bar ( x=df2[x], y=df2[y], text=df2[y],
+                                hovertemplate='%%{x}<br>%s: %%{y}<extra></extra>' % hover_label ) )
+        fig.update_layout(title={'text':spec.title, 'x':0.5, 'xanchor': 'center'})
+        fig.update_xaxes(title_text=spec.x_title)
+    else:
+        for country, group in df2.groupby(spec.color):
+            fig.add_trace( go.Bar ( x=group[x], y=group[y], name=country, text=group[y],
+                                    hovertemplate='País: %s<br>%s: %%{x}<br>%s: %%{y}<extra></extra>' % (country, spec.x_title, hover_label) ) )
+        fig.update_layout(legend_title_text='País',
+                          title={'text':spec.title, 'x':0.5, 'xanchor': 'center'})
+        fig.update_xaxes(title_text=spec.x_title, categoryorder='total descending')
+    fig.update_yaxes(title_text=spec.y_title)
+
+    return fig
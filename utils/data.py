@@ -0,0 +1,411 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.disk_cache import disk_cache
+from utils.encoding import encode_columns
+from utils.instrumentation import stage, timed
+from utils.validation import Rule, validate
+
+#copy-on-write: seleções de colunas e recortes do dataset compartilhado não copiam os dados,
+#e qualquer alteração em um dataframe derivado copia apenas o que foi alterado (o dataset compartilhado nunca muda)
+pd.set_option('mode.copy_on_write', True)
+
+logger = logging.getLogger(__name__)
+
+#dataset bruto
+DATASET_PATH = 'dataset/zomato.csv'
+
+#versões do dataset mantidas nos caches em memória indexados pela versão: a servida às sessões e a
+#que está sendo aquecida (utils.warmup); as anteriores são descartadas após a troca
+VERSION_ENTRIES = 2
+
+#título das colunas do dataset bruto em snake_case
+#(mapeamento fixo: evita importar o inflection para renomear sempre as mesmas 21 colunas)
+COLUMNS = {
+'Restaurant ID': 'restaurant_id',
+'Restaurant Name': 'restaurant_name',
+'Country Code': 'country_code',
+'City': 'city',
+'Address': 'address',
+'Locality': 'locality',
+'Locality Verbose': 'locality_verbose',
+'Longitude': 'longitude',
+'Latitude': 'latitude',
+'Cuisines': 'cuisines',
+'Average Cost for two': 'average_cost_for_two',
+'Currency': 'currency',
+'Has Table booking': 'has_table_booking',
+'Has Online delivery': 'has_online_delivery',
+'Is delivering now': 'is_delivering_now',
+'Switch to order menu': 'switch_to_order_menu',
+'Price range': 'price_range',
+'Aggregate rating': 'aggregate_rating',
+'Rating color': 'rating_color',
+'Rating text': 'rating_text',
+'Votes': 'votes'
+}
+
+#nome das cores por código
+COLORS = {
+'3F7E00': 'darkgreen',
+'5BA829': 'green',
+'9ACD32': 'lightgreen',
+'CDD614': 'orange',
+'FFBA00': 'red',
+'CBCBC8': 'darkred',
+'FF7800': 'darkred'
+}
+
+#nome dos países por código
+COUNTRIES = {
+1: 'India',
+14: 'Australia',
+30: 'Brazil',
+37: 'Canada',
+94: 'Indonesia',
+148: 'New Zealand',
+162: 'Philippines',
+166: 'Qatar',
+184: 'Singapore',
+189: 'South Africa',
+191: 'Sri Lanka',
+208: 'Turkey',
+214: 'United Arab Emirates',
+215: 'England',
+216: 'United States of America'
+}
+
+#conversão de moeda para 'US dollar'
+#date = 13-08-2023
+EXCHANGE = {
+'Indonesia': 0.000065735428,
+'Sri Lanka': 0.0031340417,
+'Philippines': 0.073999949,
+'India': 0.012060175,
+'South Africa': 0.052876995,
+'Qatar': 0.27472527,
+'United Arab Emirates': 0.27229408,
+'Singapore': 0.73957914,
+'Brazil': 0.20388112,
+'Turkey': 0.037143494,
+'Australia': 0.65059812,
+'New Zealand': 0.59840393,
+'United States of America': 1,
+'England': 1.2695533,
+'Canada': 0.7441021
+}
+
+#textos da avaliação aceitos para cada cor, da pior à melhor faixa de nota (o texto vem no idioma do país)
+RATING_TEXTS = {
+'CBCBC8': ['Not rated'],
+'FF7800': ['Poor'],
+'FFBA00': ['Average'],
+'CDD614': ['Average', 'Biasa'],
+'9ACD32': ['Good', 'Bom', 'Bueno', 'Buono', 'Baik', 'Skvělá volba', 'İyi'],
+'5BA829': ['Very Good', 'Muito Bom', 'Muito bom', 'Muy Bueno', 'Bardzo dobrze', 'Sangat Baik', 'Velmi dobré',
+           'Veľmi dobré', 'Çok iyi'],
+'3F7E00': ['Excellent', 'Excelente', 'Eccellente', 'Harika', 'Skvělé', 'Terbaik', 'Vynikajúce', 'Wybitnie']
+}
+
+#ordem das colunas categóricas ordenadas criadas pelo clean_data
+#   'price_type' = tipos de preço por price_range (1 a 4, acima de 3 = 'gourmet'), do mais barato ao mais caro
+#   'color_name' = nomes das cores, da pior à melhor avaliação
+#   'rating_text' = textos da avaliação na ordem das faixas de nota
+PRICE_TYPES = ['cheap', 'normal', 'expensive', 'gourmet']
+COLOR_ORDER = ['darkred', 'red', 'orange', 'lightgreen', 'green', 'darkgreen']
+RATING_TEXT_ORDER = list(dict.fromkeys(text for texts in RATING_TEXTS.values() for text in texts))
+
+#regras de qualidade verificadas pelo clean_data antes de criar as colunas derivadas
+#('error' = restaurante vai para a quarentena, 'warning' = apenas informado no relatório)
+DATA_RULES = [
+    Rule('rating_color', 'cor da avaliação conhecida (COLORS)', ('rating_color',), 'domain', values=list(COLORS)),
+    Rule('country_code', 'código do país conhecido (COUNTRIES)', ('country_code',), 'domain', values=list(COUNTRIES)),
+    Rule('exchange_rate', 'país com taxa de câmbio (EXCHANGE)', ('country_code',), 'domain',
+         values=[code for code, country in COUNTRIES.items() if country in EXCHANGE]),
+    Rule('latitude', 'latitude entre -90 e 90', ('latitude',), 'range', low=-90, high=90),
+    Rule('longitude', 'longitude entre -180 e 180', ('longitude',), 'range', low=-180, high=180),
+    Rule('aggregate_rating', 'nota entre 0 e 5', ('aggregate_rating',), 'range', low=0, high=5),
+    Rule('average_cost_for_two', 'preço para dois maior que 0', ('average_cost_for_two',), 'range', low=0,
+         inclusive='neither', severity='warning'),
+    Rule('rating_text', 'texto da avaliação coerente com a cor (RATING_TEXTS)', ('rating_color', 'rating_text'),
+         'pairs', values=RATING_TEXTS, severity='warning')
+]
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+@timed()
+def clean_data( df1, validation=None ):
+    '''
+    Função que prepara e limpa o dataframe
+        
+        Limpezas efetuadas:
+            1. Formatação do título das colunas
+            2. Remoção de linhas duplicadas
+            3. Remoção de colunas com valores idênticos
+            4. Formatação da coluna 'cuisines' para mostrar 1 tipo de culinária
+            5. Remoção dos 'nan' da coluna 'cuisines'
+            6. Remoção de possível erro de digitação
+            7. Quarentena dos restaurantes que falham nas regras de qualidade 'error' (DATA_RULES)
+            8. Criação das colunas:
+                'color_name'= nome das cores (categórica ordenada)
+                'country_name' = nome dos países
+                'price_type' = nome do tipo de preço (categórica ordenada, cheap -> gourmet)
+                'exchange_rate' = taxa de câmbio USD/currency
+                'average_cost_for_two_USD' = preço para dois em dólar (data fixa)
+            9. Conversão da coluna 'rating_text' em categórica ordenada pela faixa de nota
+        
+        Inputs:
+            df1 = Dataframe
+            validation = dict onde a limpeza informa 'report' e 'quarantine' da validação (opcional)
+        Output: Dataframe
+    '''
+    #---------------------------------------------------
+    # SUBFUNCIONS
+    #---------------------------------------------------
+    #renomear colunas do dataframe
+    def rename_columns(dataframe):
+        df = dataframe.copy()
+        snakecase = lambda x: COLUMNS.get(x, x.strip().lower().replace(' ', '_'))
+        df.columns = list(map(snakecase, df.columns))
+        return df
+    
+    #nome das cores por código (tabela código da cor -> código da categoria, sem laço por linha)
+    def color_name(color_codes):
+        lookup = np.array([COLOR_ORDER.index(name) for name in COLORS.values()])
+        codes = lookup[pd.Index(list(COLORS)).get_indexer(color_codes)]
+        return pd.Categorical.from_codes(codes, categories=COLOR_ORDER, ordered=True)
+    
+    #preenchimento do nome dos países
+    def country_name(country_ids):
+        return country_ids.map(COUNTRIES)
+    
+    #rótulo do tipo de preço dos pratos
+    def create_price_type(price_range):
+        codes = np.select([price_range == 1, price_range == 2, price_range == 3], [0, 1, 2], default=3)
+        return pd.Categorical.from_codes(codes, categories=PRICE_TYPES, ordered=True)
+
+    #texto da avaliação (textos fora de RATING_TEXTS ficam depois dos conhecidos)
+    def rating_text(texts):
+        unknown = sorted(set(texts.dropna()) - set(RATING_TEXT_ORDER))
+        return pd.Categorical(texts, categories=RATING_TEXT_ORDER + unknown, ordered=True)
+
+    #conversão de moeda para 'US dollar'
+    def exchange_rate(country_names):
+        return country_names.map(EXCHANGE).astype(float)
+
+    #---------------------------------------------------
+    # CLEAN CODE
+    #---------------------------------------------------
+    #renomeando títulos das colunas
+    df1 = rename_columns( df1 )
+
+    #removendo dados duplicados
+    df1 = df1.drop_duplicates().reset_index(drop=True)
+
+    #removendo coluna com mesmos valores
+    df1 = df1.drop('switch_to_order_menu', axis=1)
+
+    #removendo linha com outlier muito acentuado 
+        #Obs: provável erro de digitação, pois custava mais de 2 milhões e era categorizado como 'cheap'
+    df1 = df1.drop(356, axis=0).reset_index(drop=True)
+
+    #validação em um único passo vetorizado: códigos desconhecidos vão para a quarentena
+    #antes das conversões abaixo (que não aceitam códigos fora dos dicionários)
+    with stage('validation', rows_in=len(df1)) as stage_info:
+        report, quarantine = validate( df1, DATA_RULES )
+        df1 = df1.drop(quarantine.index).reset_index(drop=True)
+        stage_info['rows_out'] = len(df1)
+    if validation is not None:
+        validation.update(report=report, quarantine=quarantine)
+
+    #categorizar restaurantes por um tipo de culinária
+    df1['cuisines'] = df1['cuisines'].astype(str)
+    df1.loc[:, 'cuisines'] = df1.loc[:, 'cuisines'].apply(lambda x: x.split(', ')[0])
+
+    #retirada dos nan's da coluna cuisines
+    linhas_select = df1['cuisines'] != 'nan'
+    df1 = df1.loc[linhas_select, :].reset_index(drop=True)
+
+    #criando as colunas 'color_name', 'country_name' e 'price_type' e convertendo 'rating_text'
+    #em um único passo vetorizado (filtros e ordenações nas categóricas comparam códigos inteiros)
+    df1 = df1.assign(rating_text=rating_text(df1['rating_text']),
+                     color_name=color_name(df1['rating_color']),
+                     country_name=country_name(df1['country_code']),
+                     price_type=create_price_type(df1['price_range'].to_numpy()))
+    
+    #criando coluna 'exchange_rate' e convertendo os preços para dólar
+    df1['exchange_rate'] = exchange_rate(df1['country_name'])
+    df1['average_cost_for_two_USD'] = df1['average_cost_for_two'] * df1['exchange_rate']
+
+    return df1
+
+def dataset_version( path=DATASET_PATH ):
+    '''
+        Função que retorna a versão do arquivo do dataset (data de modificação e tamanho),
+        usada como chave dos caches que dependem do dataset
+        Input: caminho do arquivo ('str')
+        Output: versão ('str')
+    '''
+    info = os.stat(path)
+    return f'{info.st_mtime_ns:x}-{info.st_size:x}'
+
+@disk_cache('clean_data')
+def cleaned_dataset( version, path=DATASET_PATH ):
+    '''
+        Função que lê, limpa e codifica o dataset (ids inteiros estáveis das colunas de texto repetidas,
+        utils.encoding), com o resultado e a validação guardados no cache em disco
+        (compartilhado entre reinícios do servidor e entre os workers, por versão do arquivo e do código)
+        Inputs:
+            version = versão do arquivo retornada por dataset_version
+            path = caminho do arquivo ('str')
+        Output: (Dataframe limpo, com as colunas '<coluna>_id' e as tabelas de decodificação (DataFrame.attrs),
+                 relatório da validação, quarentena)
+    '''
+    with stage('read_csv') as stage_info:
+        df = pd.read_csv(path)
+        stage_info['rows_out'] = len(df)
+    validation = {}
+    df = clean_data( df, validation )
+    with stage('encode_columns', rows_in=len(df)):
+        df = encode_columns( df )
+    return df, validation['report'], validation['quarantine']
+
+def log_validation( report, version ):
+    '''
+        Função que registra no log as regras com falhas (linhas em quarentena nas regras 'error')
+        Inputs:
+            report = relatório da validação
+            version = versão do dataset
+        Output: None
+    '''
+    for rule in report.loc[report['failures'] > 0, :].itertuples(index=False):
+        action = 'linhas em quarentena' if rule.severity == 'error' else 'linhas mantidas'
+        logger.warning('validação (versão %s): %s - %d %s (%s; ex.: %s)',
+                       version, rule.rule, rule.failures, action, rule.description, rule.examples)
+    return None
+
+@st.cache_resource(show_spinner=False, max_entries=VERSION_ENTRIES)
+def loaded_dataset( version, path=DATASET_PATH ):
+    '''
+        Função que lê, limpa e valida o dataset uma única vez por processo (por versão do arquivo),
+        registrando no log as falhas da validação
+        Inputs:
+            version = versão do arquivo retornada por dataset_version
+            path = caminho do arquivo ('str')
+        Output: (Dataframe limpo, relatório da validação, quarentena)
+    '''
+    df, report, quarantine = cleaned_dataset( version, path )
+    log_validation( report, version )
+    return df, report, quarantine
+
+def load_data( version, path=DATASET_PATH ):
+    '''
+        Função que:
+            1. Lê e limpa o dataset uma única vez por processo (por versão do arquivo)
+            2. Retorna o mesmo dataframe, somente leitura, para todas as sessões e páginas
+        Inputs:
+            version = versão do arquivo retornada por dataset_version
+            path = caminho do arquivo ('str')
+        Output: Dataframe limpo (não deve ser alterado: use assign/join para derivar novas colunas)
+    '''
+    return loaded_dataset( version, path )[0]
+
+def data_validation( version, path=DATASET_PATH ):
+    '''
+        Função que retorna a validação do dataset carregado (mesma leitura de load_data)
+        Inputs:
+            version = versão do arquivo retornada por dataset_version
+            path = caminho do arquivo ('str')
+        Output: (relatório da validação, quarentena)
+    '''
+    return loaded_dataset( version, path )[1:]
+
+def _isin_mask( values, options ):
+    #colunas categóricas: compara os códigos inteiros com os códigos das opções (sem comparar strings)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        option_codes = values.cat.categories.get_indexer(list(options))
+        return np.isin(values.cat.codes.to_numpy(), option_codes[option_codes >= 0])
+    return values.isin(options).to_numpy()
+
+def _yes_no_mask( values, options ):
+    #'Sim' = 1, 'Não' = 0; nenhuma ou ambas as opções não filtram
+    if not options or ('Sim' in options and 'Não' in options):
+        return None
+    return values == (1 if 'Sim' in options else 0)
+
+@timed()
+def filter_positions( df1, country_options=None, price_options=None, table_booking_options=None,
+                      delivery_options=None, online_options=None ):
+    '''
+        Função que:
+            1. Aplica os filtros da sidebar sobre o dataset compartilhado em um único passo vetorizado
+            2. Retorna as posições dos restaurantes selecionados (sem copiar o dataframe)
+        Inputs:
+            df1 = Dataframe limpo
+            country_options = países selecionados (vazio = todos)
+            price_options = tipos de preço selecionados (vazio = todos)
+            table_booking_options, delivery_options, online_options = 'Sim'/'Não' selecionados
+        Output: array com as posições
+    '''
+    mask = np.ones(len(df1), dtype=bool)
+    if country_options:
+        mask &= _isin_mask(df1['country_name'], country_options)
+    if price_options:
+        mask &= _isin_mask(df1['price_type'], price_options)
+
+    for column, options in (('has_table_booking', table_booking_options),
+                            ('is_delivering_now', delivery_options),
+                            ('has_online_delivery', online_options)):
+        column_mask = _yes_no_mask(df1[column].values, options)
+        if column_mask is not None:
+            mask &= column_mask
+
+    return np.flatnonzero(mask)
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def shared_positions( _df1, version, state ):
+    '''
+        Função que memoriza as posições filtradas por estado canônico dos filtros (canonical_state),
+        compartilhadas entre as sessões do processo: links com o mesmo estado na URL não refazem o filtro
+        Inputs:
+            _df1 = Dataframe limpo (não entra na chave do cache)
+            version = versão do dataset
+            state = estado canônico dos filtros, na ordem de filter_positions
+        Output: array com as posições (somente leitura)
+    '''
+    positions = filter_positions( _df1, *state )
+    positions.flags.writeable = False
+    return positions
+
+def positions_mask( df1, positions ):
+    '''
+        Função que converte as posições filtradas em um array booleano do tamanho do dataset
+        Inputs:
+            df1 = Dataframe limpo
+            positions = posições retornadas por filter_positions
+        Output: array booleano
+    '''
+    mask = np.zeros(len(df1), dtype=bool)
+    mask[positions] = True
+    return mask
+
+def filtered_view( df1, positions ):
+    '''
+        Função que retorna os restaurantes filtrados
+        (sem filtros ativos retorna o próprio dataset compartilhado, sem cópia)
+        Inputs:
+            df1 = Dataframe limpo
+            positions = posições retornadas por filter_positions
+        Output: Dataframe
+    '''
+    if len(positions) == len(df1):
+        return df1
+    return df1.take(positions)
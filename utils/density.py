@@ -0,0 +1,64 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+import pandas as pd
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def grid_density( latitude, longitude, values=None, cell_size=0.5 ):
+    '''
+        Função que:
+            1. Agrega os restaurantes em células de uma grade latitude/longitude (binning vetorizado)
+            2. Calcula por célula a quantidade de restaurantes e a média de 'values'
+        Inputs:
+            latitude, longitude = arrays com as coordenadas
+            values = array opcional com a métrica a ser agregada (ex.: 'aggregate_rating')
+            cell_size = tamanho da célula em graus ('float')
+        Output: Dataframe com uma linha por célula ocupada
+            (south, west, north, east, latitude, longitude, count, value)
+    '''
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    n_cols = int(np.ceil(360 / cell_size)) + 1
+
+    rows = np.floor((latitude + 90) / cell_size).astype(np.int64)
+    cols = np.floor((longitude + 180) / cell_size).astype(np.int64)
+    cells, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+
+    count = np.bincount(inverse, minlength=len(cells))
+    if values is None:
+        value = count.astype(np.float64)
+    else:
+        value = np.bincount(inverse, weights=np.asarray(values, dtype=np.float64), minlength=len(cells)) / count
+
+    south = (cells // n_cols) * cell_size - 90
+    west = (cells % n_cols) * cell_size - 180
+    df2 = pd.DataFrame({'south': south,
+                        'west': west,
+                        'north': south + cell_size,
+                        'east': west + cell_size,
+                        'latitude': south + cell_size / 2,
+                        'longitude': west + cell_size / 2,
+                        'count': count,
+                        'value': value})
+    return df2
+
+def density_geojson( df2 ):
+    '''
+        Função que:
+            1. Converte as células da grade em um GeoJSON de retângulos
+        Input: Dataframe retornado por grid_density
+        Output: dict no formato GeoJSON (FeatureCollection)
+    '''
+    features = []
+    for south, west, north, east, count, value in zip(df2['south'], df2['west'], df2['north'], df2['east'],
+                                                      df2['count'], df2['value']):
+        features.append({
+            'type': 'Feature',
+            'properties': {'count': int(count), 'value': round(float(value), 2)},
+            'geometry': {'type': 'Polygon',
+                         'coordinates': [[[west, south], [east, south], [east, north], [west, north], [west, south]]]}
+        })
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,205 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import functools
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+
+from utils.instrumentation import stage
+
+#variáveis de ambiente
+#   FOME_ZERO_DISK_CACHE=0 -> desativa o cache em disco
+#   FOME_ZERO_CACHE_DIR=<pasta> -> pasta do cache em disco (padrão '.cache')
+#   FOME_ZERO_CACHE_MAX_MB=<MB> -> tamanho máximo do cache, os itens usados há mais tempo são removidos (padrão 256)
+DISK_CACHE_ENV = 'FOME_ZERO_DISK_CACHE'
+CACHE_DIR_ENV = 'FOME_ZERO_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'FOME_ZERO_CACHE_MAX_MB'
+CACHE_FILE = 'fome_zero.sqlite'
+
+#raiz do projeto (o código de utils/ entra na versão de todas as funções em cache)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def disk_cache_enabled():
+    '''
+        Função que retorna se o cache em disco está ativo (variável de ambiente)
+        Output: bool
+    '''
+    return os.environ.get(DISK_CACHE_ENV, '1') not in ('', '0')
+
+@functools.lru_cache(maxsize=None)
+def code_version( path ):
+    '''
+        Função que retorna a versão do código de uma função em cache: hash do arquivo onde ela
+        foi definida e dos módulos de utils/ (uma alteração no código invalida os resultados salvos)
+        Input: caminho do arquivo da função ('str')
+        Output: versão ('str')
+    '''
+    digest = hashlib.sha1()
+    for file in [path] + sorted(glob.glob(os.path.join(ROOT, 'utils', '*.py'))):
+        with open(file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+class DiskCache:
+    '''
+        Classe que guarda resultados serializados (pickle) em um banco SQLite local, compartilhado
+        entre reinícios do servidor e entre os processos (workers) da mesma máquina.
+        O banco usa WAL (leituras não bloqueiam a escrita de outro processo) e é limitado em tamanho:
+        ao passar do limite, os itens acessados há mais tempo são removidos (LRU).
+        Qualquer erro do banco é tratado como ausência no cache (a página calcula o resultado normalmente).
+
+        Inputs:
+            path = caminho do arquivo do banco ('str')
+            max_bytes = tamanho máximo dos itens guardados ('int')
+    '''
+    def __init__( self, path, max_bytes ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._ready = False
+
+    def _connect( self ):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+                               ' size INTEGER NOT NULL, accessed REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self._ready = True
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def get( self, key ):
+        '''
+            Método que busca um resultado
+            Input: chave ('str')
+            Output: (True, valor) se encontrado, (False, None) caso contrário
+        '''
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return False, None
+                connection.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+            return True, pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, EOFError, ImportError):
+            return False, None
+
+    def set( self, key, value ):
+        '''
+            Método que guarda um resultado e remove os itens mais antigos se o limite de tamanho for ultrapassado
+            Inputs:
+                key = chave ('str')
+                value = valor (serializável com pickle)
+            Output: None
+        '''
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        if len(data) > self.max_bytes:
+            return None
+
+        try:
+            with closing(self._connect()) as connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                                   (key, data, len(data), time.time()))
+                total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+                if total > self.max_bytes:
+                    evict = []
+                    for old_key, size in connection.execute('SELECT key, size FROM entries WHERE key != ? ORDER BY accessed', (key,)):
+                        if total <= self.max_bytes:
+                            break
+                        evict.append((old_key,))
+                        total -= size
+                    connection.executemany('DELETE FROM entries WHERE key = ?', evict)
+                connection.execute('COMMIT')
+        except sqlite3.Error:
+            pass
+        return None
+
+    def stats( self ):
+        '''
+            Método que retorna a quantidade de itens e o tamanho ocupado
+            Output: dict com 'entries' e 'bytes'
+        '''
+        with closing(self._connect()) as connection:
+            entries, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'entries': entries, 'bytes': size}
+
+    def clear( self ):
+        '''
+            Método que remove todos os itens
+            Output: None
+        '''
+        with closing(self._connect()) as connection:
+            connection.execute('DELETE FROM entries')
+        return None
+
+@functools.lru_cache(maxsize=None)
+def default_cache():
+    '''
+        Função que retorna o cache em disco do processo (pasta e tamanho das variáveis de ambiente)
+        Output: DiskCache
+    '''
+    folder = os.environ.get(CACHE_DIR_ENV, os.path.join(ROOT, '.cache'))
+    max_bytes = int(float(os.environ.get(CACHE_MAX_MB_ENV, '256')) * 1024 * 1024)
+    return DiskCache(os.path.join(folder, CACHE_FILE), max_bytes)
+
+def cache_key( function, args, kwargs ):
+    '''
+        Função que monta a chave de uma chamada: nome da função, versão do código e argumentos.
+        Como no st.cache_data, argumentos que começam com '_' não entram na chave
+        (ex.: o dataframe, representado pela versão do dataset)
+        Inputs:
+            function = função em cache
+            args, kwargs = argumentos da chamada
+        Output: chave ('str')
+    '''
+    bound = inspect.signature(function).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = [(name, value) for name, value in bound.arguments.items() if not name.startswith('_')]
+    payload = pickle.dumps((function.__module__, function.__qualname__, arguments), protocol=4)
+    digest = hashlib.sha256(payload).hexdigest()
+    return f'{function.__qualname__}:{code_version(function.__code__.co_filename)}:{digest}'
+
+def disk_cache( name=None ):
+    '''
+        Decorador que guarda o resultado da função no cache em disco. Deve ficar abaixo do
+        st.cache_data/st.cache_resource, que continua sendo o cache em memória do processo:
+        o disco só é consultado quando o processo ainda não tem o resultado
+        Input: nome da etapa ('str', padrão = nome da função)
+        Output: função decorada
+    '''
+    def decorator( function ):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper( *args, **kwargs ):
+            if not disk_cache_enabled():
+                return function(*args, **kwargs)
+
+            cache = default_cache()
+            key = cache_key(function, args, kwargs)
+            with stage(f'disk_cache_read:{stage_name}'):
+                hit, value = cache.get(key)
+            if hit:
+                return value
+
+            value = function(*args, **kwargs)
+            with stage(f'disk_cache_write:{stage_name}'):
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+'''
+    Codificação das colunas de texto repetidas em ids inteiros estáveis
+
+    Cada domínio de texto (cidades, países, culinárias, localidades) tem um dicionário valor -> id
+    guardado junto com o dataset (SQLite). Os ids só crescem: um valor mantém o mesmo id entre
+    versões do dataset e entre os processos, e valores novos recebem o próximo id livre.
+    O dataset limpo ganha uma coluna '<coluna>_id' (int32, -1 = ausente) por coluna codificada, e as
+    tabelas de decodificação (id -> valor) vão junto no próprio dataframe (DataFrame.attrs, preservado
+    nos recortes e no cache em disco): os agrupamentos comparam inteiros e os rótulos só voltam a ser
+    texto nas tabelas exibidas.
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import functools
+import os
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+#variáveis de ambiente
+#   FOME_ZERO_DICTIONARY=<arquivo> -> dicionários dos ids (padrão 'dataset/dictionaries.sqlite')
+DICTIONARY_ENV = 'FOME_ZERO_DICTIONARY'
+DICTIONARY_PATH = 'dataset/dictionaries.sqlite'
+
+#colunas codificadas -> domínio do dicionário
+ENCODED_COLUMNS = {
+    'city': 'city',
+    'country_name': 'country',
+    'cuisines': 'cuisine',
+    'locality': 'locality'
+}
+
+#sufixo das colunas com os ids e chave das tabelas de decodificação no DataFrame.attrs
+ID_SUFFIX = '_id'
+LABELS_ATTR = 'labels'
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def id_column( column ):
+    '''
+        Função que retorna o nome da coluna com os ids de uma coluna codificada
+        Input: nome da coluna ('str')
+        Output: nome da coluna dos ids ('str')
+    '''
+    return f'{column}{ID_SUFFIX}'
+
+class StringDictionary:
+    '''
+        Classe que guarda os ids dos valores de cada domínio em um banco SQLite, compartilhado entre
+        os processos (workers) da mesma máquina. Os ids novos são atribuídos dentro de uma transação
+        de escrita (BEGIN IMMEDIATE): dois processos nunca dão ids diferentes ao mesmo valor.
+
+            Consultas:
+                encode = ids dos valores de um domínio (atribuindo ids aos valores novos)
+                labels = tabela id -> valor de um domínio
+
+        Input: path = caminho do arquivo do banco ('str')
+    '''
+    def __init__( self, path ):
+        self.path = path
+        self._ready = False
+
+    def _connect( self ):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS labels (domain TEXT NOT NULL, id INTEGER NOT NULL,'
+                               ' value TEXT NOT NULL, PRIMARY KEY (domain, id), UNIQUE (domain, value))')
+            self._ready = True
+        return connection
+
+    def _mapping( self, connection, domain ):
+        rows = connection.execute('SELECT value, id FROM labels WHERE domain = ?', (domain,)).fetchall()
+        return dict(rows)
+
+    def encode( self, domain, values ):
+        '''
+            Método que:
+                1. Busca os ids dos valores distintos (uma consulta por domínio, não por linha)
+                2. Atribui os próximos ids livres aos valores que ainda não estão no dicionário
+                3. Converte os valores em ids em um único passo vetorizado
+            Inputs:
+                domain = domínio do dicionário ('str')
+                values = Series com os valores (texto)
+            Output: array int32 com os ids (-1 = ausente)
+        '''
+        values = values.to_numpy(dtype=object)
+        uniques = pd.unique(values[pd.notna(values)])
+        with closing(self._connect()) as connection:
+            mapping = self._mapping(connection, domain)
+            missing = [value for value in uniques if value not in mapping]
+            if missing:
+                connection.execute('BEGIN IMMEDIATE')
+                #outro processo pode ter gravado os mesmos valores desde a leitura acima
+                mapping = self._mapping(connection, domain)
+                missing = [value for value in uniques if value not in mapping]
+                next_id = max(mapping.values(), default=-1) + 1
+                new_ids = {value: next_id + i for i, value in enumerate(missing)}
+                connection.executemany('INSERT INTO labels (domain, id, value) VALUES (?, ?, ?)',
+                                       [(domain, i, value) for value, i in new_ids.items()])
+                connection.execute('COMMIT')
+                mapping.update(new_ids)
+
+        index = pd.Index(list(mapping), dtype=object)
+        ids = np.asarray(list(mapping.values()), dtype=np.int32)
+        positions = index.get_indexer(values)
+        return np.where(positions >= 0, ids[positions], -1).astype(np.int32)
+
+    def labels( self, domain ):
+        '''
+            Método que retorna a tabela de decodificação de um domínio
+            Input: domínio do dicionário ('str')
+            Output: tuple com o valor de cada id (posição = id)
+        '''
+        with closing(self._connect()) as connection:
+            rows = connection.execute('SELECT id, value FROM labels WHERE domain = ? ORDER BY id', (domain,)).fetchall()
+        labels = [None] * (rows[-1][0] + 1 if rows else 0)
+        for i, value in rows:
+            labels[i] = value
+        return tuple(labels)
+
+@functools.lru_cache(maxsize=None)
+def default_dictionary():
+    '''
+        Função que retorna o dicionário do processo (caminho da variável de ambiente)
+        Output: StringDictionary
+    '''
+    return StringDictionary(os.environ.get(DICTIONARY_ENV, DICTIONARY_PATH))
+
+def _local_encoding( values ):
+    #ids válidos apenas para este dataset (valores em ordem alfabética), sem o banco
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), tuple(uniques)
+
+def encode_columns( df1, dictionary=None ):
+    '''
+        Função que:
+            1. Cria as colunas '<coluna>_id' (int32) das colunas de texto codificadas (ENCODED_COLUMNS)
+            2. Guarda as tabelas de decodificação no dataframe (DataFrame.attrs['labels'])
+        Com erro no banco, os ids passam a valer apenas para este dataset (as tabelas vão junto, e
+        a decodificação continua correta)
+        Inputs:
+            df1 = Dataframe limpo
+            dictionary = StringDictionary (padrão = default_dictionary())
+        Output: Dataframe com as colunas dos ids
+    '''
+    dictionary = dictionary or default_dictionary()
+    ids = {}
+    labels = {}
+    for column, domain in ENCODED_COLUMNS.items():
+        if column not in df1.columns:
+            continue
+        try:
+            ids[id_column(column)] = dictionary.encode(domain, df1[column])
+            labels[column] = dictionary.labels(domain)
+        except sqlite3.Error:
+            ids[id_column(column)], labels[column] = _local_encoding(df1[column])
+
+    df1 = df1.assign(**ids)
+    df1.attrs[LABELS_ATTR] = labels
+    return df1
+
+def encoded( df1, columns ):
+    '''
+        Função que retorna se todas as colunas têm ids e tabela de decodificação no dataframe
+        Inputs:
+            df1 = Dataframe
+            columns = colunas de texto
+        Output: bool
+    '''
+    labels = df1.attrs.get(LABELS_ATTR, {})
+    return all(column in labels and id_column(column) in df1.columns for column in columns)
+
+def column_ids( df1, column ):
+    '''
+        Função que retorna os ids e a tabela de decodificação de uma coluna de texto
+        (colunas sem ids no dataframe recebem ids locais, em ordem alfabética)
+        Inputs:
+            df1 = Dataframe
+            column = coluna de texto
+        Output: (array com os ids (-1 = ausente), array com o valor de cada id)
+    '''
+    if encoded(df1, [column]):
+        return df1[id_column(column)].to_numpy(), np.asarray(df1.attrs[LABELS_ATTR][column], dtype=object)
+    ids, labels = _local_encoding(df1[column])
+    return ids, np.asarray(labels, dtype=object)
+
+def decode( df1, column, ids ):
+    '''
+        Função que converte ids em valores (tabela de decodificação do dataframe de origem)
+        Inputs:
+            df1 = Dataframe de origem dos ids
+            column = coluna de texto codificada
+            ids = array com os ids (não negativos)
+        Output: array com os valores
+    '''
+    labels = np.asarray(df1.attrs[LABELS_ATTR][column], dtype=object)
+    return labels[np.asarray(ids, dtype=np.int64)]
+
+def decode_groups( df1, df2, columns ):
+    '''
+        Função que troca as colunas de ids de uma tabela agrupada pelos valores e ordena pelos valores
+        (ordenação estável: mesma ordem de um groupby sobre as colunas de texto)
+        Inputs:
+            df1 = Dataframe de origem dos ids
+            df2 = tabela agrupada com as colunas '<coluna>_id' (uma linha por grupo, ids não negativos)
+            columns = colunas de texto codificadas
+        Output: Dataframe com as colunas de texto no lugar dos ids
+    '''
+    values = {column: decode(df1, column, df2[id_column(column)].to_numpy()) for column in columns}
+    df3 = df2.drop(columns=[id_column(column) for column in columns])
+    df3 = pd.concat([pd.DataFrame(values, index=df3.index), df3], axis=1)
+    return df3.sort_values(list(columns), kind='stable').reset_index(drop=True)
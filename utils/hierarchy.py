@@ -0,0 +1,189 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+import pandas as pd
+
+from utils.encoding import column_ids
+from utils.kernels import group_aggregate, group_count, group_index
+
+#níveis da árvore geográfica, da raiz às folhas
+LEVELS = ['country_name', 'city', 'locality']
+
+#medidas de cada nó: nome -> (agregação, coluna)
+NODE_MEASURES = {
+    'restaurants': ('count', 'restaurant_id'),
+    'aggregate_rating': ('mean', 'aggregate_rating'),
+    'votes': ('sum', 'votes'),
+    'average_cost_for_two_USD': ('mean', 'average_cost_for_two_USD')
+}
+
+#coluna da distribuição guardada em cada nó
+DISTRIBUTION_COLUMN = 'cuisines'
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def _label_ranks( labels ):
+    #posição de cada rótulo na ordem alfabética (desempate da ordem dos filhos)
+    ranks = np.empty(len(labels), dtype=np.int64)
+    ranks[np.argsort(labels.astype(str), kind='stable')] = np.arange(len(labels))
+    return ranks
+
+class AggregateTree:
+    '''
+        Classe que guarda os agregados de uma hierarquia geográfica (país -> cidade -> localidade),
+        calculados uma única vez sobre o dataframe com os kernels NumPy (utils.kernels).
+
+        Os nós ficam em arrays, nível a nível (nó 0 = raiz), e os filhos de cada nó são um trecho
+        contíguo do nível seguinte, já ordenados (mais restaurantes primeiro): abrir um nó lê apenas
+        os seus filhos, sem agrupar novamente as linhas do dataset. A distribuição das culinárias
+        de cada nó é guardada da mesma forma (trecho contíguo de pares culinária x quantidade).
+
+            Consultas:
+                children = filhos de um nó com as medidas e as principais culinárias
+                cuisines = distribuição das culinárias de um nó
+                path = rótulos do caminho da raiz até um nó
+
+        Inputs:
+            df1 = Dataframe limpo (colunas de LEVELS, DISTRIBUTION_COLUMN e das medidas)
+            levels = colunas dos níveis, da raiz às folhas
+    '''
+    root = 0
+
+    def __init__( self, df1, levels=LEVELS ):
+        self.levels = list(levels)
+        level_ids = [column_ids(df1, column) for column in self.levels]
+        cuisine_ids, self.cuisine_labels = column_ids(df1, DISTRIBUTION_COLUMN)
+        cuisine_ranks = _label_ranks(self.cuisine_labels)
+        values = {name: df1[column].to_numpy() for name, (aggregation, column) in NODE_MEASURES.items()}
+
+        depth, parent, labels = [], [], []
+        measures = {name: [] for name in NODE_MEASURES}
+        first_child, n_children = [], []
+        cuisine_nodes, cuisine_codes, cuisine_counts = [], [], []
+
+        #raiz: todas as linhas em um único grupo
+        row_nodes = np.zeros(len(df1), dtype=np.int64)
+        n_level = 1
+        offset = 0
+        level_parent = np.full(1, -1, dtype=np.int64)
+        level_labels = np.array([''], dtype=object)
+        for level in range(len(self.levels) + 1):
+            #medidas dos nós do nível (ordem final), com os kernels sobre os ids dos nós de cada linha
+            depth.append(np.full(n_level, level, dtype=np.int64))
+            parent.append(level_parent)
+            labels.append(level_labels)
+            for name, (aggregation, column) in NODE_MEASURES.items():
+                measures[name].append(group_aggregate(row_nodes, n_level, aggregation, values[name]))
+
+            #distribuição das culinárias: pares nó x culinária, mais frequentes primeiro em cada nó
+            pair_ids, (pair_nodes, pair_codes) = group_index([row_nodes, cuisine_ids])
+            pair_counts = group_count(pair_ids, len(pair_nodes))
+            order = np.lexsort((cuisine_ranks[pair_codes], -pair_counts, pair_nodes))
+            cuisine_nodes.append(pair_nodes[order] + offset)
+            cuisine_codes.append(pair_codes[order])
+            cuisine_counts.append(pair_counts[order])
+
+            if level == len(self.levels):
+                first_child.append(np.zeros(n_level, dtype=np.int64))
+                n_children.append(np.zeros(n_level, dtype=np.int64))
+                break
+
+            #nós do nível seguinte: um por combinação dos ids até o nível (grupos em ordem dos ids)
+            group_ids, group_keys = group_index([ids for ids, _ in level_ids[:level + 1]])
+            n_next = len(group_keys[0])
+            valid = group_ids >= 0
+            next_parent = np.zeros(n_next, dtype=np.int64)
+            next_parent[group_ids[valid]] = row_nodes[valid]
+            next_labels = level_ids[level][1][group_keys[-1]]
+
+            #ordem dos filhos: por pai (trechos contíguos), mais restaurantes primeiro, depois alfabética
+            next_restaurants = group_count(group_ids, n_next)
+            order = np.lexsort((_label_ranks(next_labels), -next_restaurants, next_parent))
+            position = np.empty(n_next, dtype=np.int64)
+            position[order] = np.arange(n_next)
+
+            counts = np.bincount(next_parent, minlength=n_level)
+            n_children.append(counts)
+            first_child.append(offset + n_level + np.cumsum(counts) - counts)
+
+            #linhas sem valor no nível (id -1) ficam apenas nos nós acima
+            row_nodes = np.full(len(group_ids), -1, dtype=np.int64)
+            row_nodes[valid] = position[group_ids[valid]]
+            level_parent = next_parent[order] + offset
+            level_labels = next_labels[order]
+            offset += n_level
+            n_level = n_next
+
+        self.depth = np.concatenate(depth)
+        self.parent = np.concatenate(parent)
+        self.labels = np.concatenate(labels)
+        self.measures = {name: np.concatenate(arrays) for name, arrays in measures.items()}
+        self.first_child = np.concatenate(first_child)
+        self.n_children = np.concatenate(n_children)
+
+        cuisine_nodes = np.concatenate(cuisine_nodes)
+        self.cuisine_codes = np.concatenate(cuisine_codes)
+        self.cuisine_counts = np.concatenate(cuisine_counts)
+        #trecho da distribuição de cada nó: [cuisine_start[nó], cuisine_start[nó + 1])
+        self.cuisine_start = np.concatenate([[0], np.cumsum(np.bincount(cuisine_nodes, minlength=len(self.depth)))])
+
+    def __len__( self ):
+        return len(self.depth)
+
+    def level_name( self, node ):
+        '''
+            Método que retorna a coluna do nível dos filhos de um nó
+            Input: nó ('int')
+            Output: coluna ('str') ou None (folha)
+        '''
+        level = int(self.depth[node])
+        return self.levels[level] if level < len(self.levels) else None
+
+    def path( self, node ):
+        '''
+            Método que retorna os rótulos do caminho da raiz até um nó
+            Input: nó ('int')
+            Output: lista de rótulos (vazia na raiz)
+        '''
+        labels = []
+        while node > self.root:
+            labels.append(self.labels[node])
+            node = int(self.parent[node])
+        return labels[::-1]
+
+    def _top_cuisines( self, node, top ):
+        start = self.cuisine_start[node]
+        return ', '.join(self.cuisine_labels[self.cuisine_codes[start:min(start + top, self.cuisine_start[node + 1])]])
+
+    def children( self, node, top_cuisines=3 ):
+        '''
+            Método que retorna os filhos de um nó (leitura de um trecho contíguo dos arrays, O(filhos))
+            Inputs:
+                node = nó ('int', root = raiz)
+                top_cuisines = quantidade de culinárias mais frequentes listadas por filho
+            Output: Dataframe com uma linha por filho: 'node', 'label', medidas, 'children' e 'top_cuisines'
+        '''
+        start = int(self.first_child[node])
+        nodes = np.arange(start, start + int(self.n_children[node]))
+        df2 = pd.DataFrame({'node': nodes, 'label': self.labels[nodes]})
+        for name, values in self.measures.items():
+            df2[name] = values[nodes]
+        df2['children'] = self.n_children[nodes]
+        df2['top_cuisines'] = [self._top_cuisines(child, top_cuisines) for child in nodes]
+        return df2
+
+    def cuisines( self, node, top=None ):
+        '''
+            Método que retorna a distribuição das culinárias de um nó (mais frequentes primeiro)
+            Inputs:
+                node = nó ('int')
+                top = quantidade de culinárias (None = todas)
+            Output: Dataframe com as colunas 'cuisines' e 'restaurants'
+        '''
+        start, end = int(self.cuisine_start[node]), int(self.cuisine_start[node + 1])
+        if top is not None:
+            end = min(end, start + top)
+        return pd.DataFrame({'cuisines': self.cuisine_labels[self.cuisine_codes[start:end]],
+                             'restaurants': self.cuisine_counts[start:end]})
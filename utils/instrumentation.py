@@ -0,0 +1,242 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+#variáveis de ambiente
+#   FOME_ZERO_DEBUG=1 -> exibe o painel de tempos na sidebar
+#   FOME_ZERO_TRACEMALLOC=1 -> mede a memória alocada por etapa (tracemalloc ligado uma vez por processo, nunca desligado)
+#   FOME_ZERO_METRICS_DIR=<pasta> -> exporta as etapas em JSON lines e no formato texto do Prometheus
+DEBUG_ENV = 'FOME_ZERO_DEBUG'
+TRACEMALLOC_ENV = 'FOME_ZERO_TRACEMALLOC'
+METRICS_DIR_ENV = 'FOME_ZERO_METRICS_DIR'
+DEBUG_KEY = 'debug_panel'
+
+#cada sessão do Streamlit executa em sua própria thread
+_local = threading.local()
+_export_lock = threading.Lock()
+_latest = {}
+
+#etapas abertas por thread e contador de aberturas/fechamentos de etapas (todas as threads): a memória
+#do tracemalloc é do processo, então a variação só é atribuída à etapa quando nenhuma outra thread tinha etapa aberta
+_memory_lock = threading.Lock()
+_open_stages = {}
+_stage_events = 0
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def debug_enabled():
+    '''
+        Função que retorna se o modo debug está ativo (variável de ambiente ou checkbox da sidebar)
+        Output: bool
+    '''
+    if os.environ.get(DEBUG_ENV, '') not in ('', '0'):
+        return True
+    try:
+        return bool(st.session_state.get(DEBUG_KEY, False))
+    except Exception:
+        return False
+
+def memory_tracking():
+    '''
+        Função que liga o tracemalloc uma única vez por processo (variável de ambiente ou PYTHONTRACEMALLOC);
+        o estado não depende das sessões e nunca é desligado
+        Output: bool (memória medida)
+    '''
+    if not tracemalloc.is_tracing() and os.environ.get(TRACEMALLOC_ENV, '') not in ('', '0'):
+        tracemalloc.start()
+    return tracemalloc.is_tracing()
+
+def start_run( page ):
+    '''
+        Função que inicia o registro das etapas de uma execução (rerun) da página
+        Input: nome da página ('str')
+        Output: None
+    '''
+    _local.run = {'page': page,
+                  'run_id': uuid.uuid4().hex[:12],
+                  'timestamp': time.time(),
+                  'track_memory': memory_tracking(),
+                  'stages': []}
+    return None
+
+def current_run():
+    '''
+        Função que retorna o registro da execução atual (ou None fora de uma página)
+        Output: dict
+    '''
+    return getattr(_local, 'run', None)
+
+def _open_stage( thread ):
+    #abre uma etapa da thread e retorna (outra thread com etapa aberta, contador de eventos)
+    global _stage_events
+    with _memory_lock:
+        shared = any(count for other, count in _open_stages.items() if other != thread)
+        _open_stages[thread] = _open_stages.get(thread, 0) + 1
+        _stage_events += 1
+        return shared, _stage_events
+
+def _close_stage( thread ):
+    #fecha uma etapa da thread e retorna o contador de eventos
+    global _stage_events
+    with _memory_lock:
+        _open_stages[thread] -= 1
+        if not _open_stages[thread]:
+            del _open_stages[thread]
+        _stage_events += 1
+        return _stage_events
+
+def _rows( value ):
+    if isinstance(value, (pd.DataFrame, pd.Series)) or hasattr(value, 'shape'):
+        return int(len(value))
+    return None
+
+@contextmanager
+def stage( name, rows_in=None ):
+    '''
+        Função que mede uma etapa da página: tempo de relógio, tempo de CPU, linhas de entrada/saída
+        e variação da memória alocada (apenas com FOME_ZERO_TRACEMALLOC; None quando outra sessão
+        executava etapas ao mesmo tempo, pois a memória do tracemalloc é do processo inteiro)
+        Inputs:
+            name = nome da etapa ('str')
+            rows_in = linhas de entrada ('int', opcional)
+        Output: dict onde a etapa pode informar 'rows_out'
+    '''
+    info = {'rows_out': None}
+    run = current_run()
+    if run is None:
+        yield info
+        return
+
+    track_memory = run['track_memory'] and tracemalloc.is_tracing()
+    if track_memory:
+        thread = threading.get_ident()
+        shared, events_before = _open_stage(thread)
+        stages_before = len(run['stages'])
+        memory_before = tracemalloc.get_traced_memory()[0]
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield info
+    finally:
+        record = {'stage': name,
+                  'wall_s': time.perf_counter() - wall_start,
+                  'cpu_s': time.thread_time() - cpu_start,
+                  'rows_in': rows_in,
+                  'rows_out': info['rows_out'],
+                  'alloc_bytes': None}
+        if track_memory:
+            memory_after = tracemalloc.get_traced_memory()[0]
+            events_after = _close_stage(thread)
+            #sem outra thread com etapa aberta no início, os únicos eventos durante a etapa são os das etapas
+            #aninhadas desta thread (abertura e fechamento) e o próprio fechamento
+            nested = len(run['stages']) - stages_before
+            if not shared and events_after - events_before == 2 * nested + 1:
+                record['alloc_bytes'] = memory_after - memory_before
+        run['stages'].append(record)
+
+def timed( name=None ):
+    '''
+        Decorador que mede a função como uma etapa (linhas de entrada = tamanho do primeiro argumento)
+        Input: nome da etapa ('str', padrão = nome da função)
+        Output: função decorada
+    '''
+    def decorator( function ):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper( *args, **kwargs ):
+            rows_in = _rows(args[0]) if args else None
+            with stage(stage_name, rows_in) as info:
+                result = function(*args, **kwargs)
+                info['rows_out'] = _rows(result)
+            return result
+        return wrapper
+    return decorator
+
+def _prometheus_text():
+    lines = []
+    metrics = [('wall_s', 'fome_zero_stage_wall_seconds', 'Tempo de relógio da etapa na última execução'),
+               ('cpu_s', 'fome_zero_stage_cpu_seconds', 'Tempo de CPU da etapa na última execução'),
+               ('rows_out', 'fome_zero_stage_rows_out', 'Linhas de saída da etapa na última execução'),
+               ('alloc_bytes', 'fome_zero_stage_alloc_bytes', 'Variação da memória alocada pela etapa')]
+    for field, metric, description in metrics:
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} gauge')
+        for (page, stage_name), record in sorted(_latest.items()):
+            if record[field] is not None:
+                lines.append(f'{metric}{{page="{page}",stage="{stage_name}"}} {record[field]}')
+    return '\n'.join(lines) + '\n'
+
+def export_run( run, metrics_dir ):
+    '''
+        Função que:
+            1. Acrescenta as etapas da execução em '<metrics_dir>/stages.jsonl'
+            2. Reescreve '<metrics_dir>/stages.prom' com a última medida de cada página/etapa
+        Inputs:
+            run = registro da execução
+            metrics_dir = pasta de destino
+        Output: None
+    '''
+    os.makedirs(metrics_dir, exist_ok=True)
+    with _export_lock:
+        with open(os.path.join(metrics_dir, 'stages.jsonl'), 'a', encoding='utf-8') as file:
+            for record in run['stages']:
+                line = {'page': run['page'], 'run_id': run['run_id'], 'timestamp': run['timestamp'], **record}
+                file.write(json.dumps(line, ensure_ascii=False) + '\n')
+                _latest[(run['page'], record['stage'])] = record
+
+        prom_path = os.path.join(metrics_dir, 'stages.prom')
+        with open(prom_path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write(_prometheus_text())
+        os.replace(prom_path + '.tmp', prom_path)
+    return None
+
+def stages_dataframe( run=None ):
+    '''
+        Função que retorna as etapas da execução em um dataframe
+        Input: registro da execução (padrão = execução atual)
+        Output: Dataframe
+    '''
+    run = run or current_run()
+    df2 = pd.DataFrame(run['stages'] if run else [],
+                       columns=['stage', 'wall_s', 'cpu_s', 'rows_in', 'rows_out', 'alloc_bytes'])
+    df2['wall_ms'] = (df2['wall_s'] * 1000).round(2)
+    df2['cpu_ms'] = (df2['cpu_s'] * 1000).round(2)
+    df2['alloc_kb'] = (df2['alloc_bytes'].astype(float) / 1024).round(1)
+    return df2[['stage', 'wall_ms', 'cpu_ms', 'rows_in', 'rows_out', 'alloc_kb']]
+
+def finish_run():
+    '''
+        Função que:
+            1. Exibe o painel de tempos por etapa na sidebar (checkbox 'Modo debug')
+            2. Exporta as etapas se FOME_ZERO_METRICS_DIR estiver definida
+        Output: None
+    '''
+    run = current_run()
+    if run is None:
+        return None
+
+    with st.sidebar:
+        st.checkbox('Modo debug (tempos por etapa)', key=DEBUG_KEY)
+        if debug_enabled():
+            df2 = stages_dataframe(run)
+            st.markdown(f"**Execução {run['run_id']}** - total: {df2['wall_ms'].sum():.0f} ms")
+            st.dataframe(df2, hide_index=True)
+
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir:
+        export_run(run, metrics_dir)
+    _local.run = None
+    return None
@@ -0,0 +1,270 @@
+'''
+    Kernels NumPy das agregações por grupo
+
+    As agregações das páginas (quantidade, soma, média, máximo, mínimo e valores distintos) são
+    calculadas diretamente sobre arrays: cada linha tem o id do seu grupo (inteiro pequeno, -1 = linha
+    ignorada), e cada agregação é um np.bincount, um np.maximum.at/np.minimum.at ou pares únicos
+    ordenados, sem o custo fixo do groupby do pandas (índices, blocos e alinhamento).
+    Os grupos vêm das colunas de ids inteiros (utils.encoding) em group_index.
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+#variáveis de ambiente
+#   FOME_ZERO_KERNELS=0 -> agregações pelo groupby do pandas (padrão = kernels NumPy)
+#   FOME_ZERO_KERNELS=check -> calcula pelos dois caminhos, registra as diferenças e usa o resultado do pandas
+KERNELS_ENV = 'FOME_ZERO_KERNELS'
+KERNEL_MODES = ('0', '1', 'check')
+
+#agregações com kernel
+KERNEL_AGGREGATIONS = ('size', 'count', 'sum', 'mean', 'max', 'min')
+
+#maior quantidade de combinações de ids agrupada por uma tabela densa (acima disso, np.unique)
+DENSE_LIMIT = 1 << 22
+
+logger = logging.getLogger(__name__)
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def kernel_mode():
+    '''
+        Função que retorna o modo das agregações (variável de ambiente)
+        Output: '1' (kernels), '0' (pandas) ou 'check' (os dois, com comparação)
+    '''
+    mode = os.environ.get(KERNELS_ENV, '1') or '1'
+    if mode not in KERNEL_MODES:
+        raise ValueError(f'{KERNELS_ENV} deve ser um de {KERNEL_MODES}: {mode}')
+    return mode
+
+def group_index( keys ):
+    '''
+        Função que atribui um id de grupo a cada linha a partir de uma ou mais colunas de ids inteiros
+        (grupos em ordem crescente dos ids, como no groupby). Poucas combinações possíveis
+        (ex.: cidade x país) usam uma tabela densa com np.bincount, em tempo linear; as demais, np.unique
+        Input: lista de arrays de ids (não negativos; negativo = linha ignorada)
+        Output: (ids dos grupos por linha (-1 = ignorada), lista com os ids de cada coluna por grupo)
+    '''
+    keys = [np.asarray(key) for key in keys]
+    valid = np.logical_and.reduce([key >= 0 for key in keys])
+    all_valid = bool(valid.all())
+    sizes = [int(key.max()) + 1 if len(key) else 1 for key in keys]
+
+    #chave combinada (mesma ordem das colunas); linhas ignoradas entram como 0 e são descartadas depois
+    combined = keys[0].astype(np.int64) if all_valid else np.where(valid, keys[0], 0).astype(np.int64)
+    for key, size in zip(keys[1:], sizes[1:]):
+        combined *= size
+        combined += key if all_valid else np.where(valid, key, 0)
+
+    total = int(np.prod(sizes, dtype=np.float64))
+    if total <= DENSE_LIMIT:
+        present = np.flatnonzero(np.bincount(combined if all_valid else combined[valid], minlength=total))
+        if len(present) == total:
+            #todas as combinações presentes: o id do grupo é a própria chave combinada
+            group_ids = combined
+        else:
+            lookup = np.full(total, -1, dtype=np.int64)
+            lookup[present] = np.arange(len(present))
+            group_ids = lookup[combined]
+        if not all_valid:
+            group_ids[~valid] = -1
+    else:
+        present, inverse = np.unique(combined[valid], return_inverse=True)
+        group_ids = np.full(len(valid), -1, dtype=np.int64)
+        group_ids[valid] = inverse
+
+    #ids de cada coluna por grupo (decomposição da chave combinada)
+    group_keys = []
+    for size in reversed(sizes):
+        present, key = np.divmod(present, size)
+        group_keys.insert(0, key)
+    return group_ids, group_keys
+
+def _valid_groups( group_ids, *arrays ):
+    #linhas de grupos ignorados (-1) são removidas (cópia apenas quando existem)
+    valid = group_ids >= 0
+    if valid.all():
+        return (group_ids,) + arrays
+    return (group_ids[valid],) + tuple(array[valid] for array in arrays)
+
+def _present( values ):
+    #máscara dos valores não ausentes (None quando não há ausentes: nenhuma máscara é aplicada)
+    if values.dtype.kind not in 'fcmMO':
+        return None
+    present = pd.notna(values)
+    return None if present.all() else present
+
+def _float_sums( rows, values, n_groups ):
+    #soma de float64 em duas partes: a parte alta (valores arredondados em uma grade de 2^26 passos até o
+    #maior valor) é somada sem erro pelo np.bincount (até 2^27 linhas por grupo), e só a parte baixa
+    #(resíduos 2^27 vezes menores) acumula arredondamento: o resultado equivale à soma compensada do pandas
+    largest = max(values.max(), -values.min()) if len(values) else 0.0
+    if not np.isfinite(largest) or largest == 0:
+        return np.bincount(rows, weights=values, minlength=n_groups)
+    scale = np.exp2(26 - np.ceil(np.log2(largest)))
+    parts = values * scale
+    np.rint(parts, out=parts)
+    parts /= scale
+    sums = np.bincount(rows, weights=parts, minlength=n_groups)
+    #o mesmo buffer recebe a parte baixa (sem alocar outro array do tamanho do dataset)
+    np.subtract(values, parts, out=parts)
+    sums += np.bincount(rows, weights=parts, minlength=n_groups)
+    return sums
+
+def _sums_and_counts( group_ids, n_groups, values ):
+    #somas (ausentes = 0, sem compactar os arrays) e quantidades de valores não ausentes por grupo
+    rows, values = _valid_groups(group_ids, values)
+    present = _present(values)
+    if present is None:
+        counts = np.bincount(rows, minlength=n_groups)
+    else:
+        counts = np.bincount(rows, weights=present, minlength=n_groups).astype(np.int64)
+        values = np.where(present, values, 0)
+    if values.dtype.kind in 'biu':
+        return np.rint(np.bincount(rows, weights=values, minlength=n_groups)).astype(np.int64), counts
+    return _float_sums(rows, values.astype(np.float64, copy=False), n_groups), counts
+
+def group_count( group_ids, n_groups, values=None ):
+    '''
+        Função que conta as linhas de cada grupo (com values, apenas os valores não ausentes, como no 'count')
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = array com os valores (opcional)
+        Output: array int64 com as quantidades
+    '''
+    if values is None:
+        rows, = _valid_groups(group_ids)
+        return np.bincount(rows, minlength=n_groups).astype(np.int64)
+    rows, values = _valid_groups(group_ids, values)
+    present = _present(values)
+    if present is None:
+        return np.bincount(rows, minlength=n_groups).astype(np.int64)
+    return np.bincount(rows, weights=present, minlength=n_groups).astype(np.int64)
+
+def group_sum( group_ids, n_groups, values ):
+    '''
+        Função que soma os valores de cada grupo (ausentes ignorados; grupo sem valores = 0).
+        Valores inteiros são somados em float64 (exato até 2^53) e devolvidos como int64
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = array numérico com os valores
+        Output: array com as somas
+    '''
+    return _sums_and_counts(group_ids, n_groups, values)[0]
+
+def group_mean( group_ids, n_groups, values ):
+    '''
+        Função que calcula a média dos valores de cada grupo (ausentes ignorados; grupo sem valores = NaN)
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = array numérico com os valores
+        Output: array float64 com as médias
+    '''
+    sums, counts = _sums_and_counts(group_ids, n_groups, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def _group_extreme( group_ids, n_groups, values, ufunc, float_ufunc ):
+    rows, values = _valid_groups(group_ids, values)
+    if values.dtype.kind == 'f':
+        #fmax/fmin ignoram os ausentes: grupo sem valores continua NaN, como no pandas
+        out = np.full(n_groups, np.nan, dtype=values.dtype)
+        float_ufunc.at(out, rows, values)
+        return out
+    #valor inicial de cada grupo = um dos seus próprios valores (sem sentinela que dependa do tipo)
+    out = np.zeros(n_groups, dtype=values.dtype)
+    out[rows] = values
+    ufunc.at(out, rows, values)
+    counts = np.bincount(rows, minlength=n_groups)
+    if (counts > 0).all():
+        return out
+    return np.where(counts > 0, out, np.nan)
+
+def group_max( group_ids, n_groups, values ):
+    '''
+        Função que calcula o máximo dos valores de cada grupo (np.maximum.at/np.fmax.at; grupo sem valores = NaN)
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = array numérico com os valores
+        Output: array com os máximos
+    '''
+    return _group_extreme(group_ids, n_groups, values, np.maximum, np.fmax)
+
+def group_min( group_ids, n_groups, values ):
+    '''
+        Função que calcula o mínimo dos valores de cada grupo (np.minimum.at/np.fmin.at; grupo sem valores = NaN)
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = array numérico com os valores
+        Output: array com os mínimos
+    '''
+    return _group_extreme(group_ids, n_groups, values, np.minimum, np.fmin)
+
+def group_nunique( group_ids, n_groups, codes ):
+    '''
+        Função que conta os valores distintos de cada grupo sobre códigos inteiros: pares grupo x código
+        marcados em uma tabela densa (np.bincount) quando ela é pequena, ou pares únicos ordenados (np.unique),
+        sem uma tabela hash de strings por grupo como no nunique
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            codes = array com o código do valor de cada linha (negativo = ausente)
+        Output: array com a quantidade de valores distintos por grupo
+    '''
+    valid = (group_ids >= 0) & (codes >= 0)
+    n_values = int(codes.max()) + 1 if valid.any() else 1
+    if not valid.all():
+        group_ids, codes = group_ids[valid], codes[valid]
+    pairs = group_ids.astype(np.int64) * n_values + codes
+    if n_groups * n_values <= DENSE_LIMIT:
+        seen = np.bincount(pairs, minlength=n_groups * n_values).reshape(n_groups, n_values)
+        return np.count_nonzero(seen, axis=1)
+    return np.bincount(np.unique(pairs) // n_values, minlength=n_groups)
+
+#kernel de cada agregação
+KERNELS = {
+    'count': group_count,
+    'sum': group_sum,
+    'mean': group_mean,
+    'max': group_max,
+    'min': group_min
+}
+
+def group_aggregate( group_ids, n_groups, aggregation, values=None ):
+    '''
+        Função que calcula uma agregação por grupo pelo kernel correspondente
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            aggregation = agregação (KERNEL_AGGREGATIONS)
+            values = array com os valores ('size' não usa valores)
+        Output: array com uma posição por grupo
+    '''
+    if aggregation == 'size':
+        return group_count(group_ids, n_groups)
+    return KERNELS[aggregation](group_ids, n_groups, values)
+
+def compare_results( kernel_result, pandas_result, name ):
+    '''
+        Função que compara o resultado dos kernels com o do pandas (modo 'check')
+        Inputs:
+            kernel_result, pandas_result = Dataframes
+            name = nome da agregação nas mensagens
+        Output: None (as diferenças são registradas no log)
+    '''
+    try:
+        pd.testing.assert_frame_equal(kernel_result, pandas_result, check_exact=False, rtol=1e-9)
+    except AssertionError as error:
+        logger.warning('kernels: resultado diferente do pandas em %s: %s', name, error)
+    return None
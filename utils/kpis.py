@@ -0,0 +1,90 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+import pandas as pd
+
+from utils.sketches import grouped_registers, hll_estimate, precision_for_error
+
+#métricas da Visão Geral: nome -> coluna contada (valores distintos)
+DISTINCT_METRICS = {
+    'restaurants': 'restaurant_id',
+    'countries': 'country_code',
+    'cities': 'city',
+    'cuisines': 'cuisines'
+}
+
+#métricas da Visão Geral: nome -> coluna somada
+SUM_METRICS = {
+    'votes': 'votes'
+}
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+class KpiSnapshot:
+    '''
+        Classe que guarda as métricas da Visão Geral por país, calculadas uma única vez
+        por versão do dataset.
+
+        Valores distintos (restaurantes, países, cidades, culinárias) são guardados como uma matriz
+        booleana país x código do valor: a seleção de vários países é a união (OR) das linhas
+        selecionadas, sem percorrer as linhas do dataset. Somas (avaliações) são somadas por país.
+        No modo aproximado, cada país guarda um sketch HyperLogLog (a união é o máximo dos registradores),
+        com tamanho fixo independente da quantidade de valores distintos.
+
+            Consultas:
+                metrics = métricas do dataset completo ou de uma seleção de países
+
+        Inputs:
+            df1 = Dataframe limpo (colunas 'country_name' e as colunas das métricas)
+            error = erro relativo do modo aproximado ('float', None = contagem exata)
+    '''
+    def __init__( self, df1, error=None ):
+        country_codes, countries = pd.factorize(df1['country_name'])
+        self.countries = {country: i for i, country in enumerate(countries)}
+        n_countries = len(countries)
+        self.error = error
+
+        self._members = {}
+        self._sketches = {}
+        for metric, column in DISTINCT_METRICS.items():
+            if error is not None:
+                self._sketches[metric] = grouped_registers(country_codes, n_countries, df1[column], precision_for_error(error))
+                continue
+            codes, uniques = pd.factorize(df1[column])
+            #valores ausentes (código -1) não contam, como no nunique
+            valid = (codes >= 0) & (country_codes >= 0)
+            members = np.zeros((n_countries, len(uniques)), dtype=bool)
+            members[country_codes[valid], codes[valid]] = True
+            self._members[metric] = members
+
+        self._sums = {}
+        for metric, column in SUM_METRICS.items():
+            values = df1[column].to_numpy()
+            valid = country_codes >= 0
+            self._sums[metric] = np.bincount(country_codes[valid], weights=values[valid], minlength=n_countries)
+
+        #métricas do dataset completo (sem filtro de países)
+        if error is not None:
+            self._totals = {metric: int(round(hll_estimate(registers.max(axis=0))[0])) for metric, registers in self._sketches.items()}
+        else:
+            self._totals = {metric: int(df1[column].nunique()) for metric, column in DISTINCT_METRICS.items()}
+        self._totals.update({metric: int(df1[column].sum()) for metric, column in SUM_METRICS.items()})
+
+    def metrics( self, countries=None ):
+        '''
+            Método que retorna as métricas de uma seleção de países
+            Input: lista de países (None ou vazia = dataset completo, como no filtro de países)
+            Output: dict métrica -> valor ('int')
+        '''
+        if not countries:
+            return dict(self._totals)
+
+        rows = [self.countries[country] for country in countries if country in self.countries]
+        result = {metric: int(members[rows].any(axis=0).sum()) for metric, members in self._members.items()}
+        for metric, registers in self._sketches.items():
+            merged = registers[rows].max(axis=0) if rows else np.zeros(registers.shape[1], dtype=np.uint8)
+            result[metric] = int(round(hll_estimate(merged)[0]))
+        result.update({metric: int(round(sums[rows].sum())) for metric, sums in self._sums.items()})
+        return result
@@ -0,0 +1,36 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import importlib
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+class LazyModule:
+    '''
+        Classe que adia a importação de um módulo até o primeiro acesso a um de seus atributos.
+        Bibliotecas pesadas (folium, plotly, PIL) só são carregadas quando a página realmente
+        as usa, e o restante da página é exibido antes.
+
+        Exemplo:
+            go = LazyModule('plotly.graph_objects')
+            fig = go.Figure()   # o plotly é importado aqui
+
+        Input: nome do módulo ('str')
+    '''
+    def __init__( self, name ):
+        self._name = name
+        self._module = None
+
+    def _load( self ):
+        #o importlib já trata importações simultâneas do mesmo módulo (uma sessão por thread)
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__( self, attr ):
+        return getattr(self._load(), attr)
+
+    def __repr__( self ):
+        state = 'carregado' if self._module is not None else 'não carregado'
+        return f'<LazyModule {self._name} ({state})>'
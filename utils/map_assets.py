@@ -0,0 +1,44 @@
+#callback JS do FastMarkerCluster: cada linha é [latitude, longitude, popup_html, color_name]
+#os ícones são criados uma única vez por cor e compartilhados entre os marcadores
+MARKER_CALLBACK = """
+    (function () {
+        var icons = {};
+        return function (row) {
+            var icon = icons[row[3]];
+            if (icon === undefined) {
+                icon = L.AwesomeMarkers.icon({icon: 'utensils', prefix: 'fa', markerColor: row[3], iconColor: 'white'});
+                icons[row[3]] = icon;
+            }
+            var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+            marker.bindPopup(row[2], {maxWidth: 300});
+            return marker;
+        };
+    })()
+"""
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def popup_html( df1 ):
+    '''
+        Função que:
+            1. Gera o HTML do popup de todos os restaurantes em uma única operação vetorizada
+        Input: Dataframe limpo
+        Output: Series com o HTML do popup de cada restaurante
+    '''
+    cost = df1['average_cost_for_two_USD'].astype(float).round(2).astype(str)
+    rating = df1['aggregate_rating'].astype(str)
+    html = ('<b>' + df1['restaurant_name'].astype(str) + '</b><br><br>Valor médio para dois: $' + cost
+            + ' Dólares<br>Culinária: ' + df1['cuisines'].astype(str) + '<br>Nota média: ' + rating + '/5.0')
+    return html.rename('popup_html')
+
+def marker_rows( df1, positions ):
+    '''
+        Função que:
+            1. Monta as linhas [latitude, longitude, popup_html, color_name] usadas pelo MARKER_CALLBACK
+        Inputs:
+            df1 = dataframe com a coluna 'popup_html'
+            positions = posições dos restaurantes a exibir
+        Output: lista de linhas
+    '''
+    return df1.loc[positions, ['latitude', 'longitude', 'popup_html', 'color_name']].values.tolist()
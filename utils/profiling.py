@@ -0,0 +1,150 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import cProfile
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+import streamlit as st
+
+#variáveis de ambiente
+#   FOME_ZERO_PROFILE=1 -> perfila todas as execuções das páginas (também ativado com ?profile=1 na URL)
+#   FOME_ZERO_PROFILE_DIR=<pasta> -> pasta onde os perfis são salvos (padrão 'profiles')
+#   FOME_ZERO_PROFILE_INTERVAL=<segundos> -> intervalo de amostragem das pilhas (padrão 0.001)
+PROFILE_ENV = 'FOME_ZERO_PROFILE'
+PROFILE_DIR_ENV = 'FOME_ZERO_PROFILE_DIR'
+PROFILE_INTERVAL_ENV = 'FOME_ZERO_PROFILE_INTERVAL'
+PROFILE_QUERY_PARAM = 'profile'
+
+_local = threading.local()
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def profile_enabled():
+    '''
+        Função que retorna se o modo de perfil está ativo (variável de ambiente ou ?profile=1 na URL)
+        Output: bool
+    '''
+    if os.environ.get(PROFILE_ENV, '') not in ('', '0'):
+        return True
+    try:
+        values = st.experimental_get_query_params().get(PROFILE_QUERY_PARAM, [])
+    except Exception:
+        return False
+    return any(value not in ('', '0', 'false') for value in values)
+
+def slugify( text ):
+    '''
+        Função que converte um texto em um nome de pasta (sem acentos, minúsculo, com '_')
+        Input: texto ('str')
+        Output: texto ('str')
+    '''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^0-9a-z]+', '_', text.lower()).strip('_')
+
+class StackSampler( threading.Thread ):
+    '''
+        Classe que amostra periodicamente a pilha de uma thread (profiler por amostragem)
+        e acumula as pilhas no formato 'folded' (função (arquivo:linha);... contagem),
+        aceito pelo speedscope e pelo flamegraph.pl.
+
+        Inputs:
+            thread_id = identificador da thread amostrada
+            interval = intervalo entre as amostras em segundos
+    '''
+    def __init__( self, thread_id, interval=0.001 ):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run( self ):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop( self ):
+        self._stop_event.set()
+        self.join()
+
+    def folded( self ):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+def start_profile( page ):
+    '''
+        Função que inicia o perfil (cProfile + amostragem de pilhas) da execução da página
+        Input: nome da página ('str')
+        Output: None
+    '''
+    _discard_profile()
+    if not profile_enabled():
+        return None
+
+    interval = float(os.environ.get(PROFILE_INTERVAL_ENV, '0.001'))
+    sampler = StackSampler(threading.get_ident(), interval)
+    profiler = cProfile.Profile()
+    _local.profile = {'page': page, 'started': time.time(), 'profiler': profiler, 'sampler': sampler}
+    sampler.start()
+    profiler.enable()
+    return None
+
+def _discard_profile():
+    #uma execução interrompida (ex.: st.experimental_rerun) deixa o perfil anterior ativo
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile['profiler'].disable()
+        profile['sampler'].stop()
+        _local.profile = None
+
+def finish_profile( filters ):
+    '''
+        Função que:
+            1. Encerra o perfil da execução da página
+            2. Salva em '<FOME_ZERO_PROFILE_DIR>/<página>/<hash dos filtros>/':
+                '<data>.prof' = estatísticas do cProfile (pstats, snakeviz)
+                '<data>.folded' = pilhas amostradas com linha (speedscope, flamegraph.pl)
+                'filters.json' = combinação de filtros da execução
+        Input: filtros selecionados na página ('dict')
+        Output: pasta com os arquivos salvos (ou None se o perfil não estiver ativo)
+    '''
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return None
+    profile['profiler'].disable()
+    profile['sampler'].stop()
+    _local.profile = None
+
+    filters_json = json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+    filters_key = hashlib.sha1(filters_json.encode('utf-8')).hexdigest()[:10]
+    folder = os.path.join(os.environ.get(PROFILE_DIR_ENV, 'profiles'), slugify(profile['page']), filters_key)
+    os.makedirs(folder, exist_ok=True)
+
+    name = time.strftime('%Y%m%d-%H%M%S', time.localtime(profile['started']))
+    profile['profiler'].dump_stats(os.path.join(folder, f'{name}.prof'))
+    folded = profile['sampler'].folded()
+    with open(os.path.join(folder, f'{name}.folded'), 'w', encoding='utf-8') as file:
+        file.write(folded)
+    with open(os.path.join(folder, 'filters.json'), 'w', encoding='utf-8') as file:
+        file.write(filters_json)
+
+    with st.sidebar:
+        st.caption(f'Perfil salvo em {folder}')
+        st.download_button('Baixar flame graph (.folded)', data=folded, file_name=f'{slugify(profile["page"])}-{name}.folded',
+                           mime='text/plain')
+    return folder
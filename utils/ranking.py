@@ -0,0 +1,144 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+import pandas as pd
+
+from utils.encoding import encoded, decode_groups, id_column
+from utils.kernels import compare_results, group_count, group_index, group_mean, group_sum, kernel_mode
+
+#chaves de ordenação oferecidas nas páginas
+SORT_KEYS = {
+    'Nota média': 'aggregate_rating',
+    'Nota bayesiana (ponderada por votos)': 'bayesian_rating',
+    'Limite inferior de Wilson': 'wilson_rating'
+}
+
+#nota máxima da plataforma
+MAX_RATING = 5.0
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def rating_prior( df1, quantile=0.5 ):
+    '''
+        Função que:
+            1. Calcula a nota média ponderada por votos de todo o dataset (média a priori)
+            2. Calcula o peso da média a priori (quantil do número de votos dos restaurantes avaliados)
+        Inputs:
+            df1 = Dataframe limpo
+            quantile = quantil dos votos usado como peso ('float')
+        Output: (média a priori, peso)
+    '''
+    votes = df1['votes'].values.astype(np.float64)
+    rating = df1['aggregate_rating'].values.astype(np.float64)
+    rated = votes > 0
+    if not rated.any():
+        return 0.0, 1.0
+    prior_mean = float((rating[rated] * votes[rated]).sum() / votes[rated].sum())
+    prior_weight = float(max(np.quantile(votes[rated], quantile), 1.0))
+    return prior_mean, prior_weight
+
+def bayesian_rating( weighted_sum, votes, prior_mean, prior_weight ):
+    '''
+        Função que calcula a média bayesiana: (C * m + soma(nota * votos)) / (C + votos)
+        Inputs:
+            weighted_sum = soma de nota * votos
+            votes = total de votos
+            prior_mean, prior_weight = média a priori (m) e peso (C)
+        Output: array com as notas bayesianas
+    '''
+    return (prior_weight * prior_mean + np.asarray(weighted_sum, dtype=np.float64)) / (prior_weight + np.asarray(votes, dtype=np.float64))
+
+def wilson_rating( rating, votes, z=1.96 ):
+    '''
+        Função que calcula o limite inferior do intervalo de Wilson para a nota (escala 0 a 5),
+        tratando nota/5 como a proporção de avaliações positivas em 'votes' avaliações
+        Inputs:
+            rating = nota média
+            votes = total de votos
+            z = quantil da normal (1.96 = 95% de confiança)
+        Output: array com os limites inferiores na escala de 0 a 5
+    '''
+    p = np.clip(np.asarray(rating, dtype=np.float64) / MAX_RATING, 0, 1)
+    n = np.asarray(votes, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = p + z ** 2 / (2 * n)
+        margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+        bound = (center - margin) / (1 + z ** 2 / n)
+    return np.where(n > 0, bound * MAX_RATING, 0.0)
+
+def rank_restaurants( df1, prior ):
+    '''
+        Função que:
+            1. Calcula a nota bayesiana e o limite de Wilson de cada restaurante em um passo vetorizado
+        Inputs:
+            df1 = Dataframe limpo
+            prior = (média a priori, peso) retornado por rating_prior
+        Output: Dataframe com as colunas 'bayesian_rating' e 'wilson_rating' (mesmo índice de df1)
+    '''
+    rating = df1['aggregate_rating'].values.astype(np.float64)
+    votes = df1['votes'].values.astype(np.float64)
+    df2 = pd.DataFrame({'bayesian_rating': bayesian_rating(rating * votes, votes, *prior),
+                        'wilson_rating': wilson_rating(rating, votes)},
+                       index=df1.index)
+    return df2
+
+def _pandas_totals( df1, keys, ids=False ):
+    #quantidade, nota média, votos e soma nota * votos por grupo pelo groupby do pandas
+    df2 = df1.loc[:, keys + ['aggregate_rating', 'votes']].copy()
+    if ids:
+        #valores ausentes (id -1) ficam fora dos grupos, como no groupby sobre o texto
+        df2 = df2.loc[(df2[keys] >= 0).all(axis=1), :]
+    df2['weighted_sum'] = df2['aggregate_rating'] * df2['votes']
+    return (df2.groupby(keys)
+               .agg(restaurants=('aggregate_rating', 'size'),
+                    aggregate_rating=('aggregate_rating', 'mean'),
+                    votes=('votes', 'sum'),
+                    weighted_sum=('weighted_sum', 'sum'))
+               .reset_index())
+
+def _kernel_totals( df1, keys ):
+    #mesmas medidas pelos kernels NumPy (colunas de ids inteiros)
+    group_ids, group_keys = group_index([df1[key].to_numpy() for key in keys])
+    n_groups = len(group_keys[0])
+    rating = df1['aggregate_rating'].to_numpy()
+    votes = df1['votes'].to_numpy()
+    return pd.DataFrame({**dict(zip(keys, group_keys)),
+                         'restaurants': group_count(group_ids, n_groups),
+                         'aggregate_rating': group_mean(group_ids, n_groups, rating),
+                         'votes': group_sum(group_ids, n_groups, votes),
+                         'weighted_sum': group_sum(group_ids, n_groups, rating * votes)})
+
+def rank_groups( df1, key, prior ):
+    '''
+        Função que:
+            1. Agrupa os restaurantes por 'key' em um único groupby (quantidade, votos e soma nota * votos)
+            2. Calcula por grupo a nota média simples, a nota ponderada por votos, a nota bayesiana e o limite de Wilson
+        Colunas codificadas (utils.encoding) são agrupadas pelos ids inteiros (kernels NumPy, utils.kernels)
+        e decodificadas no resultado
+        Inputs:
+            df1 = Dataframe limpo
+            key = coluna ou lista de colunas de agrupamento (ex.: 'cuisines', ['city', 'country_name'])
+            prior = (média a priori, peso) retornado por rating_prior
+        Output: Dataframe com uma linha por grupo
+    '''
+    columns = [key] if isinstance(key, str) else list(key)
+    keys = [id_column(column) for column in columns] if encoded(df1, columns) else columns
+    mode = kernel_mode()
+    if keys is columns:
+        df2 = _pandas_totals(df1, keys)
+    elif mode == '0':
+        df2 = decode_groups(df1, _pandas_totals(df1, keys, ids=True), columns)
+    else:
+        df2 = decode_groups(df1, _kernel_totals(df1, keys), columns)
+        if mode == 'check':
+            expected = decode_groups(df1, _pandas_totals(df1, keys, ids=True), columns)
+            compare_results(df2, expected, 'rank_groups')
+            df2 = expected
+
+    weighted_rating = np.where(df2['votes'] > 0, df2['weighted_sum'] / df2['votes'].where(df2['votes'] > 0, 1), 0.0)
+    df2['weighted_rating'] = weighted_rating
+    df2['bayesian_rating'] = bayesian_rating(df2['weighted_sum'], df2['votes'], *prior)
+    df2['wilson_rating'] = wilson_rating(weighted_rating, df2['votes'])
+    return df2.drop(columns='weighted_sum')
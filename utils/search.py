@@ -0,0 +1,156 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+#peso de cada campo no ranking da busca
+SEARCH_FIELDS = {
+    'restaurant_name': 3.0,
+    'locality_verbose': 2.0,
+    'address': 1.0
+}
+
+#fator aplicado a cada tipo de correspondência do termo buscado
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def normalize_text( text ):
+    '''
+        Função que:
+            1. Remove acentos, converte para minúsculas e troca pontuação por espaços
+        Input: texto ('str')
+        Output: texto normalizado ('str')
+    '''
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^0-9a-z]+', ' ', text.lower()).strip()
+
+def trigrams( token ):
+    '''
+        Função que retorna o conjunto de trigramas de um termo (com bordas '  termo ')
+        Input: termo ('str')
+        Output: set
+    '''
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _best_per_position( positions, scores ):
+    #mantém a maior pontuação de cada restaurante
+    if len(positions) == 0:
+        return positions, scores
+    order = np.argsort(positions, kind='stable')
+    positions, scores = positions[order], scores[order]
+    unique, starts = np.unique(positions, return_index=True)
+    return unique, np.maximum.reduceat(scores, starts)
+
+class SearchIndex:
+    '''
+        Classe que cria um índice invertido sobre 'restaurant_name', 'locality_verbose' e 'address'.
+
+            Estruturas:
+                vocabulary = termos normalizados em ordem alfabética (busca por prefixo com searchsorted)
+                postings = posições dos restaurantes de cada termo, com o peso do melhor campo
+                trigram_index = trigrama -> termos do vocabulário (busca aproximada)
+
+        Os resultados são ordenados pela relevância e, em seguida, por 'aggregate_rating' e 'votes'.
+
+        Input: Dataframe limpo
+    '''
+    def __init__( self, df1 ):
+        frames = []
+        for field, weight in SEARCH_FIELDS.items():
+            tokens = df1[field].reset_index(drop=True).fillna('').astype(str).map(normalize_text).str.split()
+            tokens = tokens.explode().dropna()
+            frames.append(pd.DataFrame({'token': tokens.values, 'position': tokens.index, 'weight': weight}))
+        postings = (pd.concat(frames, ignore_index=True)
+                      .groupby(['token', 'position'], sort=True)['weight']
+                      .max()
+                      .reset_index())
+
+        self.vocabulary, starts = np.unique(postings['token'].values.astype(str), return_index=True)
+        self._bounds = np.append(starts, len(postings))
+        self._positions = postings['position'].values.astype(np.int64)
+        self._weights = postings['weight'].values.astype(np.float64)
+
+        self._trigram_index = defaultdict(list)
+        self._trigram_counts = np.zeros(len(self.vocabulary), dtype=np.int64)
+        for token_id, token in enumerate(self.vocabulary):
+            token_trigrams = trigrams(token)
+            self._trigram_counts[token_id] = len(token_trigrams)
+            for trigram in token_trigrams:
+                self._trigram_index[trigram].append(token_id)
+
+        self._rating = df1['aggregate_rating'].values.astype(np.float64)
+        self._votes = df1['votes'].values.astype(np.float64)
+
+    def _postings( self, token_ids, factors ):
+        positions = [self._positions[self._bounds[i]:self._bounds[i + 1]] for i in token_ids]
+        scores = [self._weights[self._bounds[i]:self._bounds[i + 1]] * f for i, f in zip(token_ids, factors)]
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return _best_per_position(np.concatenate(positions), np.concatenate(scores))
+
+    def _fuzzy_terms( self, token, min_similarity ):
+        #similaridade de Jaccard entre os trigramas do termo e os do vocabulário
+        query = trigrams(token)
+        candidates = [self._trigram_index[trigram] for trigram in query if trigram in self._trigram_index]
+        if not candidates:
+            return []
+        token_ids, shared = np.unique(np.concatenate(candidates), return_counts=True)
+        similarity = shared / (len(query) + self._trigram_counts[token_ids] - shared)
+        keep = similarity >= min_similarity
+        return list(zip(token_ids[keep].tolist(), similarity[keep].tolist()))
+
+    def _match_token( self, token, fuzzy, min_similarity ):
+        #termos exatos e por prefixo: intervalo contíguo do vocabulário ordenado
+        first = np.searchsorted(self.vocabulary, token, side='left')
+        last = np.searchsorted(self.vocabulary, token + '\uffff', side='right')
+        token_ids = list(range(first, last))
+        factors = [EXACT_MATCH if self.vocabulary[i] == token else PREFIX_MATCH for i in token_ids]
+
+        if fuzzy:
+            matched = set(token_ids)
+            for token_id, similarity in self._fuzzy_terms(token, min_similarity):
+                if token_id not in matched:
+                    token_ids.append(token_id)
+                    factors.append(FUZZY_MATCH * similarity)
+        return self._postings(token_ids, factors)
+
+    def search( self, query, limit=20, fuzzy=True, min_similarity=0.4, mask=None ):
+        '''
+            Função que:
+                1. Busca os restaurantes que contêm todos os termos da consulta (exato, prefixo ou aproximado)
+                2. Ordena pela relevância, 'aggregate_rating' e 'votes'
+            Inputs:
+                query = texto buscado ('str')
+                limit = quantidade máxima de resultados ('int')
+                fuzzy = habilita a busca aproximada por trigramas ('bool')
+                min_similarity = similaridade mínima da busca aproximada ('float')
+                mask = array booleano opcional com os restaurantes permitidos (ex.: filtros da página)
+            Output: (posições, pontuações)
+        '''
+        tokens = normalize_text(query).split()
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        positions, scores = self._match_token(tokens[0], fuzzy, min_similarity)
+        for token in tokens[1:]:
+            other_positions, other_scores = self._match_token(token, fuzzy, min_similarity)
+            positions, left, right = np.intersect1d(positions, other_positions, assume_unique=True, return_indices=True)
+            scores = scores[left] + other_scores[right]
+
+        if mask is not None:
+            linhas_select = np.asarray(mask)[positions]
+            positions, scores = positions[linhas_select], scores[linhas_select]
+
+        order = np.lexsort((-self._votes[positions], -self._rating[positions], -scores))[:limit]
+        return positions[order], scores[order]
@@ -0,0 +1,221 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import io
+
+import streamlit as st
+
+from utils.data import VERSION_ENTRIES
+from utils.lazy import LazyModule
+from utils.warmup import filters_override, record_filter_state
+
+#biblioteca importada apenas no primeiro uso
+Image = LazyModule('PIL.Image')
+
+#logo da sidebar
+LOGO_PATH = 'logo.png'
+LOGO_WIDTH = 120
+
+#opções dos filtros de serviços
+YES_NO = ['Sim', 'Não']
+
+#parâmetros da URL com o estado dos filtros (links compartilháveis) e valores dos filtros de 'Sim'/'Não'
+QUERY_PARAMS = ['countries', 'prices', 'table_booking', 'delivery', 'online']
+YES_NO_PARAMS = {'Sim': '1', 'Não': '0'}
+
+#chaves dos widgets dos filtros no session_state
+FILTER_KEYS = ['filter_countries', 'filter_prices', 'filter_table_booking', 'filter_delivery', 'filter_online']
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+@st.cache_resource(show_spinner=False)
+def logo_bytes( path=LOGO_PATH, width=LOGO_WIDTH ):
+    '''
+        Função que decodifica e redimensiona o logo uma única vez por processo
+        (no tamanho exibido e em PNG, o st.image envia os bytes sem decodificar a imagem de novo)
+        Inputs:
+            path = caminho do logo ('str')
+            width = largura exibida em pixels ('int')
+        Output: bytes do PNG
+    '''
+    image = Image.open(path)
+    height = round(image.height * width / image.width)
+    buffer = io.BytesIO()
+    image.resize((width, height), Image.BILINEAR).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def sidebar_header():
+    '''
+        Função que exibe o topo comum da sidebar: logo, título e subtítulo
+        Output: None
+    '''
+    st.image(logo_bytes(), width=LOGO_WIDTH, output_format='PNG')
+
+    st.title('Fome Zero')
+    st.header('Marketplace de restaurantes')
+    st.markdown('''---''')
+    return None
+
+def sidebar_footer():
+    '''
+        Função que exibe o rodapé comum da sidebar
+        Output: None
+    '''
+    st.markdown('''---''')
+
+    st.header('Powered by Oiluj')
+    return None
+
+def validation_warning( report, quarantine ):
+    '''
+        Função que exibe um aviso na sidebar quando a validação do dataset colocou linhas em quarentena,
+        com a quantidade de linhas por regra
+        Inputs:
+            report = relatório da validação (data_validation)
+            quarantine = linhas em quarentena
+        Output: None
+    '''
+    if quarantine.empty:
+        return None
+
+    errors = report.loc[(report['severity'] == 'error') & (report['failures'] > 0), :]
+    rules = '\n'.join(f"- {rule.description}: {rule.failures}" for rule in errors.itertuples(index=False))
+    st.warning(f'{len(quarantine)} restaurantes do dataset foram colocados em quarentena pela validação:\n{rules}')
+    return None
+
+@st.cache_data(show_spinner=False, max_entries=VERSION_ENTRIES)
+def filter_options( _df1, version ):
+    '''
+        Função que retorna as opções dos filtros a partir do dataset carregado
+        (países na ordem em que aparecem no dataset e tipos de preço do mais caro ao mais barato)
+        Inputs:
+            _df1 = Dataframe limpo (não entra na chave do cache)
+            version = versão do dataset
+        Output: dict com 'countries' e 'prices'
+    '''
+    prices = _df1.loc[:, ['price_range', 'price_type']].drop_duplicates().sort_values('price_range', ascending=False)
+    return {'countries': list(_df1['country_name'].unique()),
+            'prices': list(prices['price_type'].unique())}
+
+def canonical_state( state, options ):
+    '''
+        Função que normaliza um estado dos filtros: países em ordem alfabética, tipos de preço na ordem
+        das opções, valores desconhecidos removidos e 'Sim'/'Não' sem filtro (nenhuma ou ambas as opções)
+        sempre como as duas opções. Estados equivalentes têm a mesma forma e compartilham os caches
+        Inputs:
+            state = (country_options, price_options, table_booking_options, delivery_options, online_options)
+            options = opções retornadas por filter_options
+        Output: estado canônico ('tuple' de listas)
+    '''
+    countries, prices, *yes_no = state
+    countries = sorted(set(countries) & set(options['countries']))
+    prices = [price for price in options['prices'] if price in prices]
+    yes_no = [[option for option in YES_NO if option in values] for values in yes_no]
+    return (countries, prices, *[values if len(values) == 1 else list(YES_NO) for values in yes_no])
+
+def state_query( state ):
+    '''
+        Função que converte um estado canônico nos parâmetros da URL
+        (países e tipos de preço repetidos, '1'/'0' nos filtros de 'Sim'/'Não'; filtros inativos ficam de fora)
+        Input: estado canônico
+        Output: dict parâmetro -> lista de valores
+    '''
+    countries, prices, *yes_no = state
+    params = {'countries': countries, 'prices': prices}
+    for name, values in zip(QUERY_PARAMS[2:], yes_no):
+        params[name] = [YES_NO_PARAMS[values[0]]] if len(values) == 1 else []
+    return params
+
+def query_state( params, options ):
+    '''
+        Função que lê o estado dos filtros dos parâmetros da URL
+        Inputs:
+            params = parâmetros da URL (st.experimental_get_query_params)
+            options = opções retornadas por filter_options
+        Output: estado canônico
+    '''
+    options_by_param = {param: option for option, param in YES_NO_PARAMS.items()}
+    yes_no = [[options_by_param[value] for value in params.get(name, []) if value in options_by_param]
+              for name in QUERY_PARAMS[2:]]
+    return canonical_state((params.get('countries', []), params.get('prices', []), *yes_no), options)
+
+def _seed_widgets( state ):
+    #primeira execução da sessão: os filtros começam no estado da URL (links compartilhados e favoritos)
+    for key, values in zip(FILTER_KEYS, state):
+        if key not in st.session_state:
+            st.session_state[key] = values
+
+def _sync_query_params( params ):
+    #mantém os demais parâmetros da URL (ex.: ?profile=1) e só envia a URL quando ela muda
+    current = st.experimental_get_query_params()
+    updated = {name: values for name, values in current.items() if name not in params}
+    updated.update({name: values for name, values in params.items() if values})
+    if updated != current:
+        st.experimental_set_query_params(**updated)
+
+def country_filter( options ):
+    '''
+        Função que exibe o filtro de países (estado inicial e atual na URL)
+        Input: opções retornadas por filter_options
+        Output: países selecionados (em ordem alfabética)
+    '''
+    #execução do warm-up: estado dos filtros informado pela thread
+    override = filters_override()
+    if override is not None:
+        return override[0]
+
+    _seed_widgets( query_state(st.experimental_get_query_params(), options)[:1] )
+    countries = st.multiselect('Selecione quais países deseja visualizar os dados:', options['countries'], key=FILTER_KEYS[0])
+    countries = sorted(countries)
+    _sync_query_params( {'countries': countries} )
+    return countries
+
+def restaurant_filters( options ):
+    '''
+        Função que exibe os filtros comuns das páginas: países, faixa de preço, reservas, entregas e pedidos online
+        (estado inicial lido da URL e estado atual gravado na URL em forma canônica)
+        Input: opções retornadas por filter_options
+        Output: estado canônico (country_options, price_options, table_booking_options, delivery_options, online_options)
+    '''
+    #execução do warm-up: estado dos filtros informado pela thread
+    override = filters_override()
+    if override is not None:
+        return tuple(override)
+
+    _seed_widgets( query_state(st.experimental_get_query_params(), options) )
+
+    #selecionar países
+    country_options = st.multiselect('Selecione quais países deseja visualizar os dados:', options['countries'], key=FILTER_KEYS[0])
+
+    #selecionar tipo de preço
+    price_options = st.multiselect('Selecione a faixa de preço do restaurante:', options['prices'], key=FILTER_KEYS[1])
+
+    #selecionar reserva restaurantes
+    table_booking_options = st.multiselect('Selecione se o restaurante faz reservas:', YES_NO, key=FILTER_KEYS[2])
+
+    #selecionar entrega restaurantes
+    delivery_options = st.multiselect('Selecione se o restaurante realiza entregas:', YES_NO, key=FILTER_KEYS[3])
+
+    #selecionar online restaurantes
+    online_options = st.multiselect('Selecione se o restaurante possui pedidos online:', YES_NO, key=FILTER_KEYS[4])
+
+    state = canonical_state((country_options, price_options, table_booking_options, delivery_options, online_options), options)
+    _sync_query_params( state_query(state) )
+
+    #estados mais usados são aquecidos após uma alteração do dataset
+    record_filter_state(state)
+    return state
+
+def snapshot_filter( snapshots ):
+    '''
+        Função que exibe a seleção do snapshot usado no modo de comparação (apenas se houver snapshots)
+        Input: lista de snapshots (read_manifest)
+        Output: data do snapshot selecionado (None = sem comparação)
+    '''
+    if not snapshots:
+        return None
+
+    dates = [snapshot['ingest_date'] for snapshot in reversed(snapshots)]
+    option = st.selectbox('Comparar com o snapshot:', ['Nenhum'] + dates)
+    return None if option == 'Nenhum' else option
@@ -0,0 +1,101 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+import pandas as pd
+
+#peso de cada bloco de atributos na similaridade
+FEATURE_WEIGHTS = {
+    'cuisines': 1.0,
+    'price': 0.6,
+    'cost': 0.6,
+    'rating': 0.8,
+    'votes': 0.4,
+    'services': 0.4,
+    'location': 1.0
+}
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def _standardize( values ):
+    values = np.asarray(values, dtype=np.float64)
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+def _block( values, weight ):
+    #normaliza o bloco para que sua contribuição à norma dependa apenas do peso
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    scale = np.sqrt((values ** 2).sum(axis=1).mean())
+    return values * (weight / scale) if scale > 0 else values
+
+def restaurant_features( df1, weights=FEATURE_WEIGHTS ):
+    '''
+        Função que:
+            1. Codifica cada restaurante em um vetor float32 com os blocos:
+                'cuisines' = one-hot do tipo de culinária
+                'price' = one-hot da faixa de preço
+                'cost' = log do preço médio para dois em dólar (padronizado)
+                'rating' = nota média (padronizada)
+                'votes' = log do número de avaliações (padronizado)
+                'services' = reservas, pedidos online e entregas
+                'location' = latitude/longitude na esfera unitária (x, y, z)
+            2. Normaliza as linhas (similaridade de cosseno por produto interno)
+        Inputs:
+            df1 = Dataframe limpo
+            weights = peso de cada bloco
+        Output: matriz float32 (restaurantes x atributos)
+    '''
+    latitude = np.radians(df1['latitude'].astype(float).values)
+    longitude = np.radians(df1['longitude'].astype(float).values)
+    location = np.column_stack([np.cos(latitude) * np.cos(longitude),
+                                np.cos(latitude) * np.sin(longitude),
+                                np.sin(latitude)])
+
+    blocks = [
+        _block(pd.get_dummies(df1['cuisines']).values, weights['cuisines']),
+        _block(pd.get_dummies(df1['price_range']).values, weights['price']),
+        _block(_standardize(np.log1p(df1['average_cost_for_two_USD'].astype(float))), weights['cost']),
+        _block(_standardize(df1['aggregate_rating'].astype(float)), weights['rating']),
+        _block(_standardize(np.log1p(df1['votes'].astype(float))), weights['votes']),
+        _block(df1[['has_table_booking', 'has_online_delivery', 'is_delivering_now']].values, weights['services']),
+        _block(location, weights['location'])
+    ]
+    features = np.hstack(blocks)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (features / norms).astype(np.float32)
+
+class SimilarityIndex:
+    '''
+        Classe que responde consultas de k vizinhos mais próximos (similaridade de cosseno)
+        sobre a matriz de atributos dos restaurantes, com um único produto matriz-vetor por consulta.
+
+        Input: Dataframe limpo
+    '''
+    def __init__( self, df1, weights=FEATURE_WEIGHTS ):
+        self.features = restaurant_features(df1, weights)
+
+    def similar( self, position, k=5, mask=None ):
+        '''
+            Função que:
+                1. Retorna os k restaurantes mais parecidos com o restaurante da posição informada
+            Inputs:
+                position = posição do restaurante no dataframe ('int')
+                k = quantidade de restaurantes ('int')
+                mask = array booleano opcional com os restaurantes permitidos
+            Output: (posições, similaridades), em ordem decrescente de similaridade
+        '''
+        scores = self.features @ self.features[position]
+        scores[position] = -np.inf
+        if mask is not None:
+            scores[~np.asarray(mask)] = -np.inf
+
+        k = min(int(k), int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
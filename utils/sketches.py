@@ -0,0 +1,151 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.data import filter_positions
+
+#variáveis de ambiente
+#   FOME_ZERO_APPROX_DISTINCT=<erro> -> contagens de valores distintos aproximadas (HyperLogLog) com o
+#                                       erro relativo informado, ex.: 0.02 (padrão = contagem exata)
+APPROX_DISTINCT_ENV = 'FOME_ZERO_APPROX_DISTINCT'
+
+#colunas dos filtros da sidebar: cada célula dos sketches tem um único valor de cada uma
+FILTER_COLUMNS = ['country_name', 'price_type', 'has_table_booking', 'is_delivering_now', 'has_online_delivery']
+
+#limites da precisão do HyperLogLog (2^p registradores por sketch)
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+#2^-posto para todos os postos possíveis (consulta em tabela em vez de exp2 por registrador)
+_INVERSE_POWERS = np.exp2(-np.arange(66, dtype=np.float64))
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def approx_error():
+    '''
+        Função que retorna o erro relativo do modo aproximado (ou None na contagem exata)
+        Output: 'float' ou None
+    '''
+    value = os.environ.get(APPROX_DISTINCT_ENV, '')
+    if value in ('', '0'):
+        return None
+    return float(value)
+
+def precision_for_error( error ):
+    '''
+        Função que retorna a precisão do HyperLogLog para um erro relativo (erro padrão = 1.04 / sqrt(2^p))
+        Input: erro relativo ('float', ex.: 0.02)
+        Output: precisão p ('int')
+    '''
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+def _bit_length( values ):
+    #bit_length de inteiros de 64 bits (em duas metades de 32 bits, exatas em float64)
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        high_length = np.floor(np.log2(high)) + 33
+        low_length = np.floor(np.log2(low)) + 1
+    return np.where(high > 0, high_length, np.where(low > 0, low_length, 0)).astype(np.int64)
+
+def hll_hash( values, precision ):
+    '''
+        Função que calcula, para cada valor, o registrador e o posto (zeros à esquerda + 1) do HyperLogLog
+        Inputs:
+            values = array ou Series com os valores (sem ausentes)
+            precision = precisão p
+        Output: (índices dos registradores, postos)
+    '''
+    hashes = pd.util.hash_array(np.asarray(values))
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes << np.uint64(precision)
+    rank = np.minimum(65 - _bit_length(rest), 64 - precision + 1)
+    return index, rank.astype(np.uint8)
+
+def hll_estimate( registers ):
+    '''
+        Função que estima a quantidade de valores distintos de cada sketch
+        (contagem linear enquanto ela estimar até 3 * 2^p valores, onde é mais precisa que o HyperLogLog)
+        Input: array (sketches x 2^p) com os registradores
+        Output: array com as estimativas
+    '''
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+    estimate = alpha * m * m / _INVERSE_POWERS[registers].sum(axis=1)
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((zeros > 0) & (linear <= 3 * m), linear, estimate)
+
+def grouped_registers( group_ids, n_groups, values, precision ):
+    '''
+        Função que monta um sketch HyperLogLog por grupo
+        Inputs:
+            group_ids = array com o grupo de cada linha (negativo = ignorada)
+            n_groups = quantidade de grupos
+            values = valores contados (ausentes são ignorados, como no nunique)
+            precision = precisão p
+        Output: array (grupos x 2^p) com os registradores
+    '''
+    values = pd.Series(values)
+    valid = (np.asarray(group_ids) >= 0) & values.notna().to_numpy()
+    index, rank = hll_hash(values[valid].to_numpy(), precision)
+    registers = np.zeros((n_groups, 2 ** precision), dtype=np.uint8)
+    np.maximum.at(registers, (np.asarray(group_ids)[valid].astype(np.int64), index), rank)
+    return registers
+
+class DistinctSketch:
+    '''
+        Classe que guarda sketches HyperLogLog da quantidade de valores distintos de uma coluna
+        por grupo, separados em células com um único valor de cada filtro da sidebar.
+
+        Qualquer combinação dos filtros seleciona um conjunto de células (filter_positions sobre
+        a tabela de células), e o sketch de cada grupo é a união (máximo dos registradores) das
+        suas células selecionadas, sem percorrer as linhas do dataset.
+
+            Consultas:
+                estimate = estimativa por grupo para um estado dos filtros
+
+        Inputs:
+            df1 = Dataframe limpo
+            dimension = colunas dos grupos (ex.: ('city', 'country_name'))
+            measure = coluna contada
+            error = erro relativo ('float')
+    '''
+    def __init__( self, df1, dimension, measure, error ):
+        self.dimension = list(dimension)
+        self.precision = precision_for_error(error)
+        columns = self.dimension + [column for column in FILTER_COLUMNS if column not in self.dimension]
+
+        grouped = df1.loc[:, columns].groupby(columns, observed=True)
+        cell_ids = grouped.ngroup().to_numpy(dtype=np.float64)
+        self.cells = grouped.size().reset_index().loc[:, columns]
+        cell_ids = np.where(np.isnan(cell_ids), -1, cell_ids).astype(np.int64)
+        self.registers = grouped_registers(cell_ids, len(self.cells), df1[measure], self.precision)
+
+    def estimate( self, *filters ):
+        '''
+            Método que estima a quantidade de valores distintos por grupo
+            Input: opções dos filtros, na ordem de filter_positions
+            Output: Series com as estimativas (índice = colunas dos grupos)
+        '''
+        positions = filter_positions(self.cells, *filters)
+        grouped = self.cells.iloc[positions].groupby(self.dimension)
+        group_ids = grouped.ngroup().to_numpy()
+        index = grouped.size().index
+        if len(index) == 0:
+            return pd.Series(np.zeros(0, dtype=np.int64), index=index)
+
+        #as células estão ordenadas pelas colunas dos grupos: cada grupo é um trecho contíguo
+        starts = np.flatnonzero(np.diff(group_ids, prepend=-1))
+        selected = self.registers if len(positions) == len(self.cells) else self.registers[positions]
+        registers = np.maximum.reduceat(selected, starts, axis=0)
+        return pd.Series(np.round(hll_estimate(registers)).astype(np.int64), index=index)
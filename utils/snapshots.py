@@ -0,0 +1,232 @@
+'''
+    Snapshots das exportações do dataset
+
+    Cada exportação limpa é guardada como uma partição 'ingest_date=AAAA-MM-DD' com apenas o que
+    mudou em relação ao snapshot anterior (por restaurant_id), em parquet comprimido:
+        changes.parquet = restaurantes novos ou alterados (todas as colunas)
+        removed.parquet = restaurant_id dos restaurantes removidos
+        quarantine.parquet = linhas da exportação que falharam na validação (utils.validation), se houver
+    O espaço ocupado cresce com a quantidade de mudanças, e não com a quantidade de snapshots.
+    O manifest.json lista os snapshots e o state_hashes.parquet guarda o hash de cada restaurante
+    do último snapshot (o delta de uma nova exportação é calculado sem reler as partições).
+
+    Uso (na raiz do projeto):
+        python -m utils.snapshots ingest dataset/zomato.csv --date 2023-08-01
+        python -m utils.snapshots list
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+#variáveis de ambiente
+#   FOME_ZERO_SNAPSHOT_DIR=<pasta> -> pasta dos snapshots (padrão 'dataset/snapshots')
+SNAPSHOT_DIR_ENV = 'FOME_ZERO_SNAPSHOT_DIR'
+SNAPSHOT_DIR = 'dataset/snapshots'
+MANIFEST_FILE = 'manifest.json'
+STATE_FILE = 'state_hashes.parquet'
+COMPRESSION = 'zstd'
+
+#chave dos restaurantes entre as exportações
+KEY = 'restaurant_id'
+
+#snapshots reconstruídos mantidos em memória (datas comparadas recentemente): cada ingest muda a versão
+#do manifest, e os snapshots das versões anteriores saem do cache à medida que os novos entram
+SNAPSHOT_ENTRIES = 4
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def snapshot_dir():
+    '''
+        Função que retorna a pasta dos snapshots (variável de ambiente)
+        Output: caminho ('str')
+    '''
+    return os.environ.get(SNAPSHOT_DIR_ENV, SNAPSHOT_DIR)
+
+def _write_atomic( path, write ):
+    #grava em um arquivo temporário e troca de uma vez (leitores nunca veem um arquivo pela metade)
+    tmp_path = f'{path}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def read_manifest( folder=None ):
+    '''
+        Função que lê a lista de snapshots
+        Input: pasta dos snapshots ('str', padrão = snapshot_dir())
+        Output: lista de dicts (um por snapshot, em ordem de data)
+    '''
+    path = os.path.join(folder or snapshot_dir(), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['snapshots']
+
+def manifest_version( folder=None ):
+    '''
+        Função que retorna a versão do manifest (data de modificação), usada como chave dos caches
+        Input: pasta dos snapshots
+        Output: versão ('str')
+    '''
+    path = os.path.join(folder or snapshot_dir(), MANIFEST_FILE)
+    return f'{os.stat(path).st_mtime_ns:x}' if os.path.exists(path) else ''
+
+def _storable( df1 ):
+    #uma linha por restaurante (as colunas numéricas do dataset limpo já são float e vão direto para o parquet)
+    return df1.drop_duplicates(KEY).reset_index(drop=True)
+
+def row_hashes( df1 ):
+    '''
+        Função que calcula o hash de cada restaurante (todas as colunas), usado para detectar alterações
+        Input: Dataframe limpo (uma linha por restaurante)
+        Output: Dataframe com restaurant_id e row_hash
+    '''
+    hashes = pd.util.hash_pandas_object(df1, index=False).to_numpy()
+    return pd.DataFrame({KEY: df1[KEY].to_numpy(), 'row_hash': hashes})
+
+def ingest_snapshot( df1, ingest_date, folder=None, quarantine=None ):
+    '''
+        Função que:
+            1. Compara a exportação limpa com o estado do último snapshot (hash por restaurante)
+            2. Grava a partição com os restaurantes novos/alterados e os removidos
+            3. Atualiza o estado e o manifest
+        Inputs:
+            df1 = Dataframe limpo da exportação
+            ingest_date = data da exportação ('AAAA-MM-DD', posterior ao último snapshot)
+            folder = pasta dos snapshots
+            quarantine = linhas em quarentena retornadas pela validação do clean_data (opcional)
+        Output: dict com o resumo do snapshot
+    '''
+    folder = folder or snapshot_dir()
+    ingest_date = datetime.date.fromisoformat(str(ingest_date)).isoformat()
+    snapshots = read_manifest(folder)
+    if snapshots and ingest_date <= snapshots[-1]['ingest_date']:
+        raise ValueError(f'a data do snapshot ({ingest_date}) deve ser posterior ao último ({snapshots[-1]["ingest_date"]})')
+
+    df2 = _storable(df1)
+    hashes = row_hashes(df2)
+    state_path = os.path.join(folder, STATE_FILE)
+    if os.path.exists(state_path):
+        previous = pd.read_parquet(state_path)
+    else:
+        previous = pd.DataFrame({KEY: pd.Series(dtype=np.int64), 'row_hash': pd.Series(dtype=np.uint64)})
+
+    #hash anulável: restaurantes novos ficam sem hash anterior sem converter os hashes para float
+    merged = hashes.merge(previous.astype({'row_hash': 'UInt64'}), on=KEY, how='left', suffixes=('', '_previous'))
+    is_new = merged['row_hash_previous'].isna().to_numpy()
+    is_changed = ~is_new & (merged['row_hash'] != merged['row_hash_previous']).fillna(False).to_numpy(dtype=bool)
+    removed = previous.loc[~previous[KEY].isin(hashes[KEY]), [KEY]].reset_index(drop=True)
+
+    partition = os.path.join(folder, f'ingest_date={ingest_date}')
+    os.makedirs(partition, exist_ok=True)
+    df2.loc[is_new | is_changed, :].reset_index(drop=True).to_parquet(os.path.join(partition, 'changes.parquet'),
+                                                                       compression=COMPRESSION, index=False)
+    removed.to_parquet(os.path.join(partition, 'removed.parquet'), compression=COMPRESSION, index=False)
+    if quarantine is not None and len(quarantine):
+        quarantine.to_parquet(os.path.join(partition, 'quarantine.parquet'), compression=COMPRESSION, index=False)
+
+    _write_atomic(state_path, lambda path: hashes.to_parquet(path, compression=COMPRESSION, index=False))
+    summary = {'ingest_date': ingest_date, 'restaurants': int(len(df2)), 'added': int(is_new.sum()),
+               'changed': int(is_changed.sum()), 'removed': int(len(removed)),
+               'quarantined': int(len(quarantine)) if quarantine is not None else 0}
+    manifest = {'snapshots': snapshots + [summary]}
+
+    def write_manifest( path ):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    _write_atomic(os.path.join(folder, MANIFEST_FILE), write_manifest)
+    return summary
+
+def read_snapshot( ingest_date, folder=None ):
+    '''
+        Função que reconstrói um snapshot: para cada restaurante, vale o último evento
+        (alteração ou remoção) das partições até a data pedida
+        Inputs:
+            ingest_date = data do snapshot ('AAAA-MM-DD')
+            folder = pasta dos snapshots
+        Output: Dataframe limpo do snapshot (uma linha por restaurante)
+    '''
+    folder = folder or snapshot_dir()
+    dates = [snapshot['ingest_date'] for snapshot in read_manifest(folder) if snapshot['ingest_date'] <= ingest_date]
+    if not dates or dates[-1] != ingest_date:
+        raise KeyError(f'snapshot {ingest_date} não encontrado em {folder}')
+
+    changes, removals = [], []
+    for order, date in enumerate(dates):
+        partition = os.path.join(folder, f'ingest_date={date}')
+        changes.append(pd.read_parquet(os.path.join(partition, 'changes.parquet')).assign(_order=order))
+        removals.append(pd.read_parquet(os.path.join(partition, 'removed.parquet')).assign(_order=order))
+    changes = pd.concat(changes, ignore_index=True)
+    removals = pd.concat(removals, ignore_index=True)
+
+    #último evento de cada restaurante (só as chaves, sem misturar os tipos das colunas)
+    events = pd.concat([changes.loc[:, [KEY, '_order']].assign(_removed=False), removals.assign(_removed=True)], ignore_index=True)
+    last = events.sort_values('_order', kind='stable').drop_duplicates(KEY, keep='last')
+    alive = last.loc[~last['_removed'], KEY]
+
+    df2 = changes.sort_values('_order', kind='stable').drop_duplicates(KEY, keep='last')
+    return df2.loc[df2[KEY].isin(alive), :].drop(columns='_order').reset_index(drop=True)
+
+@st.cache_resource(show_spinner=False, max_entries=SNAPSHOT_ENTRIES)
+def load_snapshot( ingest_date, version, folder=None ):
+    '''
+        Função que reconstrói um snapshot uma única vez por processo (por versão do manifest; no máximo
+        SNAPSHOT_ENTRIES snapshots em memória)
+        Inputs:
+            ingest_date = data do snapshot
+            version = versão do manifest retornada por manifest_version
+            folder = pasta dos snapshots
+        Output: Dataframe limpo do snapshot (não deve ser alterado)
+    '''
+    return read_snapshot(ingest_date, folder)
+
+def compare_snapshot( df_now, df_then, dimension, measure, aggregation, fill_value=None ):
+    '''
+        Função que compara uma medida por grupo entre o snapshot e os dados atuais
+        (uma linha por restaurante em cada lado)
+        Inputs:
+            df_now = Dataframe atual
+            df_then = Dataframe do snapshot
+            dimension = colunas de agrupamento
+            measure = coluna medida
+            aggregation = agregação ('count', 'mean', ...)
+            fill_value = valor dos grupos ausentes em um dos lados (None = grupo removido da comparação)
+        Output: Dataframe com as colunas de agrupamento, 'snapshot', 'atual' e 'variacao'
+    '''
+    def aggregate( df1 ):
+        values = df1.drop_duplicates(KEY).loc[:, list(dimension) + [measure]]
+        if values[measure].dtype == object:
+            values = values.assign(**{measure: values[measure].astype(float)})
+        return values.groupby(list(dimension))[measure].agg(aggregation)
+
+    df2 = pd.concat({'snapshot': aggregate(df_then), 'atual': aggregate(df_now)}, axis=1)
+    df2 = df2.dropna() if fill_value is None else df2.fillna(fill_value)
+    return df2.assign(variacao=df2['atual'] - df2['snapshot']).reset_index()
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Snapshots das exportações do dataset')
+    parser.add_argument('--folder', help='pasta dos snapshots (padrão = FOME_ZERO_SNAPSHOT_DIR ou dataset/snapshots)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='limpa uma exportação e grava o snapshot')
+    ingest.add_argument('path', help='arquivo CSV da exportação')
+    ingest.add_argument('--date', default=datetime.date.today().isoformat(), help='data da exportação (AAAA-MM-DD)')
+    commands.add_parser('list', help='lista os snapshots')
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        from utils.data import clean_data
+        validation = {}
+        df_clean = clean_data(pd.read_csv(args.path), validation)
+        print(validation['report'].to_string(index=False))
+        print(json.dumps(ingest_snapshot(df_clean, args.date, args.folder, validation['quarantine'])))
+    else:
+        for snapshot in read_manifest(args.folder):
+            print(json.dumps(snapshot))
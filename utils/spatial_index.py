@@ -0,0 +1,151 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import numpy as np
+
+#raio médio da Terra em km
+EARTH_RADIUS_KM = 6371.0088
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def haversine_km( latitude, longitude, lat_ref, lon_ref ):
+    '''
+        Função que:
+            1. Calcula a distância (haversine) entre os pontos e uma referência
+        Inputs:
+            latitude, longitude = arrays com as coordenadas dos pontos
+            lat_ref, lon_ref = coordenadas da referência ('float')
+        Output: array com as distâncias em km
+    '''
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(lat_ref)
+    dlat = lat1 - lat2
+    dlon = np.radians(longitude) - np.radians(lon_ref)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class SpatialIndex:
+    '''
+        Classe que indexa os restaurantes por latitude/longitude em buckets de grade
+        (células de 'cell_size' graus, no estilo geohash), ordenados por célula.
+
+        Cada linha da grade ocupa um intervalo contíguo do array ordenado, então
+        as consultas leem apenas as fatias das células que cruzam a região.
+
+            Consultas:
+                within_bounds = posições dos restaurantes dentro de um retângulo
+                nearest = posições e distâncias dos N restaurantes mais próximos
+
+        Inputs:
+            latitude, longitude = arrays com as coordenadas
+            cell_size = tamanho da célula em graus ('float')
+    '''
+    def __init__( self, latitude, longitude, cell_size=0.25 ):
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.n_rows = int(np.ceil(180 / self.cell_size)) + 1
+        self.n_cols = int(np.ceil(360 / self.cell_size)) + 1
+
+        cell_id = self._cell_row(self.latitude) * self.n_cols + self._cell_col(self.longitude)
+        self._order = np.argsort(cell_id, kind='stable')
+        self._cells, starts = np.unique(cell_id[self._order], return_index=True)
+        #limites de cada célula dentro de '_order' (com sentinela no final)
+        self._bounds = np.append(starts, len(self._order))
+
+    def __len__( self ):
+        return len(self._order)
+
+    def _cell_row( self, latitude ):
+        row = np.floor((np.asarray(latitude) + 90) / self.cell_size).astype(np.int64)
+        return np.clip(row, 0, self.n_rows - 1)
+
+    def _cell_col( self, longitude ):
+        col = np.floor((np.asarray(longitude) + 180) / self.cell_size).astype(np.int64)
+        return np.clip(col, 0, self.n_cols - 1)
+
+    def _candidates( self, south, west, north, east ):
+        #fatias contíguas de '_order' para cada linha da grade dentro do retângulo
+        rows = np.arange(self._cell_row(south), self._cell_row(north) + 1)
+        first = np.searchsorted(self._cells, rows * self.n_cols + self._cell_col(west), side='left')
+        last = np.searchsorted(self._cells, rows * self.n_cols + self._cell_col(east), side='right')
+        keep = last > first
+        slices = [self._order[self._bounds[i]:self._bounds[j]] for i, j in zip(first[keep], last[keep])]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def within_bounds( self, south, west, north, east, mask=None ):
+        '''
+            Função que:
+                1. Retorna as posições dos restaurantes dentro do retângulo
+                   (suporta retângulos que cruzam o antimeridiano, west > east)
+            Inputs:
+                limites sul, oeste, norte e leste em graus
+                mask = array booleano opcional com os restaurantes permitidos (ex.: filtro de países)
+            Output: array ordenado com as posições
+        '''
+        south, north = max(south, -90.0), min(north, 90.0)
+        if west > east:
+            positions = np.concatenate([self.within_bounds(south, west, north, 180.0, mask),
+                                        self.within_bounds(south, -180.0, north, east, mask)])
+            return np.sort(positions)
+
+        west, east = max(west, -180.0), min(east, 180.0)
+        positions = self._candidates(south, west, north, east)
+        lat = self.latitude[positions]
+        lon = self.longitude[positions]
+        linhas_select = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        if mask is not None:
+            linhas_select &= np.asarray(mask)[positions]
+        return np.sort(positions[linhas_select])
+
+    def _radius_bounds( self, lat_ref, lon_ref, radius_km ):
+        #retângulo que contém o círculo de raio 'radius_km' ao redor da referência
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = lat_ref - dlat, lat_ref + dlat
+        #a longitude encolhe mais na latitude de maior módulo da faixa
+        cos_lat = np.cos(np.radians(max(abs(south), abs(north))))
+        if north >= 90 or south <= -90 or cos_lat <= 1e-12:
+            return south, -180.0, north, 180.0
+        dlon = np.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+        if dlon >= 180:
+            return south, -180.0, north, 180.0
+        west = (lon_ref - dlon + 180) % 360 - 180
+        east = (lon_ref + dlon + 180) % 360 - 180
+        return south, west, north, east
+
+    def nearest( self, lat_ref, lon_ref, n=10, mask=None ):
+        '''
+            Função que:
+                1. Retorna os N restaurantes mais próximos de um ponto
+            Inputs:
+                lat_ref, lon_ref = coordenadas do ponto ('float')
+                n = quantidade de restaurantes ('int')
+                mask = array booleano opcional com os restaurantes permitidos
+            Output: (posições, distâncias em km), ordenados pela distância
+        '''
+        total = len(self) if mask is None else int(np.count_nonzero(mask))
+        n = min(int(n), total)
+        if n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        #expande o anel de células até reunir pelo menos N candidatos
+        ring = 1
+        while True:
+            delta = ring * self.cell_size
+            candidates = self.within_bounds(lat_ref - delta, lon_ref - delta, lat_ref + delta, lon_ref + delta, mask)
+            if len(candidates) >= n or delta >= 360:
+                break
+            ring *= 2
+
+        #o N-ésimo candidato limita o raio de busca exato
+        distances = haversine_km(self.latitude[candidates], self.longitude[candidates], lat_ref, lon_ref)
+        radius = np.partition(distances, n - 1)[n - 1]
+        candidates = self.within_bounds(*self._radius_bounds(lat_ref, lon_ref, radius), mask=mask)
+        distances = haversine_km(self.latitude[candidates], self.longitude[candidates], lat_ref, lon_ref)
+
+        top = np.argpartition(distances, n - 1)[:n] if len(distances) > n else np.arange(len(distances))
+        top = top[np.argsort(distances[top], kind='stable')]
+        return candidates[top], distances[top]
@@ -0,0 +1,149 @@
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import operator
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+#comparações dos limites das regras de intervalo (mesmos valores do 'inclusive' do Series.between)
+BOUNDS = {
+    'both': (operator.ge, operator.le),
+    'left': (operator.ge, operator.lt),
+    'right': (operator.gt, operator.le),
+    'neither': (operator.gt, operator.lt)
+}
+
+#severidades: 'error' = linha vai para a quarentena, 'warning' = apenas informada no relatório
+SEVERITIES = ('error', 'warning')
+
+#quantidade de valores de exemplo por regra no relatório
+EXAMPLES = 3
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+@dataclass(frozen=True)
+class Rule:
+    '''
+        Classe que descreve uma regra de qualidade dos dados de forma declarativa
+
+        Inputs:
+            name = identificador da regra ('str')
+            description = descrição da regra no relatório
+            columns = colunas verificadas (uma coluna; duas na regra 'pairs')
+            kind = 'domain' (valor em values), 'range' (valor entre low e high) ou
+                   'pairs' (valor da 2ª coluna em values[valor da 1ª coluna])
+            values = valores aceitos ('domain') ou dict valor -> valores aceitos ('pairs')
+            low, high = limites da regra 'range' (None = sem limite)
+            inclusive = limites incluídos: 'both', 'left', 'right' ou 'neither'
+            severity = 'error' ou 'warning'
+    '''
+    name: str
+    description: str
+    columns: tuple
+    kind: str
+    values: object = None
+    low: float = None
+    high: float = None
+    inclusive: str = 'both'
+    severity: str = 'error'
+
+def _domain_failures( df1, rule ):
+    #valores ausentes também falham
+    return ~df1[rule.columns[0]].isin(rule.values).to_numpy()
+
+def _range_failures( df1, rule ):
+    #valores não numéricos ou ausentes também falham
+    values = pd.to_numeric(df1[rule.columns[0]], errors='coerce').to_numpy(dtype=np.float64)
+    low_op, high_op = BOUNDS[rule.inclusive]
+    failures = np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        if rule.low is not None:
+            failures |= ~low_op(values, rule.low)
+        if rule.high is not None:
+            failures |= ~high_op(values, rule.high)
+    return failures
+
+def _pairs_failures( df1, rule ):
+    #os pares são verificados sobre os valores distintos de cada coluna (códigos inteiros),
+    #e não linha a linha: o custo por linha é uma consulta em uma tabela booleana
+    first, second = rule.columns
+    first_codes, first_uniques = pd.factorize(df1[first])
+    second_codes, second_uniques = pd.factorize(df1[second])
+    allowed = np.zeros((len(first_uniques), len(second_uniques)), dtype=bool)
+    for i, value in enumerate(first_uniques):
+        if value in rule.values:
+            allowed[i] = second_uniques.isin(rule.values[value])
+
+    valid = (first_codes >= 0) & (second_codes >= 0)
+    failures = np.ones(len(df1), dtype=bool)
+    failures[valid] = ~allowed[first_codes[valid], second_codes[valid]]
+    return failures
+
+CHECKS = {
+    'domain': _domain_failures,
+    'range': _range_failures,
+    'pairs': _pairs_failures
+}
+
+def rule_failures( df1, rule ):
+    '''
+        Função que verifica uma regra em todas as linhas de uma vez (máscara vetorizada)
+        Inputs:
+            df1 = Dataframe
+            rule = Rule
+        Output: array booleano (True = linha não atende a regra)
+    '''
+    if rule.kind not in CHECKS:
+        raise ValueError(f'tipo de regra desconhecido: {rule.kind}')
+    if rule.severity not in SEVERITIES:
+        raise ValueError(f'severidade desconhecida: {rule.severity}')
+    return CHECKS[rule.kind](df1, rule)
+
+def _examples( df1, rule, failures ):
+    #alguns valores distintos que falharam, para o relatório
+    values = df1.loc[failures, list(rule.columns)].drop_duplicates().head(EXAMPLES)
+    return '; '.join(', '.join(str(value) for value in row) for row in values.itertuples(index=False))
+
+def validate( df1, rules ):
+    '''
+        Função que:
+            1. Verifica todas as regras sobre o dataframe, cada uma como uma máscara vetorizada
+            2. Monta o relatório com a quantidade de falhas e exemplos de cada regra
+            3. Separa a quarentena: linhas que falharam em alguma regra de severidade 'error'
+        Inputs:
+            df1 = Dataframe
+            rules = lista de Rule
+        Output: (relatório, quarentena)
+            relatório = Dataframe com uma linha por regra
+            quarentena = Dataframe com as linhas em quarentena (mesmo índice do df1) e a coluna 'failed_rules'
+    '''
+    report = []
+    quarantined = np.zeros(len(df1), dtype=bool)
+    errors = {}
+    for rule in rules:
+        failures = rule_failures(df1, rule)
+        n_failures = int(failures.sum())
+        report.append({'rule': rule.name,
+                       'description': rule.description,
+                       'columns': ', '.join(rule.columns),
+                       'severity': rule.severity,
+                       'failures': n_failures,
+                       'examples': _examples(df1, rule, failures) if n_failures else ''})
+        if rule.severity == 'error' and n_failures:
+            quarantined |= failures
+            errors[rule.name] = failures
+
+    report = pd.DataFrame(report, columns=['rule', 'description', 'columns', 'severity', 'failures', 'examples'])
+
+    #nomes das regras de cada linha em quarentena (montados apenas para as linhas em quarentena)
+    positions = np.flatnonzero(quarantined)
+    failed_rules = np.full(len(positions), '', dtype=object)
+    for name, failures in errors.items():
+        failed = failures[positions]
+        failed_rules[failed] = np.where(failed_rules[failed] == '', name, failed_rules[failed] + ',' + name)
+    quarantine = df1.iloc[positions].assign(failed_rules=failed_rules)
+
+    return report, quarantine
@@ -0,0 +1,231 @@
+'''
+    Warm-up dos caches após uma alteração do dataset
+
+    Uma thread por processo verifica a data de modificação do dataset. Quando um novo arquivo é
+    copiado (e fica estável por um intervalo), ela executa as páginas em segundo plano (em um contexto
+    sem sessão, com os elementos descartados) para a nova versão: o dataset limpo, as tabelas agregadas, os top N
+    e os mapas das páginas são calculados para o estado padrão dos filtros e para os estados mais
+    usados, preenchendo o cache em memória do processo e o cache em disco.
+    Só então a versão servida às sessões é trocada (uma única atribuição): cada execução das páginas
+    lê a versão uma vez no início e nunca encontra os caches da nova versão pela metade.
+    Os caches em memória indexados pela versão guardam apenas VERSION_ENTRIES (utils.data) versões:
+    a servida e a que está sendo aquecida. As anteriores são descartadas à medida que as novas entram.
+
+    Uso (na raiz do projeto, ex.: no deploy, para preencher o cache em disco antes de subir o servidor):
+        python -m utils.warmup
+'''
+#========================================================
+# IMPORT LIBRARIES
+#========================================================
+import argparse
+import glob
+import logging
+import os
+import runpy
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+from streamlit.runtime.state import SafeSessionState, SessionState
+from streamlit.runtime.uploaded_file_manager import UploadedFileManager
+
+from utils.data import DATASET_PATH, dataset_version
+from utils.disk_cache import ROOT
+
+#variáveis de ambiente
+#   FOME_ZERO_WARMUP=0 -> desativa o warm-up (a versão servida passa a ser a do arquivo, como antes)
+#   FOME_ZERO_WARMUP_INTERVAL=<segundos> -> intervalo da verificação do dataset (padrão 5)
+#   FOME_ZERO_WARMUP_STATES=<n> -> quantidade de estados dos filtros mais usados aquecidos (padrão 4)
+WARMUP_ENV = 'FOME_ZERO_WARMUP'
+WARMUP_INTERVAL_ENV = 'FOME_ZERO_WARMUP_INTERVAL'
+WARMUP_STATES_ENV = 'FOME_ZERO_WARMUP_STATES'
+
+#páginas aquecidas
+PAGES = sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+logger = logging.getLogger(__name__)
+
+#versão e estado dos filtros da execução em segundo plano (apenas na thread do warm-up)
+_local = threading.local()
+
+#estados dos filtros usados pelas sessões do processo
+_states = Counter()
+_states_lock = threading.Lock()
+
+#=======================================================
+# FUNCTIONS
+#=======================================================
+def warmup_enabled():
+    '''
+        Função que retorna se o warm-up está ativo (variável de ambiente)
+        Output: bool
+    '''
+    return os.environ.get(WARMUP_ENV, '1') not in ('', '0')
+
+def record_filter_state( state ):
+    '''
+        Função que conta o uso de um estado dos filtros da sidebar (as execuções do warm-up não contam)
+        Input: (country_options, price_options, table_booking_options, delivery_options, online_options)
+        Output: None
+    '''
+    if getattr(_local, 'version', None) is not None:
+        return None
+    key = tuple(tuple(options) for options in state)
+    with _states_lock:
+        _states[key] += 1
+    return None
+
+def popular_states( qtd ):
+    '''
+        Função que retorna os estados dos filtros mais usados no processo
+        Input: quantidade de estados ('int')
+        Output: lista de estados (listas de opções, como retornadas pelos filtros)
+    '''
+    with _states_lock:
+        return [[list(options) for options in key] for key, _ in _states.most_common(qtd)]
+
+def filters_override():
+    '''
+        Função que retorna o estado dos filtros da execução do warm-up na thread atual
+        (None nas sessões: os filtros vêm dos widgets)
+        Output: estado dos filtros ou None
+    '''
+    return getattr(_local, 'filters', None)
+
+def _headless_context():
+    #contexto de execução sem sessão: os elementos da página são descartados, e os caches do Streamlit
+    #(que só guardam resultados dentro de um contexto) são lidos e gravados como nas sessões
+    return ScriptRunContext(session_id='warmup', _enqueue=lambda msg: None, query_string='',
+                            session_state=SafeSessionState(SessionState()), uploaded_file_mgr=UploadedFileManager(),
+                            page_script_hash='', user_info={'email': None})
+
+def run_page( path, version, filters=None ):
+    '''
+        Função que executa uma página em segundo plano para uma versão do dataset
+        (os widgets retornam os valores padrão, e os filtros da sidebar retornam o estado informado)
+        Inputs:
+            path = caminho do script da página
+            version = versão do dataset
+            filters = estado dos filtros (None = padrão)
+        Output: True se a página executou sem erros
+    '''
+    thread = threading.current_thread()
+    previous = get_script_run_ctx()
+    add_script_run_ctx(thread, _headless_context())
+    _local.version = version
+    _local.filters = filters
+    try:
+        runpy.run_path(path, run_name='__main__')
+        return True
+    except Exception:
+        logger.exception('warm-up: erro ao executar %s', os.path.basename(path))
+        return False
+    finally:
+        _local.version = None
+        _local.filters = None
+        setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+def warm_version( version, states=() ):
+    '''
+        Função que:
+            1. Executa todas as páginas no estado padrão dos filtros (a primeira lê e limpa o dataset)
+            2. Executa todas as páginas nos estados informados
+        Inputs:
+            version = versão do dataset
+            states = estados dos filtros além do padrão
+        Output: quantidade de execuções sem erros
+    '''
+    succeeded = 0
+    for filters in [None] + list(states):
+        for page in PAGES:
+            succeeded += run_page( page, version, filters )
+    return succeeded
+
+class DatasetWatcher:
+    '''
+        Classe que acompanha a data de modificação do dataset em uma thread e publica uma nova versão
+        somente após aquecer os caches dela.
+
+            Atributo:
+                version = versão servida às sessões (trocada de uma vez, após o warm-up)
+
+        Inputs:
+            path = caminho do dataset
+            interval = intervalo da verificação em segundos ('float')
+            qtd_states = quantidade de estados mais usados aquecidos ('int')
+    '''
+    def __init__( self, path, interval, qtd_states ):
+        self.path = path
+        self.interval = interval
+        self.qtd_states = qtd_states
+        self.version = dataset_version(path)
+        self._thread = threading.Thread(target=self._watch, name='fome-zero-warmup', daemon=True)
+
+    def start( self ):
+        self._thread.start()
+        return self
+
+    def _watch( self ):
+        observed = self.version
+        while True:
+            time.sleep(self.interval)
+            try:
+                version = dataset_version(self.path)
+            except OSError:
+                #arquivo sendo substituído
+                continue
+
+            #o arquivo precisa estar estável por um intervalo (cópia terminada) antes do warm-up
+            stable = version == observed
+            observed = version
+            if not stable or version == self.version:
+                continue
+
+            start = time.perf_counter()
+            try:
+                runs = warm_version(version, popular_states(self.qtd_states))
+            except Exception:
+                logger.exception('warm-up: erro no aquecimento da versão %s', version)
+                continue
+            self.version = version
+            logger.info('warm-up: versão %s publicada após %d execuções em %.1f s', version, runs, time.perf_counter() - start)
+
+@st.cache_resource(show_spinner=False)
+def dataset_watcher( path=DATASET_PATH ):
+    '''
+        Função que inicia a thread do warm-up uma única vez por processo
+        Input: caminho do dataset
+        Output: DatasetWatcher (ou None se o warm-up estiver desativado)
+    '''
+    if not warmup_enabled():
+        return None
+    interval = float(os.environ.get(WARMUP_INTERVAL_ENV, '5'))
+    qtd_states = int(os.environ.get(WARMUP_STATES_ENV, '4'))
+    return DatasetWatcher(path, interval, qtd_states).start()
+
+def serving_version( path=DATASET_PATH ):
+    '''
+        Função que retorna a versão do dataset servida às páginas: a última versão aquecida
+        (ou a versão em aquecimento, dentro da thread do warm-up)
+        Input: caminho do dataset
+        Output: versão ('str')
+    '''
+    version = getattr(_local, 'version', None)
+    if version is not None:
+        return version
+    #fora do servidor (ex.: 'python pagina.py') não há sessões para aquecer
+    watcher = dataset_watcher(path) if get_script_run_ctx() is not None else None
+    return watcher.version if watcher is not None else dataset_version(path)
+
+#---------------------------------- CODE LOGIC STRUTURE -----------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Warm-up dos caches do dataset atual (cache em disco)')
+    parser.parse_args()
+
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    runs = warm_version(dataset_version())
+    print(f'{runs} execuções em {time.perf_counter() - start:.1f} s')